@@ -15,7 +15,7 @@ import ujson as json
 from loguru import logger
 
 # 统一使用绝对导入
-from backend.constants import SETTINGS_FILE
+from backend.constants import DOWNLOAD_DEFAULTS, SETTINGS_FILE
 from backend.lib.cookies import CookieManager
 from backend.lib.douyin import Douyin
 from backend.settings import settings
@@ -292,7 +292,12 @@ def start(url, limit, no_download, type, path, cookie, filters):
             from backend.lib.download import download
 
             logger.info("开始下载文件...")
-            download(douyin.down_path, douyin.aria2_conf)
+            download(
+                douyin.down_path,
+                douyin.aria2_conf,
+                settings.get("downloadEngine", DOWNLOAD_DEFAULTS["ENGINE"]),
+                douyin.download_entries,
+            )
 
         return True
 
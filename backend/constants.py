@@ -29,12 +29,120 @@ ARIA2_DEFAULTS = {
     "HOST": "localhost",
     "PORT": 6800,
     "SECRET": "douyin_crawler_default_secret",
+    "TIMEOUT": 10.0,  # 单次 RPC 请求超时（秒）
+    "HEALTH_TIMEOUT": 0.5,  # 健康检查超时（秒）
+    "HEALTH_TTL": 5.0,  # 健康状态缓存时长（秒）
+    "MULTICALL_BATCH": 500,  # 每次 system.multicall 的最大调用数
+    "NOTIFY_RETRY_DELAY": 5.0,  # WebSocket 通知断开后的重连间隔（秒）
 }
 
 # 下载配置默认值
 DOWNLOAD_DEFAULTS = {
     "MAX_RETRIES": 3,
     "MAX_CONCURRENCY": 5,
+    "PER_HOST_CONCURRENCY": 4,  # 单个主机同时下载数
+    "POLL_INTERVAL": 1.0,  # 查询下载引擎进度的间隔（秒）
+    "PROGRESS_INTERVAL": 1.0,  # 下载进度推送间隔（秒）
+    "HISTORY_LIMIT": 2000,  # 最多保留的已结束下载项数
+    "ENGINE": "aria2",  # 下载引擎：aria2 或 http（内置异步下载器）
+    # 以下为内置下载器配置，与 aria2 配置保持一致
+    "SEGMENTS": 4,  # 单个文件的最大分段数
+    "MIN_SEGMENT_SIZE": 5 * 1024 * 1024,  # 最小分段大小（字节），对应 min-split-size
+    "MAX_CONNECTIONS_PER_HOST": 16,  # 单个主机的最大连接数，对应 max-connection-per-server
+    "SPEED_LIMIT": 0,  # 总下载限速（KB/s），0 表示不限速
+    "CHUNK_SIZE": 256 * 1024,  # 每次读取的字节数
+    "TIMEOUT": 60,  # 读取超时（秒）
+    "CONNECT_TIMEOUT": 30,  # 连接超时（秒）
+    "MAX_REDIRECTS": 5,  # 最多跟随的重定向次数
+    "RETRY_WAIT": 3,  # 重试等待时间（秒）
+    "STATE_INTERVAL": 1.0,  # 保存断点续传进度的间隔（秒）
+}
+
+# SSE 配置默认值
+SSE_DEFAULTS = {
+    "REPLAY_BUFFER_SIZE": 1000,  # 重放缓冲区最多保留的事件数
+    "REPLAY_TTL": 300,  # 重放缓冲区事件保留时长（秒）
+    "HEARTBEAT_INTERVAL": 30.0,  # 心跳间隔（秒）
+    "RESULT_BATCH_WINDOW": 0.1,  # 采集结果合并窗口（秒），0 表示不合并
+    "RESULT_BATCH_MAX_ITEMS": 200,  # 合并窗口内累计达到该条数时立即发送
+    "COMPRESS_MIN_BYTES": 4096,  # 开启压缩的客户端，事件数据超过该大小时压缩
+}
+
+# WebSocket 事件通道默认值
+WS_DEFAULTS = {
+    "WINDOW": 256,  # 默认流量控制窗口（未确认事件上限）
+    "MAX_WINDOW": 4096,  # 客户端可设置的最大窗口
+}
+
+# 监控配置默认值
+MONITOR_DEFAULTS = {
+    "CONCURRENCY": 8,  # 单个用户同时采集的账号数
+    "WORKERS": 16,  # 所有用户共享的采集线程数
+    "ACCOUNT_TIMEOUT": 60,  # 单个账号采集超时（秒）
+    "SWEEP_BUDGET": 1800,  # 一轮监控的时间预算（秒），超出的账号留到下一轮
+    "PROGRESS_INTERVAL": 2.0,  # 监控进度推送间隔（秒）
+    "WINDOW_DAYS": 3,  # 统计窗口（天），只跟踪窗口内发布的作品
+    "MAX_PAGES": 5,  # 单个账号每轮最多请求的作品列表页数
+    "DETAIL_REFRESH_MAX": 3,  # 列表页未覆盖的作品不超过该数量时逐个请求详情，否则继续翻页
+    "MIN_POLL_INTERVAL": 600,  # 单个账号最短轮询间隔（秒）
+    "MAX_POLL_INTERVAL": 21600,  # 单个账号最长轮询间隔（秒）
+    "HOT_HOURLY_LIKES": 1000,  # 小时点赞增量达到该值的账号按最短间隔轮询
+    "CADENCE_LOOKBACK_DAYS": 14,  # 统计发布频率的回溯天数
+    "FOLLOWING_REFRESH_INTERVAL": 21600,  # 全量刷新关注列表的间隔（秒），其余时间只检查新关注
+    "FOLLOWING_HEAD_PAGES": 2,  # 检查新关注时最多请求的页数
+    "FOLLOWING_KNOWN_RUN": 5,  # 检查新关注时连续出现多少个已知账号（不含特别关注）后停止翻页
+    "FOLLOWING_MAX_RETRY": 3,  # 关注列表单页请求的最大重试次数
+    "FOLLOWING_MAX_REMOVED_RATIO": 0.5,  # 单次刷新取消关注的账号超过该比例时视为列表不完整
+    "MODE": "local",  # 运行方式: local 服务端进程内采集 / distributed 由监控工作进程采集
+}
+
+# 监控工作进程默认值（python -m backend.monitor.worker）
+WORKER_DEFAULTS = {
+    "CONCURRENCY": 4,  # 每个进程同时采集的账号数
+    "BATCH_SIZE": 8,  # 每次领取的任务数
+    "LEASE_SECONDS": 120,  # 任务租约时长（秒），进程崩溃后租约过期即可被其他进程领取
+    "POLL_INTERVAL": 5.0,  # 没有任务时的轮询间隔（秒）
+    "RETRY_DELAY": 300,  # 失败任务的重试延迟（秒）
+}
+
+# 周期监控计划默认值
+SCHEDULE_DEFAULTS = {
+    "MIN_INTERVAL": 60,  # 最短运行间隔（秒）
+    "JITTER": 60,  # 默认随机抖动上限（秒），分散多个用户的运行时间
+    "MAX_SLEEP": 30.0,  # 调度循环最长休眠时间（秒）
+}
+
+# 用户数据库连接默认值
+DATABASE_DEFAULTS = {
+    "READ_POOL_SIZE": 4,  # 每个用户数据库的只读连接数
+    "WRITE_BATCH": 64,  # 写线程合并到一个事务中的最大写任务数
+    "BUSY_TIMEOUT": 30,  # 等待其他进程释放写锁的超时（秒）
+}
+
+# 跨用户共享作品缓存默认值
+SHARED_CACHE_DEFAULTS = {
+    "TTL": 300,  # 缓存有效期（秒），0 表示不使用共享缓存
+    "BUSY_TIMEOUT": 30,  # 等待其他进程释放写锁的超时（秒）
+}
+
+# 点赞历史降采样与保留期默认值
+ROLLUP_DEFAULTS = {
+    "RAW_RETENTION_HOURS": 48,  # 原始点赞记录保留时长（小时），计算小时增量至少需要 2 小时
+    "HOURLY_RETENTION_DAYS": 30,  # 小时汇总保留天数，之后只保留每日汇总
+    "DAILY_RETENTION_DAYS": 0,  # 每日汇总保留天数，0 表示永久保留
+    "INTERVAL": 3600,  # 后台降采样运行间隔（秒）
+    "INITIAL_DELAY": 60,  # 服务启动后首次运行的延迟（秒）
+    "CHUNK_HOURS": 24,  # 每个事务汇总的小时数，避免长时间占用写锁
+    "DELETE_BATCH": 10000,  # 每个事务删除的过期记录数
+}
+
+# 作品趋势分析默认值
+ANALYTICS_DEFAULTS = {
+    "WINDOWS": (60, 360),  # 增速统计的滑动窗口（分钟），第一个窗口同时用于加速度和爆款判断
+    "BREAKOUT_ZSCORE": 2.5,  # 点赞增速高于同账号其他作品平均值的标准差倍数
+    "MIN_BASELINE_VIDEOS": 3,  # 计算账号基线至少需要的其他作品数
+    "MIN_BREAKOUT_VELOCITY": 100,  # 判定爆款的最低点赞增速（每小时）
+    "OVERLAP_SECONDS": 300,  # 增量读取新采样时向前重叠的时间（秒），避免遗漏稍晚提交的记录
 }
 
 # 默认设置（用于首次运行创建配置文件）
@@ -44,12 +152,25 @@ DEFAULT_SETTINGS = {
     "downloadPath": DOWNLOAD_DIR,
     "maxRetries": DOWNLOAD_DEFAULTS["MAX_RETRIES"],
     "maxConcurrency": DOWNLOAD_DEFAULTS["MAX_CONCURRENCY"],
+    "downloadPerHostConcurrency": DOWNLOAD_DEFAULTS["PER_HOST_CONCURRENCY"],
+    "downloadEngine": DOWNLOAD_DEFAULTS["ENGINE"],
+    "downloadSegments": DOWNLOAD_DEFAULTS["SEGMENTS"],
+    "downloadSpeedLimit": DOWNLOAD_DEFAULTS["SPEED_LIMIT"],
     "windowWidth": 1200,
     "windowHeight": 800,
     "enableIncrementalFetch": True,
     "aria2Host": ARIA2_DEFAULTS["HOST"],
     "aria2Port": ARIA2_DEFAULTS["PORT"],
     "aria2Secret": ARIA2_DEFAULTS["SECRET"],
+    "monitorConcurrency": MONITOR_DEFAULTS["CONCURRENCY"],
+    "monitorWorkers": MONITOR_DEFAULTS["WORKERS"],
+    "monitorAccountTimeout": MONITOR_DEFAULTS["ACCOUNT_TIMEOUT"],
+    "monitorSweepBudget": MONITOR_DEFAULTS["SWEEP_BUDGET"],
+    "monitorMode": MONITOR_DEFAULTS["MODE"],
+    "rollupRawRetentionHours": ROLLUP_DEFAULTS["RAW_RETENTION_HOURS"],
+    "rollupHourlyRetentionDays": ROLLUP_DEFAULTS["HOURLY_RETENTION_DAYS"],
+    "rollupDailyRetentionDays": ROLLUP_DEFAULTS["DAILY_RETENTION_DAYS"],
+    "sharedCacheTtl": SHARED_CACHE_DEFAULTS["TTL"],
 }
 
 # 窗口最小尺寸
@@ -0,0 +1,123 @@
+# -*- encoding: utf-8 -*-
+"""
+aria2 下载引擎
+
+通过 aria2 的 JSON-RPC 接口添加下载并查询进度，aria2 服务由 Aria2Manager 负责启动。
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from ..constants import ARIA2_DEFAULTS
+from ..lib.aria2_client import Aria2Error, get_aria2_client
+from ..lib.douyin.types import DouyinURL, RequestHeaders
+from .items import DownloadItem, DownloadStatus
+
+
+class TransferState:
+    """引擎中单个下载的状态"""
+
+    def __init__(
+        self,
+        status: str,
+        completed_length: int = 0,
+        total_length: int = 0,
+        speed: int = 0,
+        error: Optional[str] = None,
+    ) -> None:
+        self.status = status
+        self.completed_length = completed_length
+        self.total_length = total_length
+        self.speed = speed
+        self.error = error
+
+
+class Aria2Engine:
+    """
+    aria2 下载引擎
+
+    添加和查询都通过 system.multicall 批量完成；已订阅 WebSocket 通知时，
+    下载结束会立即回调，不必等下一轮轮询。
+
+    Args:
+        host / port / secret: aria2 RPC 服务地址和密钥
+    """
+
+    name = "aria2"
+
+    # aria2 状态 -> 下载项状态
+    STATUS_MAP = {
+        "active": DownloadStatus.ACTIVE,
+        "waiting": DownloadStatus.ACTIVE,
+        "paused": DownloadStatus.ACTIVE,
+        "complete": DownloadStatus.COMPLETE,
+        "error": DownloadStatus.ERROR,
+        "removed": DownloadStatus.CANCELLED,
+    }
+
+    STATUS_KEYS = ["status", "completedLength", "totalLength", "downloadSpeed", "errorMessage"]
+
+    def __init__(
+        self,
+        host: str = ARIA2_DEFAULTS["HOST"],
+        port: int = ARIA2_DEFAULTS["PORT"],
+        secret: str = ARIA2_DEFAULTS["SECRET"],
+    ) -> None:
+        self.client = get_aria2_client(host, port, secret)
+
+    @property
+    def notifications_connected(self) -> bool:
+        """是否已订阅下载通知"""
+        return self.client.notifications_connected
+
+    async def add_many(self, items: Sequence[DownloadItem]) -> List[Union[str, Exception]]:
+        """批量添加下载，返回与 items 对应的 gid 或异常"""
+        downloads = [
+            (
+                item.url,
+                {
+                    "dir": item.dir,
+                    "out": item.out,
+                    "user-agent": RequestHeaders.USER_AGENT,
+                    "referer": DouyinURL.BASE,
+                },
+            )
+            for item in items
+        ]
+        return await asyncio.to_thread(self.client.add_uris, downloads)
+
+    async def poll(self, engine_ids: Iterable[str]) -> Dict[str, TransferState]:
+        """查询一批下载的状态，查询失败的下载不出现在结果中"""
+        gids = list(engine_ids)
+        results = await asyncio.to_thread(self.client.tell_status, gids, self.STATUS_KEYS)
+        return {
+            gid: self._transfer_state(result)
+            for gid, result in zip(gids, results)
+            if not isinstance(result, Aria2Error)
+        }
+
+    async def cancel(self, engine_id: str) -> None:
+        """取消下载"""
+        await asyncio.to_thread(self.client.call, "aria2.forceRemove", engine_id)
+
+    async def available(self) -> bool:
+        """aria2 服务是否可用"""
+        return await asyncio.to_thread(self.client.is_available)
+
+    async def listen(self, on_finished: Callable[[str], Awaitable[None]]) -> None:
+        """订阅下载通知，下载结束（完成、失败或被移除）时回调 gid"""
+
+        async def on_event(gid: str, status: str) -> None:
+            if self.STATUS_MAP.get(status) in DownloadStatus.FINISHED:
+                await on_finished(gid)
+
+        await self.client.listen(on_event)
+
+    def _transfer_state(self, result: Dict[str, Any]) -> TransferState:
+        return TransferState(
+            self.STATUS_MAP.get(result.get("status"), DownloadStatus.ACTIVE),
+            int(result.get("completedLength") or 0),
+            int(result.get("totalLength") or 0),
+            int(result.get("downloadSpeed") or 0),
+            result.get("errorMessage") or None,
+        )
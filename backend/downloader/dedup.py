@@ -0,0 +1,169 @@
+# -*- encoding: utf-8 -*-
+"""
+下载文件去重
+
+同一作品经常出现在多个采集目标（搜索、话题、音乐、收藏）中，
+每个目标目录各下载一份。这里提供两种去重方式：
+- 下载前：按 作品ID + 变体 在下载索引中找到已有的文件，直接链接到新目录（见 DownloadIndex.missing）
+- 已有目录：按文件内容哈希查找重复文件，改为指向同一份数据的硬链接（find_duplicates / deduplicate）
+
+链接优先使用硬链接，跨文件系统时尝试写时复制（reflink，仅 Linux 的 btrfs / xfs 等支持）。
+"""
+
+import hashlib
+import os
+import shutil
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .items import PARTIAL_SUFFIXES
+
+# 链接时先写入的临时文件后缀
+_TMP_SUFFIX = ".dedup.tmp"
+
+# Linux ioctl FICLONE
+_FICLONE = 0x40049409
+
+# 先比较文件开头的字节数，不同时不再计算完整哈希
+_HEAD_SIZE = 64 * 1024
+_READ_SIZE = 1024 * 1024
+
+
+def link_file(src: str, dst: str, allow_copy: bool = False) -> str:
+    """
+    让 dst 与 src 共享数据（dst 已存在时原子替换）
+
+    Args:
+        src: 源文件
+        dst: 目标路径
+        allow_copy: 无法链接时是否退化为复制
+
+    Returns:
+        str: 使用的方式 hardlink / reflink / copy
+
+    Raises:
+        OSError: 无法链接且不允许复制
+    """
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    tmp = dst + _TMP_SUFFIX
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+        method = "hardlink"
+    except OSError:
+        try:
+            _reflink(src, tmp)
+            method = "reflink"
+        except OSError:
+            if not allow_copy:
+                raise
+            shutil.copyfile(src, tmp)
+            method = "copy"
+    os.replace(tmp, dst)
+    return method
+
+
+def _reflink(src: str, dst: str) -> None:
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError("当前平台不支持 reflink")
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise
+
+
+def _digest(path: str, limit: Optional[int] = None) -> str:
+    h = hashlib.sha256()
+    remaining = limit
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            data = f.read(_READ_SIZE if remaining is None else min(_READ_SIZE, remaining))
+            if not data:
+                break
+            h.update(data)
+            if remaining is not None:
+                remaining -= len(data)
+    return h.hexdigest()
+
+
+def _group_by(paths: Iterable[str], key: Callable[[str], str]) -> List[List[str]]:
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for path in paths:
+        try:
+            groups[key(path)].append(path)
+        except OSError:
+            continue
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_duplicates(roots: Iterable[str], min_size: int = 1) -> List[List[str]]:
+    """
+    查找内容相同的文件
+
+    先按 (设备, 大小) 分组，再比较开头 64KB 的哈希，最后比较完整 SHA-256。
+    已经是同一个 inode 的文件只计一次；未下载完成的文件（有 .aria2 / .part）跳过。
+
+    Returns:
+        list: 每组内容相同的文件路径（每组至少两个不同的 inode）
+    """
+    by_size: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+    seen_inodes = set()
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root):
+            names = set(filenames)
+            for name in filenames:
+                if name.endswith(PARTIAL_SUFFIXES + (_TMP_SUFFIX,)) or any(
+                    name + suffix in names for suffix in PARTIAL_SUFFIXES
+                ):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.lstat(path)
+                except OSError:
+                    continue
+                if not os.path.isfile(path) or os.path.islink(path) or stat.st_size < min_size:
+                    continue
+                inode = (stat.st_dev, stat.st_ino)
+                if inode in seen_inodes:
+                    continue
+                seen_inodes.add(inode)
+                by_size[(stat.st_dev, stat.st_size)].append(path)
+
+    duplicates: List[List[str]] = []
+    for group in by_size.values():
+        if len(group) < 2:
+            continue
+        for candidates in _group_by(group, lambda path: _digest(path, _HEAD_SIZE)):
+            duplicates.extend(_group_by(candidates, _digest))
+    return duplicates
+
+
+def deduplicate(groups: Iterable[List[str]], dry_run: bool = True) -> Tuple[int, int]:
+    """
+    把每组中除第一个以外的文件替换为第一个文件的硬链接
+
+    Args:
+        groups: find_duplicates 的结果
+        dry_run: 只统计不修改
+
+    Returns:
+        tuple: (替换的文件数, 节省的字节数)
+    """
+    linked = saved = 0
+    for keep, *others in groups:
+        for path in others:
+            size = os.path.getsize(path)
+            if not dry_run:
+                try:
+                    link_file(keep, path)
+                except OSError:
+                    continue
+            linked += 1
+            saved += size
+    return linked, saved
@@ -0,0 +1,375 @@
+# -*- encoding: utf-8 -*-
+"""
+已下载文件索引
+
+记录下载完成的文件（路径、大小、作品ID、媒体变体、耗时）和最终失败的下载（错误信息），
+保存在配置目录的 download_index.db。
+- 生成 aria2 配置或加入下载队列前先查索引，只保留缺少的文件，
+  不再依赖 aria2 的 continue 对每个文件发起一次请求
+- 按作品ID批量查询下载情况（lookup），界面显示本地是否可用时不必逐个检查文件
+
+判断方式：
+- 每个目录只列一次文件（os.scandir），不逐个检查路径
+- 索引中有记录且磁盘上文件大小一致：已下载
+- 索引中没有记录，但文件存在且没有 .aria2 / .part 断点文件：视为之前已下载完成，补记到索引
+- 其他情况（文件不存在、大小不一致、下载到一半）：需要下载，并删除失效的索引记录
+- 需要下载、但同一作品的同一变体已在其他目录下载过时，链接已有文件（见 dedup.link_file），不再下载
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from ..constants import CONFIG_DIR
+from .dedup import link_file
+from .items import PARTIAL_SUFFIXES, DownloadEntry
+
+
+class IndexRecord(NamedTuple):
+    """下载完成的文件"""
+
+    path: str
+    size: int
+    aweme_id: Optional[str] = None
+    variant: Optional[str] = None
+    duration: Optional[float] = None  # 下载耗时（秒），链接或补记的文件为空
+
+
+class ErrorRecord(NamedTuple):
+    """最终失败的下载"""
+
+    path: str
+    error: Optional[str]
+    aweme_id: Optional[str] = None
+    variant: Optional[str] = None
+    attempts: int = 0
+
+
+# 单条 SQL 中 IN 查询的最大参数数
+_BATCH = 500
+
+
+class DownloadIndex:
+    """
+    已下载文件索引
+
+    Args:
+        db_path: 数据库路径，为空时使用配置目录下的 download_index.db
+    """
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        self.db_path = os.path.abspath(db_path or os.path.join(CONFIG_DIR, "download_index.db"))
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS downloads (
+                path TEXT PRIMARY KEY,
+                aweme_id TEXT,
+                size INTEGER NOT NULL,
+                completed_at REAL NOT NULL,
+                variant TEXT,
+                duration REAL
+            )
+            """
+        )
+        # 早期版本的索引没有 variant / duration 列
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(downloads)")}
+        for column, type in (("variant", "TEXT"), ("duration", "REAL")):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE downloads ADD COLUMN {column} {type}")
+        self.conn.execute("DROP INDEX IF EXISTS idx_downloads_aweme_id")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_downloads_media ON downloads (aweme_id, variant)"
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS download_errors (
+                path TEXT PRIMARY KEY,
+                aweme_id TEXT,
+                variant TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL,
+                failed_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_download_errors_aweme_id ON download_errors (aweme_id)"
+        )
+        self.conn.commit()
+
+    def add(
+        self,
+        path: str,
+        size: int,
+        aweme_id: Optional[str] = None,
+        variant: Optional[str] = None,
+        duration: Optional[float] = None,
+    ) -> None:
+        """记录下载完成的文件"""
+        self.add_many([IndexRecord(path, size, aweme_id, variant, duration)])
+
+    def add_many(self, records: Iterable[IndexRecord]) -> None:
+        """批量记录下载完成的文件，同时清除这些文件之前的失败记录"""
+        now = time.time()
+        rows = [
+            (
+                os.path.abspath(record.path),
+                record.aweme_id,
+                record.size,
+                now,
+                record.variant,
+                record.duration,
+            )
+            for record in records
+        ]
+        with self._lock:
+            # 新记录没有作品ID / 变体时保留已有的值
+            self.conn.executemany(
+                "INSERT INTO downloads (path, aweme_id, size, completed_at, variant, duration) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (path) DO UPDATE SET "
+                "aweme_id = COALESCE(excluded.aweme_id, aweme_id), size = excluded.size, "
+                "completed_at = excluded.completed_at, "
+                "variant = COALESCE(excluded.variant, variant), duration = excluded.duration",
+                rows,
+            )
+            self.conn.executemany(
+                "DELETE FROM download_errors WHERE path = ?", [(row[0],) for row in rows]
+            )
+            self.conn.commit()
+
+    def add_errors(self, records: Iterable[ErrorRecord]) -> None:
+        """批量记录最终失败的下载"""
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO download_errors "
+                "(path, aweme_id, variant, error, attempts, failed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        os.path.abspath(record.path),
+                        record.aweme_id,
+                        record.variant,
+                        record.error,
+                        record.attempts,
+                        now,
+                    )
+                    for record in records
+                ],
+            )
+            self.conn.commit()
+
+    def lookup(self, aweme_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        按作品ID批量查询下载情况（只查索引，不检查磁盘）
+
+        Returns:
+            dict: 作品ID -> {"downloaded": 是否有下载完成的文件,
+                            "files": [{path, variant, size, duration, completed_at}],
+                            "errors": [{path, variant, error, attempts, failed_at}]}，
+                  没有任何记录的作品不出现在结果中
+        """
+        ids = list(dict.fromkeys(aweme_ids))
+        result: Dict[str, Dict[str, Any]] = {}
+
+        def record(aweme_id: str) -> Dict[str, Any]:
+            return result.setdefault(
+                aweme_id, {"downloaded": False, "files": [], "errors": []}
+            )
+
+        with self._lock:
+            for start in range(0, len(ids), _BATCH):
+                batch = ids[start : start + _BATCH]
+                placeholders = ",".join("?" * len(batch))
+                for aweme_id, path, variant, size, duration, completed_at in self.conn.execute(
+                    "SELECT aweme_id, path, variant, size, duration, completed_at FROM downloads "
+                    f"WHERE aweme_id IN ({placeholders}) ORDER BY path",
+                    batch,
+                ):
+                    entry = record(aweme_id)
+                    entry["downloaded"] = True
+                    entry["files"].append(
+                        {
+                            "path": path,
+                            "variant": variant,
+                            "size": size,
+                            "duration": duration,
+                            "completed_at": completed_at,
+                        }
+                    )
+                for aweme_id, path, variant, error, attempts, failed_at in self.conn.execute(
+                    "SELECT aweme_id, path, variant, error, attempts, failed_at "
+                    f"FROM download_errors WHERE aweme_id IN ({placeholders}) ORDER BY path",
+                    batch,
+                ):
+                    record(aweme_id)["errors"].append(
+                        {
+                            "path": path,
+                            "variant": variant,
+                            "error": error,
+                            "attempts": attempts,
+                            "failed_at": failed_at,
+                        }
+                    )
+        return result
+
+    def remove(self, paths: Iterable[str]) -> None:
+        """删除索引记录"""
+        with self._lock:
+            self.conn.executemany(
+                "DELETE FROM downloads WHERE path = ?",
+                [(os.path.abspath(path),) for path in paths],
+            )
+            self.conn.commit()
+
+    def missing(self, entries: Sequence[DownloadEntry], link: bool = True) -> List[DownloadEntry]:
+        """
+        筛选出需要下载的下载项，同时补记已存在的完整文件、清理失效记录
+
+        Args:
+            entries: 下载项
+            link: 同一作品的同一变体已下载到其他目录时，是否链接过来代替下载
+
+        Returns:
+            list: 需要下载的下载项（保持原顺序）
+        """
+        listings: Dict[str, Dict[str, int]] = {}
+        for dir in {entry.dir for entry in entries}:
+            listings[dir] = self._list_dir(dir)
+        indexed = self._indexed([os.path.abspath(entry.path) for entry in entries])
+
+        result: List[DownloadEntry] = []
+        adopted: List[IndexRecord] = []
+        backfill: List[Tuple[str, Optional[str], str]] = []
+        stale: List[str] = []
+        for entry in entries:
+            listing = listings[entry.dir]
+            path = os.path.abspath(entry.path)
+            size = listing.get(entry.out)
+            partial = any(entry.out + suffix in listing for suffix in PARTIAL_SUFFIXES)
+            if size is not None and not partial:
+                if path in indexed and indexed[path][0] == size:
+                    # 从 aria2 配置记入的文件没有作品ID，这里补上
+                    if entry.aweme_id and indexed[path][1] is None:
+                        backfill.append((entry.aweme_id, entry.variant, path))
+                    continue
+                if path not in indexed and size > 0:
+                    adopted.append(IndexRecord(path, size, entry.aweme_id, entry.variant))
+                    continue
+            if path in indexed:
+                stale.append(path)
+            result.append(entry)
+
+        if stale:
+            self.remove(stale)
+        if backfill:
+            with self._lock:
+                self.conn.executemany(
+                    "UPDATE downloads SET aweme_id = ?, variant = COALESCE(?, variant) "
+                    "WHERE path = ? AND aweme_id IS NULL",
+                    backfill,
+                )
+                self.conn.commit()
+        if link:
+            linked = self._link_existing(result)
+            if linked:
+                adopted.extend(linked)
+                linked_paths = {record[0] for record in linked}
+                result = [entry for entry in result if os.path.abspath(entry.path) not in linked_paths]
+                logger.info(f"已从其他目录链接 {len(linked)} 个相同作品的文件")
+        if adopted:
+            self.add_many(adopted)
+        return result
+
+    def _link_existing(self, entries: List[DownloadEntry]) -> List[IndexRecord]:
+        """为已在其他目录下载过的下载项创建链接，返回需要记入索引的记录"""
+        wanted = [entry for entry in entries if entry.aweme_id and entry.variant]
+        if not wanted:
+            return []
+        sources: Dict[Tuple[str, str], List[Tuple[str, int]]] = {}
+        aweme_ids = list({entry.aweme_id for entry in wanted})
+        with self._lock:
+            for start in range(0, len(aweme_ids), _BATCH):
+                batch = aweme_ids[start : start + _BATCH]
+                rows = self.conn.execute(
+                    "SELECT aweme_id, variant, path, size FROM downloads "
+                    f"WHERE aweme_id IN ({','.join('?' * len(batch))})",
+                    batch,
+                )
+                for aweme_id, variant, path, size in rows:
+                    sources.setdefault((aweme_id, variant), []).append((path, size))
+
+        linked: List[IndexRecord] = []
+        for entry in wanted:
+            path = os.path.abspath(entry.path)
+            for source, size in sources.get((entry.aweme_id, entry.variant), []):
+                if source == path:
+                    continue
+                try:
+                    if os.path.getsize(source) != size:
+                        continue
+                    link_file(source, path, allow_copy=True)
+                except OSError:
+                    continue
+                for suffix in PARTIAL_SUFFIXES:
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+                linked.append(IndexRecord(path, size, entry.aweme_id, entry.variant))
+                break
+        return linked
+
+    def count(self) -> int:
+        """索引中的文件数"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    def _indexed(self, paths: List[str]) -> Dict[str, Tuple[int, Optional[str]]]:
+        """索引中的 路径 -> (大小, 作品ID)"""
+        indexed: Dict[str, Tuple[int, Optional[str]]] = {}
+        with self._lock:
+            for start in range(0, len(paths), _BATCH):
+                batch = paths[start : start + _BATCH]
+                rows = self.conn.execute(
+                    "SELECT path, size, aweme_id FROM downloads "
+                    f"WHERE path IN ({','.join('?' * len(batch))})",
+                    batch,
+                )
+                indexed.update((path, (size, aweme_id)) for path, size, aweme_id in rows)
+        return indexed
+
+    @staticmethod
+    def _list_dir(dir: str) -> Dict[str, int]:
+        """目录下的文件名和大小，目录不存在时为空"""
+        try:
+            with os.scandir(dir) as it:
+                return {
+                    entry.name: entry.stat().st_size
+                    for entry in it
+                    if entry.is_file(follow_symlinks=False)
+                }
+        except OSError:
+            return {}
+
+
+_download_index: Optional[DownloadIndex] = None
+_download_index_lock = threading.Lock()
+
+
+def get_download_index() -> DownloadIndex:
+    """获取进程内共享的下载索引（首次调用时打开数据库）"""
+    global _download_index
+    with _download_index_lock:
+        if _download_index is None:
+            _download_index = DownloadIndex()
+        return _download_index
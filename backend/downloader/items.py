@@ -0,0 +1,210 @@
+# -*- encoding: utf-8 -*-
+"""
+下载项
+
+把采集结果转换为下载项（下载地址、保存目录、文件名），
+aria2 配置文件和后端下载服务使用同一套命名规则。
+"""
+
+import itertools
+import os
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+# aria2 和内置下载器未完成下载时留下的断点文件后缀
+PARTIAL_SUFFIXES = (".aria2", ".part")
+
+
+class DownloadEntry(NamedTuple):
+    """
+    下载项：下载地址、保存目录、文件名、所属作品ID和媒体变体
+
+    同一作品的同一变体（video / image_1 ...）内容相同，不同采集目标之间可以共用
+    """
+
+    url: str
+    dir: str
+    out: str
+    aweme_id: Optional[str] = None
+    variant: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        """保存路径"""
+        return os.path.join(self.dir, self.out)
+
+
+def build_entries(results: List[Dict[str, Any]], type: str, down_path: str) -> List[DownloadEntry]:
+    """
+    按采集结果生成下载项，关注/粉丝列表等没有可下载文件的类型返回空列表
+
+    Args:
+        results: 采集结果
+        type: 采集类型
+        down_path: 任务下载目录
+    """
+    if type in ["following", "follower"]:
+        return []
+
+    entries: List[DownloadEntry] = []
+    for line in results:
+        desc = line.get("desc") or "无标题"
+        filename = f'{line["id"]}_{desc}'
+
+        if type == "mix":
+            filename = f"第{line['no']}集_{filename}"
+
+        # 图文作品
+        if isinstance(line.get("download_addr"), list):
+            if type == "aweme":
+                image_dir = down_path.replace(line["id"], filename)
+            else:
+                image_dir = os.path.join(down_path, filename)
+
+            for index, addr in enumerate(line["download_addr"]):
+                entries.append(
+                    DownloadEntry(
+                        addr,
+                        image_dir,
+                        f'{line["id"]}_{index + 1}.jpeg',
+                        line["id"],
+                        f"image_{index + 1}",
+                    )
+                )
+        # 视频作品
+        elif isinstance(line.get("download_addr"), str):
+            entries.append(
+                DownloadEntry(
+                    line["download_addr"], down_path, f"{filename}.mp4", line["id"], "video"
+                )
+            )
+        else:
+            logger.error("下载地址错误")
+    return entries
+
+
+def read_input_file(path: str, default_dir: str = ".") -> List[DownloadEntry]:
+    """
+    读取 aria2 输入文件（与 Douyin._save_aria2_config 写出的格式相同）
+
+    每个下载以地址行开头（多个镜像地址用制表符分隔时取第一个），
+    后面缩进的 key=value 行是该下载的选项，这里只使用 dir 和 out。
+
+    Args:
+        path: 输入文件路径
+        default_dir: 没有 dir 选项时的保存目录
+    """
+    entries: List[DownloadEntry] = []
+    current: Optional[Dict[str, str]] = None
+
+    def flush() -> None:
+        if current is None:
+            return
+        # 没有 out 选项时与 aria2 一样使用地址中的文件名
+        out = current.get("out") or os.path.basename(urlsplit(current["url"]).path)
+        if out:
+            entries.append(DownloadEntry(current["url"], current.get("dir", default_dir), out))
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            if line[0] in " \t":
+                if current is not None and "=" in line:
+                    key, value = line.strip().split("=", 1)
+                    current[key] = value
+                continue
+            flush()
+            current = {"url": line.strip().split("\t")[0]}
+    flush()
+    return entries
+
+
+class DownloadStatus:
+    """下载项状态"""
+
+    QUEUED = "queued"
+    ACTIVE = "active"
+    COMPLETE = "complete"
+    ERROR = "error"
+    CANCELLED = "cancelled"
+
+    ALL = (QUEUED, ACTIVE, COMPLETE, ERROR, CANCELLED)
+    FINISHED = (COMPLETE, ERROR, CANCELLED)
+
+
+_ids = itertools.count(1)
+
+
+class DownloadItem:
+    """
+    单个下载项
+
+    Args:
+        url: 下载地址
+        dir: 保存目录
+        out: 文件名
+        priority: 优先级，越大越先下载
+        task_id: 来源采集任务
+        aweme_id: 所属作品ID
+        variant: 媒体变体（video / image_1 ...）
+    """
+
+    def __init__(
+        self,
+        url: str,
+        dir: str,
+        out: str,
+        priority: int = 0,
+        task_id: Optional[str] = None,
+        aweme_id: Optional[str] = None,
+        variant: Optional[str] = None,
+    ) -> None:
+        self.id = f"dl_{next(_ids)}"
+        self.url = url
+        self.dir = dir
+        self.out = out
+        self.host = urlsplit(url).hostname or ""
+        self.priority = priority
+        self.task_id = task_id
+        self.aweme_id = aweme_id
+        self.variant = variant
+        self.status = DownloadStatus.QUEUED
+        self.engine_id: Optional[str] = None  # 下载引擎中的任务ID（如 aria2 gid）
+        self.attempts = 0
+        self.completed_length = 0
+        self.total_length = 0
+        self.speed = 0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def path(self) -> str:
+        """保存路径"""
+        return os.path.join(self.dir, self.out)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            "id": self.id,
+            "url": self.url,
+            "path": self.path,
+            "host": self.host,
+            "priority": self.priority,
+            "task_id": self.task_id,
+            "aweme_id": self.aweme_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "completed_length": self.completed_length,
+            "total_length": self.total_length,
+            "speed": self.speed,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
@@ -0,0 +1,725 @@
+# -*- encoding: utf-8 -*-
+"""
+内置异步下载引擎
+
+没有 aria2 时使用的纯 Python 下载器，基于 asyncio 自带的流实现 HTTP/1.1：
+- 支持 Range 的文件按分段并行下载，写入前预分配文件空间
+- 下载中的文件保存为 .part，分段进度保存在 .part.json，中断后从断点继续
+- 按主机复用连接（keep-alive），并限制单个主机的连接数
+- 全局限速（令牌桶）
+- 可直接读取 aria2 输入文件，也可作为下载服务的引擎（HttpEngine）
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import ssl
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from loguru import logger
+
+from ..constants import DOWNLOAD_DEFAULTS
+from ..lib.douyin.types import DouyinURL, RequestHeaders
+from ..settings import settings
+from .aria2 import TransferState
+from .items import DownloadEntry, DownloadItem, DownloadStatus
+
+# (协议, 主机, 端口)
+HostKey = Tuple[str, str, int]
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class DownloadError(Exception):
+    """下载失败"""
+
+
+class _RangeMismatch(DownloadError):
+    """服务器返回的范围与断点不一致（文件已变化或不再支持 Range）"""
+
+
+class TransferProgress:
+    """单个文件的下载进度"""
+
+    def __init__(self) -> None:
+        self.completed = 0
+        self.total = 0
+        self.speed = 0
+        self._sample = (time.monotonic(), 0)
+
+    def update_speed(self, min_interval: float = 0.5) -> int:
+        """按两次调用之间的增量计算速度（字节/秒）"""
+        now = time.monotonic()
+        sampled_at, sampled = self._sample
+        if now - sampled_at >= min_interval:
+            self.speed = int((self.completed - sampled) / (now - sampled_at))
+            self._sample = (now, self.completed)
+        return self.speed
+
+
+class RateLimiter:
+    """
+    全局限速（令牌桶），所有分段共用
+
+    Args:
+        rate: 每秒允许的字节数，0 表示不限速
+    """
+
+    def __init__(self, rate: int = 0) -> None:
+        self.rate = rate
+        self._next = 0.0
+
+    async def consume(self, size: int) -> None:
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        # 允许最多 0.1 秒的突发，避免小块读取时频繁休眠
+        start = max(self._next, now - 0.1)
+        self._next = start + size / self.rate
+        delay = self._next - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class _Response:
+    """HTTP 响应，读取完响应体后连接放回连接池"""
+
+    def __init__(
+        self,
+        pool: "HttpPool",
+        key: HostKey,
+        conn: _Connection,
+        url: str,
+        status: int,
+        headers: Dict[str, str],
+    ) -> None:
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self._chunked = "chunked" in headers.get("transfer-encoding", "").lower()
+        self._chunk_left = 0
+        self._remaining: Optional[int] = None
+        if status in (204, 304) or 100 <= status < 200:
+            self._remaining = 0
+        elif not self._chunked and "content-length" in headers:
+            self._remaining = int(headers["content-length"])
+        # 既没有长度也不是分块编码时读到连接关闭为止，连接不能复用
+        self._keep_alive = headers.get("connection", "").lower() != "close" and (
+            self._chunked or self._remaining is not None
+        )
+        self._done = self._remaining == 0
+        self._released = False
+
+    @property
+    def content_length(self) -> Optional[int]:
+        if self._chunked:
+            return None
+        length = self.headers.get("content-length")
+        return int(length) if length is not None else None
+
+    def content_range(self) -> Tuple[int, Optional[int]]:
+        """解析 Content-Range，返回 (起始位置, 文件总大小)"""
+        value = self.headers.get("content-range", "")
+        try:
+            unit, spec = value.split(" ", 1)
+            span, total = spec.split("/", 1)
+            start = int(span.split("-", 1)[0])
+        except ValueError:
+            raise DownloadError(f"无法解析 Content-Range: {value!r}")
+        return start, None if total.strip() == "*" else int(total)
+
+    async def read(self, size: int) -> bytes:
+        """读取最多 size 字节，读完返回 b''"""
+        if self._done:
+            return b""
+        if self._chunked:
+            if self._chunk_left == 0:
+                line = await self._pool.timed(self._conn.reader.readline())
+                chunk_size = int(line.split(b";", 1)[0].strip() or b"0", 16)
+                if chunk_size == 0:
+                    # 跳过 trailer
+                    while (await self._pool.timed(self._conn.reader.readline())) not in (
+                        b"\r\n",
+                        b"\n",
+                        b"",
+                    ):
+                        pass
+                    self._done = True
+                    return b""
+                self._chunk_left = chunk_size
+            data = await self._pool.timed(self._conn.reader.read(min(size, self._chunk_left)))
+            if not data:
+                raise DownloadError("连接提前关闭")
+            self._chunk_left -= len(data)
+            if self._chunk_left == 0:
+                await self._pool.timed(self._conn.reader.readexactly(2))
+            return data
+        if self._remaining is None:
+            data = await self._pool.timed(self._conn.reader.read(size))
+            self._done = not data
+            return data
+        data = await self._pool.timed(self._conn.reader.read(min(size, self._remaining)))
+        if not data:
+            raise DownloadError("连接提前关闭")
+        self._remaining -= len(data)
+        self._done = self._remaining == 0
+        return data
+
+    def release(self) -> None:
+        """释放连接：响应体已读完时放回连接池，否则关闭"""
+        if not self._released:
+            self._released = True
+            self._pool.release(self._key, self._conn, self._done and self._keep_alive)
+
+
+class HttpPool:
+    """
+    HTTP/1.1 连接池
+
+    Args:
+        max_per_host: 单个主机的最大连接数
+        timeout: 读取超时（秒）
+        connect_timeout: 连接超时（秒）
+        max_redirects: 最多跟随的重定向次数
+        headers: 每个请求附带的请求头
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = DOWNLOAD_DEFAULTS["MAX_CONNECTIONS_PER_HOST"],
+        timeout: float = DOWNLOAD_DEFAULTS["TIMEOUT"],
+        connect_timeout: float = DOWNLOAD_DEFAULTS["CONNECT_TIMEOUT"],
+        max_redirects: int = DOWNLOAD_DEFAULTS["MAX_REDIRECTS"],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_redirects = max_redirects
+        self.headers = headers or {}
+        self._idle: Dict[HostKey, List[_Connection]] = defaultdict(list)
+        self._slots: Dict[HostKey, asyncio.Semaphore] = {}
+        self._ssl = ssl.create_default_context()
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> _Response:
+        """发送 GET 请求并跟随重定向，调用方读取后必须 release()"""
+        for _ in range(self.max_redirects + 1):
+            response = await self._request(url, headers or {})
+            location = response.headers.get("location")
+            if response.status not in REDIRECT_STATUSES or not location:
+                return response
+            response.release()
+            url = urljoin(url, location)
+        raise DownloadError("重定向次数过多")
+
+    async def timed(self, awaitable: Awaitable[Any]) -> Any:
+        """带读取超时地等待"""
+        try:
+            async with asyncio.timeout(self.timeout):
+                return await awaitable
+        except TimeoutError:
+            raise DownloadError(f"读取超时（{self.timeout} 秒）")
+
+    def release(self, key: HostKey, conn: _Connection, reuse: bool) -> None:
+        if reuse:
+            self._idle[key].append(conn)
+        else:
+            conn.close()
+        self._slots[key].release()
+
+    def close(self) -> None:
+        """关闭所有空闲连接"""
+        for conns in self._idle.values():
+            for conn in conns:
+                conn.close()
+        self._idle.clear()
+
+    async def _request(self, url: str, headers: Dict[str, str]) -> _Response:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise DownloadError(f"不支持的下载地址: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        host = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+        target = parts.path or "/"
+        if parts.query:
+            target += f"?{parts.query}"
+        lines = [f"GET {target} HTTP/1.1", f"Host: {host}"]
+        for name, value in {
+            **self.headers,
+            "Accept": "*/*",
+            "Accept-Encoding": "identity",
+            "Connection": "keep-alive",
+            **headers,
+        }.items():
+            lines.append(f"{name}: {value}")
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        slot = self._slots.setdefault(key, asyncio.Semaphore(self.max_per_host))
+        await slot.acquire()
+        try:
+            while True:
+                conn, reused = await self._connection(key)
+                try:
+                    conn.writer.write(request)
+                    await conn.writer.drain()
+                    head = await self.timed(conn.reader.readuntil(b"\r\n\r\n"))
+                except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+                    conn.close()
+                    # 空闲连接可能已被服务器关闭，换新连接重试
+                    if reused:
+                        continue
+                    raise DownloadError(f"请求失败: {e}")
+                except BaseException:
+                    conn.close()
+                    raise
+                status, response_headers = self._parse_head(head)
+                return _Response(self, key, conn, url, status, response_headers)
+        except BaseException:
+            slot.release()
+            raise
+
+    async def _connection(self, key: HostKey) -> Tuple[_Connection, bool]:
+        idle = self._idle[key]
+        while idle:
+            conn = idle.pop()
+            if not conn.reader.at_eof() and not conn.writer.is_closing():
+                return conn, True
+            conn.close()
+        scheme, hostname, port = key
+        try:
+            async with asyncio.timeout(self.connect_timeout):
+                reader, writer = await asyncio.open_connection(
+                    hostname,
+                    port,
+                    ssl=self._ssl if scheme == "https" else None,
+                    limit=DOWNLOAD_DEFAULTS["CHUNK_SIZE"],
+                )
+        except (OSError, TimeoutError) as e:
+            raise DownloadError(f"无法连接 {hostname}:{port}: {e or '连接超时'}")
+        return _Connection(reader, writer), False
+
+    @staticmethod
+    def _parse_head(head: bytes) -> Tuple[int, Dict[str, str]]:
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            status = int(lines[0].split(" ", 2)[1])
+        except (IndexError, ValueError):
+            raise DownloadError(f"无效的响应: {lines[0]!r}")
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+
+class _Segment:
+    """文件中的一段 [start, end]，pos 为下一个要写入的位置"""
+
+    def __init__(self, start: int, end: int, pos: Optional[int] = None) -> None:
+        self.start = start
+        self.end = end
+        self.pos = start if pos is None else pos
+
+    @property
+    def done(self) -> bool:
+        return self.pos > self.end
+
+
+class HttpDownloader:
+    """
+    异步 HTTP 下载器
+
+    Args:
+        segments: 单个文件的最大分段数
+        min_segment_size: 最小分段大小（字节）
+        max_connections_per_host: 单个主机的最大连接数
+        speed_limit: 总下载限速（字节/秒），0 表示不限速
+        chunk_size: 每次读取的字节数
+        timeout: 读取超时（秒）
+    """
+
+    def __init__(
+        self,
+        segments: int = DOWNLOAD_DEFAULTS["SEGMENTS"],
+        min_segment_size: int = DOWNLOAD_DEFAULTS["MIN_SEGMENT_SIZE"],
+        max_connections_per_host: int = DOWNLOAD_DEFAULTS["MAX_CONNECTIONS_PER_HOST"],
+        speed_limit: int = DOWNLOAD_DEFAULTS["SPEED_LIMIT"],
+        chunk_size: int = DOWNLOAD_DEFAULTS["CHUNK_SIZE"],
+        timeout: float = DOWNLOAD_DEFAULTS["TIMEOUT"],
+    ) -> None:
+        self.segments = segments
+        self.min_segment_size = min_segment_size
+        self.chunk_size = chunk_size
+        self.limiter = RateLimiter(speed_limit)
+        self.pool = HttpPool(
+            max_connections_per_host,
+            timeout,
+            headers={"User-Agent": RequestHeaders.USER_AGENT, "Referer": DouyinURL.BASE},
+        )
+
+    @classmethod
+    def from_settings(cls) -> "HttpDownloader":
+        """按设置创建（分段数、限速）"""
+        return cls(
+            segments=settings.get("downloadSegments", DOWNLOAD_DEFAULTS["SEGMENTS"]),
+            speed_limit=settings.get("downloadSpeedLimit", DOWNLOAD_DEFAULTS["SPEED_LIMIT"])
+            * 1024,
+        )
+
+    async def fetch(
+        self, url: str, path: str, progress: Optional[TransferProgress] = None
+    ) -> None:
+        """
+        下载单个文件，已存在的完整文件直接跳过，未完成的 .part 文件从断点继续
+
+        Raises:
+            DownloadError: 下载失败（.part 文件和进度保留，下次继续）
+        """
+        progress = progress or TransferProgress()
+        part = f"{path}.part"
+        if os.path.exists(path) and not os.path.exists(part):
+            progress.completed = progress.total = os.path.getsize(path)
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        segments = self._load_state(part)
+        if segments:
+            progress.total = segments[-1].end + 1
+            progress.completed = sum(segment.pos - segment.start for segment in segments)
+            try:
+                await self._run_segments(url, part, segments, progress)
+            except _RangeMismatch as e:
+                logger.warning(f"[Download] {os.path.basename(path)} 无法续传，重新下载: {e}")
+                self._remove(part)
+                progress.completed = progress.total = 0
+            else:
+                self._complete(part, path)
+                return
+
+        response = await self.pool.get(url, {"Range": "bytes=0-"})
+        try:
+            if response.status == 206:
+                _, total = response.content_range()
+            elif response.status == 200:
+                total = None
+            else:
+                raise DownloadError(f"HTTP {response.status}")
+        except BaseException:
+            response.release()
+            raise
+
+        if total is None:
+            # 服务器不支持 Range，整个文件单连接下载，无法续传
+            await self._stream(response, part, progress)
+        else:
+            progress.total = total
+            self._allocate(part, total)
+            segments = self._plan(total)
+            self._save_state(part, segments)
+            await self._run_segments(url, part, segments, progress, first=response)
+        self._complete(part, path)
+
+    async def fetch_all(
+        self,
+        entries: Sequence[DownloadEntry],
+        concurrency: int = DOWNLOAD_DEFAULTS["MAX_CONCURRENCY"],
+        per_host: int = DOWNLOAD_DEFAULTS["PER_HOST_CONCURRENCY"],
+        retries: int = DOWNLOAD_DEFAULTS["MAX_RETRIES"],
+        retry_wait: float = DOWNLOAD_DEFAULTS["RETRY_WAIT"],
+    ) -> Tuple[int, int]:
+        """
+        下载一批文件（命令行模式使用）
+
+        Args:
+            entries: 下载项（DownloadEntry）
+            concurrency: 同时下载的文件数
+            per_host: 单个主机同时下载的文件数
+            retries: 失败后的重试次数
+            retry_wait: 重试等待时间（秒）
+
+        Returns:
+            tuple: (成功数, 失败数)
+        """
+        limit = asyncio.Semaphore(concurrency)
+        host_limits: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(per_host)
+        )
+
+        async def fetch_one(entry: DownloadEntry) -> bool:
+            out = entry.out
+            async with limit, host_limits[urlsplit(entry.url).hostname or ""]:
+                for attempt in range(retries + 1):
+                    try:
+                        await self.fetch(entry.url, entry.path)
+                        return True
+                    except DownloadError as e:
+                        if attempt == retries:
+                            logger.error(f"✗ {out} 下载失败: {e}")
+                            return False
+                        logger.warning(f"[Download] {out} 下载失败，{retry_wait} 秒后重试: {e}")
+                        await asyncio.sleep(retry_wait)
+                    except OSError as e:
+                        # 磁盘已满、没有写权限等本地错误重试无用，只算该文件失败
+                        logger.error(f"✗ {out} 写入失败: {e}")
+                        return False
+            return False
+
+        try:
+            results = await asyncio.gather(*(fetch_one(entry) for entry in entries))
+        finally:
+            self.pool.close()
+        succeeded = sum(results)
+        return succeeded, len(results) - succeeded
+
+    def _plan(self, total: int) -> List[_Segment]:
+        """按分段数和最小分段大小切分文件"""
+        if total == 0:
+            return [_Segment(0, -1)]
+        count = max(1, min(self.segments, total // max(self.min_segment_size, 1)))
+        size = -(-total // count)
+        return [_Segment(start, min(start + size, total) - 1) for start in range(0, total, size)]
+
+    async def _run_segments(
+        self,
+        url: str,
+        part: str,
+        segments: List[_Segment],
+        progress: TransferProgress,
+        first: Optional[_Response] = None,
+    ) -> None:
+        """并行下载未完成的分段，first 为已打开的、从文件开头开始的响应"""
+        pending = [segment for segment in segments if not segment.done]
+        if first is not None and (not pending or pending[0].pos != 0):
+            first.release()
+            first = None
+        saver = asyncio.create_task(self._save_periodically(part, segments))
+        try:
+            async with asyncio.TaskGroup() as group:
+                for index, segment in enumerate(pending):
+                    response = first if index == 0 else None
+                    group.create_task(
+                        self._run_segment(url, part, segment, progress, response)
+                    )
+        except BaseExceptionGroup as group_error:
+            raise group_error.exceptions[0]
+        finally:
+            saver.cancel()
+            # 任务未开始就被取消时 first 不会被释放
+            if first is not None:
+                first.release()
+            if os.path.exists(part):
+                self._save_state(part, segments)
+
+    async def _run_segment(
+        self,
+        url: str,
+        part: str,
+        segment: _Segment,
+        progress: TransferProgress,
+        response: Optional[_Response] = None,
+    ) -> None:
+        if response is None:
+            response = await self.pool.get(url, {"Range": f"bytes={segment.pos}-{segment.end}"})
+        try:
+            if response.status != 206:
+                raise _RangeMismatch(f"HTTP {response.status}")
+            start, total = response.content_range()
+            if start != segment.pos or (total is not None and total != progress.total):
+                raise _RangeMismatch("Content-Range 与断点不一致")
+            with open(part, "r+b", buffering=0) as f:
+                f.seek(segment.pos)
+                while not segment.done:
+                    data = await response.read(min(self.chunk_size, segment.end - segment.pos + 1))
+                    if not data:
+                        raise DownloadError("连接提前关闭")
+                    await self.limiter.consume(len(data))
+                    self._write_all(f, data)
+                    segment.pos += len(data)
+                    progress.completed += len(data)
+        finally:
+            response.release()
+
+    async def _stream(self, response: _Response, part: str, progress: TransferProgress) -> None:
+        progress.total = response.content_length or 0
+        progress.completed = 0
+        try:
+            with open(part, "wb", buffering=0) as f:
+                while True:
+                    data = await response.read(self.chunk_size)
+                    if not data:
+                        break
+                    await self.limiter.consume(len(data))
+                    self._write_all(f, data)
+                    progress.completed += len(data)
+        finally:
+            response.release()
+        # 不支持续传的文件没有进度文件，清理可能残留的旧进度
+        self._remove_state(part)
+
+    async def _save_periodically(self, part: str, segments: List[_Segment]) -> None:
+        while True:
+            await asyncio.sleep(DOWNLOAD_DEFAULTS["STATE_INTERVAL"])
+            self._save_state(part, segments)
+
+    @staticmethod
+    def _write_all(f: Any, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            view = view[f.write(view) :]
+
+    @staticmethod
+    def _allocate(part: str, total: int) -> None:
+        """预分配文件空间，文件系统不支持时退化为设置文件大小"""
+        with open(part, "wb") as f:
+            try:
+                os.posix_fallocate(f.fileno(), 0, total)
+            except (AttributeError, OSError):
+                f.truncate(total)
+
+    @staticmethod
+    def _load_state(part: str) -> Optional[List[_Segment]]:
+        try:
+            with open(f"{part}.json", encoding="utf-8") as f:
+                state = json.load(f)
+            segments = [_Segment(*segment) for segment in state["segments"]]
+            # 只剩进度文件（.part 已被删除）时从头下载
+            size = os.path.getsize(part)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if not segments or size != state.get("total"):
+            return None
+        return segments
+
+    @staticmethod
+    def _save_state(part: str, segments: List[_Segment]) -> None:
+        state = {
+            "total": segments[-1].end + 1,
+            "segments": [[segment.start, segment.end, segment.pos] for segment in segments],
+        }
+        tmp = f"{part}.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, f"{part}.json")
+
+    @classmethod
+    def _complete(cls, part: str, path: str) -> None:
+        os.replace(part, path)
+        cls._remove_state(part)
+
+    @classmethod
+    def _remove(cls, part: str) -> None:
+        cls._remove_state(part)
+        if os.path.exists(part):
+            os.remove(part)
+
+    @staticmethod
+    def _remove_state(part: str) -> None:
+        if os.path.exists(f"{part}.json"):
+            os.remove(f"{part}.json")
+
+
+class HttpEngine:
+    """
+    下载服务使用的内置下载引擎
+
+    每个下载项对应一个 asyncio 任务，下载结束时立即通知下载服务。
+
+    Args:
+        downloader: 下载器，为空时按设置创建
+    """
+
+    name = "http"
+
+    def __init__(self, downloader: Optional[HttpDownloader] = None) -> None:
+        self.downloader = downloader or HttpDownloader.from_settings()
+        self._ids = itertools.count(1)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._progress: Dict[str, TransferProgress] = {}
+        self._on_finished: Optional[Callable[[str], Awaitable[None]]] = None
+        self.notifications_connected = False
+
+    async def add_many(self, items: Sequence[DownloadItem]) -> List[str]:
+        """为每个下载项启动下载任务"""
+        engine_ids = []
+        for item in items:
+            engine_id = f"http_{next(self._ids)}"
+            progress = TransferProgress()
+            task = asyncio.create_task(self.downloader.fetch(item.url, item.path, progress))
+            task.add_done_callback(lambda _, engine_id=engine_id: self._notify(engine_id))
+            self._tasks[engine_id] = task
+            self._progress[engine_id] = progress
+            engine_ids.append(engine_id)
+        return engine_ids
+
+    async def poll(self, engine_ids: Iterable[str]) -> Dict[str, TransferState]:
+        """查询下载状态，已结束的任务报告一次后移除"""
+        states: Dict[str, TransferState] = {}
+        for engine_id in engine_ids:
+            task = self._tasks.get(engine_id)
+            if task is None:
+                continue
+            progress = self._progress[engine_id]
+            if not task.done():
+                status, error = DownloadStatus.ACTIVE, None
+            elif task.cancelled():
+                status, error = DownloadStatus.CANCELLED, None
+            elif task.exception() is not None:
+                status, error = DownloadStatus.ERROR, str(task.exception())
+            else:
+                status, error = DownloadStatus.COMPLETE, None
+            states[engine_id] = TransferState(
+                status,
+                progress.completed,
+                progress.total,
+                progress.update_speed() if status == DownloadStatus.ACTIVE else 0,
+                error,
+            )
+            if task.done():
+                self._forget(engine_id)
+        return states
+
+    async def cancel(self, engine_id: str) -> None:
+        """取消下载（保留 .part 文件，再次下载时继续）"""
+        task = self._tasks.get(engine_id)
+        self._forget(engine_id)
+        if task is not None:
+            task.cancel()
+
+    async def available(self) -> bool:
+        return True
+
+    async def listen(self, on_finished: Callable[[str], Awaitable[None]]) -> None:
+        """下载任务结束时回调引擎任务ID，直到被取消"""
+        self._on_finished = on_finished
+        self.notifications_connected = True
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.notifications_connected = False
+            self._on_finished = None
+
+    def _notify(self, engine_id: str) -> None:
+        if self._on_finished is not None and engine_id in self._tasks:
+            asyncio.ensure_future(self._on_finished(engine_id))
+
+    def _forget(self, engine_id: str) -> None:
+        self._tasks.pop(engine_id, None)
+        self._progress.pop(engine_id, None)
@@ -0,0 +1,447 @@
+# -*- encoding: utf-8 -*-
+"""
+后端下载服务
+
+接收已完成采集任务的下载项，由后端统一调度并驱动下载引擎（aria2 或内置下载器）：
+- 优先级队列（每个主机一个），优先级相同时先进先出
+- 全局并发上限和单个主机的并发上限，避免同时打开过多连接被限流
+- 排队的下载项按空闲名额批量交给引擎，一次调用添加一批
+- 定期查询引擎中的进度，失败的下载按最大重试次数重新排队；
+  引擎支持下载通知时，下载结束后立即处理，不必等下一轮查询
+- 通过 SSE 推送进度、总速度和预计剩余时间，同时提供查询接口
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from ..constants import ARIA2_DEFAULTS, DOWNLOAD_DEFAULTS
+from ..settings import settings
+from ..sse import SSEEventType, sse
+from .aria2 import Aria2Engine
+from .index import DownloadIndex, ErrorRecord, IndexRecord, get_download_index
+from .items import DownloadEntry, DownloadItem, DownloadStatus
+from .native import HttpEngine
+
+
+class DownloadService:
+    """
+    下载服务
+
+    Args:
+        engine: 下载引擎，为空时启动时按设置（downloadEngine）创建
+        poll_interval: 查询引擎进度的间隔（秒）
+        progress_interval: 推送进度事件的最小间隔（秒）
+        history_limit: 最多保留的已结束下载项数
+        index: 已下载文件索引，为空时启动时使用全局索引
+    """
+
+    def __init__(
+        self,
+        engine: Optional[Any] = None,
+        poll_interval: float = DOWNLOAD_DEFAULTS["POLL_INTERVAL"],
+        progress_interval: float = DOWNLOAD_DEFAULTS["PROGRESS_INTERVAL"],
+        history_limit: int = DOWNLOAD_DEFAULTS["HISTORY_LIMIT"],
+        index: Optional[DownloadIndex] = None,
+    ) -> None:
+        self.engine = engine
+        self.index = index
+        self.poll_interval = poll_interval
+        self.progress_interval = progress_interval
+        self.history_limit = history_limit
+
+        self.items: Dict[str, DownloadItem] = {}
+        # 主机 -> 排队条目的堆 (-优先级, 序号, 下载项ID)；按主机分开，
+        # 某个主机达到并发上限时不必逐个跳过它的下载项
+        self._queues: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._queued_seq: Dict[str, int] = {}  # 下载项ID -> 队列中有效条目的序号
+        self._seq = itertools.count()
+        self._active: Dict[str, DownloadItem] = {}  # 引擎任务ID -> 下载项
+        self._host_active: Counter = Counter()
+        self._changed: Dict[str, DownloadItem] = {}  # 上次推送后有变化的下载项
+        self._finished: Deque[str] = deque()  # 按结束顺序排列的已结束下载项ID
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._notified: set = set()  # 收到结束通知、尚未查询的引擎任务ID
+        self._last_report = 0.0
+        self._last_full_poll = 0.0
+        self.engine_error: Optional[str] = None
+
+    @property
+    def concurrency(self) -> int:
+        """全局并发上限（每次调度时读取设置）"""
+        return settings.get("maxConcurrency", DOWNLOAD_DEFAULTS["MAX_CONCURRENCY"])
+
+    @property
+    def per_host_concurrency(self) -> int:
+        """单个主机的并发上限"""
+        return settings.get(
+            "downloadPerHostConcurrency", DOWNLOAD_DEFAULTS["PER_HOST_CONCURRENCY"]
+        )
+
+    @property
+    def max_retries(self) -> int:
+        """失败后的最大重试次数"""
+        return settings.get("maxRetries", DOWNLOAD_DEFAULTS["MAX_RETRIES"])
+
+    async def start(self) -> None:
+        """启动后台调度循环"""
+        if self._task:
+            return
+        if self.engine is None:
+            if settings.get("downloadEngine", DOWNLOAD_DEFAULTS["ENGINE"]) == "http":
+                self.engine = HttpEngine()
+            else:
+                self.engine = Aria2Engine(
+                    host=settings.get("aria2Host", ARIA2_DEFAULTS["HOST"]),
+                    port=settings.get("aria2Port", ARIA2_DEFAULTS["PORT"]),
+                    secret=settings.get("aria2Secret", ARIA2_DEFAULTS["SECRET"]),
+                )
+        if self.index is None:
+            self.index = get_download_index()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run_loop())
+        if hasattr(self.engine, "listen"):
+            self._listener = asyncio.create_task(self.engine.listen(self._on_engine_finished))
+        logger.info(f"✓ 下载服务已启动（引擎: {self.engine.name}）")
+
+    async def stop(self) -> None:
+        """停止调度循环（引擎中正在进行的下载不受影响）"""
+        for task in (self._task, self._listener):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._listener = None
+
+    def enqueue(
+        self,
+        entries: Iterable[DownloadEntry],
+        priority: int = 0,
+        task_id: Optional[str] = None,
+    ) -> List[DownloadItem]:
+        """
+        加入下载队列
+
+        Args:
+            entries: 下载项（DownloadEntry）
+            priority: 优先级，越大越先下载
+            task_id: 来源采集任务
+
+        Returns:
+            list: 新建的下载项
+        """
+        items = [
+            DownloadItem(
+                entry.url, entry.dir, entry.out, priority, task_id, entry.aweme_id, entry.variant
+            )
+            for entry in entries
+        ]
+        with self._lock:
+            for item in items:
+                self.items[item.id] = item
+                self._push(item)
+                self._changed[item.id] = item
+        self._wake()
+        return items
+
+    def set_priority(self, item_id: str, priority: int) -> bool:
+        """调整排队中下载项的优先级"""
+        with self._lock:
+            item = self.items.get(item_id)
+            if item is None or item.status != DownloadStatus.QUEUED:
+                return False
+            item.priority = priority
+            self._push(item)
+            self._changed[item.id] = item
+        return True
+
+    async def cancel(self, item_id: str) -> bool:
+        """取消下载项，已结束的下载项返回 False"""
+        with self._lock:
+            item = self.items.get(item_id)
+            if item is None or item.status in DownloadStatus.FINISHED:
+                return False
+            engine_id = item.engine_id
+            self._finish(item, DownloadStatus.CANCELLED)
+        if engine_id:
+            try:
+                await self.engine.cancel(engine_id)
+            except Exception as e:
+                logger.warning(f"[Download] 取消引擎任务 {engine_id} 失败: {e}")
+        return True
+
+    def get_items(
+        self,
+        status: Optional[str] = None,
+        task_id: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """按优先级和创建时间列出下载项"""
+        with self._lock:
+            items = [
+                item
+                for item in self.items.values()
+                if (status is None or item.status == status)
+                and (task_id is None or item.task_id == task_id)
+            ]
+        items.sort(key=lambda item: (-item.priority, item.created_at))
+        return [item.to_dict() for item in items[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        """整体进度：各状态数量、总速度和预计剩余时间"""
+        with self._lock:
+            counts = Counter(item.status for item in self.items.values())
+            active = list(self._active.values())
+            completed = [
+                item.total_length
+                for item in self.items.values()
+                if item.status == DownloadStatus.COMPLETE and item.total_length
+            ]
+        speed = sum(item.speed for item in active)
+        remaining = sum(
+            max(item.total_length - item.completed_length, 0) for item in active
+        )
+        # 排队中的下载项大小未知，按已完成下载的平均大小估算
+        if completed:
+            remaining += counts[DownloadStatus.QUEUED] * sum(completed) / len(completed)
+        return {
+            "engine": self.engine.name if self.engine else None,
+            "engine_error": self.engine_error,
+            **{status: counts[status] for status in DownloadStatus.ALL},
+            "speed": speed,
+            "remaining_bytes": int(remaining),
+            "eta": round(remaining / speed) if speed else None,
+        }
+
+    async def tick(self) -> None:
+        """执行一轮调度：查询进度、派发排队的下载项、推送进度"""
+        await self._poll()
+        await self._dispatch()
+        with self._lock:
+            self._prune_history()
+        await self._report()
+
+    def _push(self, item: DownloadItem) -> None:
+        seq = next(self._seq)
+        self._queued_seq[item.id] = seq
+        heapq.heappush(self._queues.setdefault(item.host, []), (-item.priority, seq, item.id))
+
+    def _pop_next(self, per_host: int) -> Optional[DownloadItem]:
+        """取出优先级最高、且所在主机未达到并发上限的下载项"""
+        best: Optional[List[Tuple[int, int, str]]] = None
+        for host, queue in list(self._queues.items()):
+            # 丢弃队首已取消或调整过优先级的旧条目
+            while queue and self._queued_seq.get(queue[0][2]) != queue[0][1]:
+                heapq.heappop(queue)
+            if not queue:
+                del self._queues[host]
+            elif self._host_active[host] < per_host and (best is None or queue[0] < best[0]):
+                best = queue
+        if best is None:
+            return None
+        item = self.items[heapq.heappop(best)[2]]
+        del self._queued_seq[item.id]
+        return item
+
+    async def _dispatch(self) -> None:
+        with self._lock:
+            batch: List[DownloadItem] = []
+            concurrency, per_host = self.concurrency, self.per_host_concurrency
+            while len(self._active) + len(batch) < concurrency:
+                item = self._pop_next(per_host)
+                if item is None:
+                    break
+                item.status = DownloadStatus.ACTIVE
+                item.attempts += 1
+                item.started_at = time.time()
+                self._host_active[item.host] += 1
+                batch.append(item)
+        if not batch:
+            return
+
+        try:
+            results = await self.engine.add_many(batch)
+        except Exception as e:
+            # 引擎不可用时放回队列，下一轮再试
+            with self._lock:
+                for item in batch:
+                    self._host_active[item.host] -= 1
+                    item.attempts -= 1
+                    if item.status == DownloadStatus.ACTIVE:
+                        item.status = DownloadStatus.QUEUED
+                        self._push(item)
+            if self.engine_error is None:
+                logger.warning(f"[Download] 下载引擎不可用: {e}")
+            self.engine_error = str(e)
+            return
+        self.engine_error = None
+
+        cancelled = []
+        failed: List[DownloadItem] = []
+        with self._lock:
+            for item, result in zip(batch, results):
+                if item.status != DownloadStatus.ACTIVE:
+                    # 派发期间被取消
+                    self._host_active[item.host] -= 1
+                    if not isinstance(result, Exception):
+                        cancelled.append(result)
+                elif isinstance(result, Exception):
+                    # 引擎拒绝了这一项（如地址无效），按失败处理
+                    self._host_active[item.host] -= 1
+                    self._fail(item, str(result))
+                    if item.status == DownloadStatus.ERROR:
+                        failed.append(item)
+                else:
+                    item.engine_id = result
+                    self._active[result] = item
+                    self._changed[item.id] = item
+        for engine_id in cancelled:
+            await self.engine.cancel(engine_id)
+        if failed and self.index is not None:
+            await asyncio.to_thread(self._record_finished, [], failed)
+
+    async def _poll(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            notified, self._notified = self._notified, set()
+            # 已订阅通知时，下载结束由通知触发查询，全量查询只用于更新进度
+            if (
+                getattr(self.engine, "notifications_connected", False)
+                and now - self._last_full_poll < self.progress_interval
+            ):
+                engine_ids = [engine_id for engine_id in notified if engine_id in self._active]
+            else:
+                engine_ids = list(self._active)
+                self._last_full_poll = now
+        if not engine_ids:
+            return
+        states = await self.engine.poll(engine_ids)
+        completed: List[DownloadItem] = []
+        failed: List[DownloadItem] = []
+        with self._lock:
+            for engine_id, transfer in states.items():
+                item = self._active.get(engine_id)
+                if item is None:
+                    continue
+                item.completed_length = transfer.completed_length
+                item.total_length = transfer.total_length
+                item.speed = transfer.speed
+                self._changed[item.id] = item
+                if transfer.status == DownloadStatus.ERROR:
+                    self._release(item)
+                    self._fail(item, transfer.error)
+                    if item.status == DownloadStatus.ERROR:
+                        failed.append(item)
+                elif transfer.status in DownloadStatus.FINISHED:
+                    item.error = transfer.error
+                    self._finish(item, transfer.status)
+                    if transfer.status == DownloadStatus.COMPLETE:
+                        completed.append(item)
+        if (completed or failed) and self.index is not None:
+            await asyncio.to_thread(self._record_finished, completed, failed)
+
+    def _record_finished(self, completed: List[DownloadItem], failed: List[DownloadItem]) -> None:
+        """把下载完成的文件和最终失败的下载记入索引"""
+        records = []
+        for item in completed:
+            try:
+                size = os.path.getsize(item.path)
+            except OSError:
+                continue
+            duration = item.finished_at - item.started_at if item.started_at else None
+            records.append(IndexRecord(item.path, size, item.aweme_id, item.variant, duration))
+        self.index.add_many(records)
+        self.index.add_errors(
+            ErrorRecord(item.path, item.error, item.aweme_id, item.variant, item.attempts)
+            for item in failed
+        )
+
+    async def _report(self) -> None:
+        now = time.monotonic()
+        if now - self._last_report < self.progress_interval:
+            return
+        with self._lock:
+            changed, self._changed = list(self._changed.values()), {}
+        if not changed and not self._active:
+            return
+        self._last_report = now
+        await sse.broadcast(
+            SSEEventType.DOWNLOAD_PROGRESS,
+            {"stats": self.stats(), "items": [item.to_dict() for item in changed]},
+        )
+
+    def _fail(self, item: DownloadItem, error: Optional[str]) -> None:
+        """下载失败：未超过重试次数时重新排队，否则标记失败"""
+        item.error = error
+        if item.attempts <= self.max_retries:
+            logger.warning(f"[Download] {item.out} 下载失败，重新排队: {error}")
+            item.status = DownloadStatus.QUEUED
+            self._changed[item.id] = item
+            self._push(item)
+        else:
+            self._finish(item, DownloadStatus.ERROR)
+
+    async def _on_engine_finished(self, engine_id: str) -> None:
+        """引擎通知某个下载已结束"""
+        with self._lock:
+            self._notified.add(engine_id)
+        self._wake()
+
+    def _wake(self) -> None:
+        """唤醒调度循环（可在任意线程调用）"""
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+    def _release(self, item: DownloadItem) -> None:
+        """释放下载项占用的并发名额"""
+        if item.engine_id and self._active.pop(item.engine_id, None) is not None:
+            self._host_active[item.host] -= 1
+        item.engine_id = None
+        item.speed = 0
+
+    def _finish(self, item: DownloadItem, status: str) -> None:
+        self._release(item)
+        self._queued_seq.pop(item.id, None)
+        item.status = status
+        item.finished_at = time.time()
+        self._changed[item.id] = item
+        self._finished.append(item.id)
+
+    def _prune_history(self) -> None:
+        """已结束的下载项超过上限时删除最早结束的（每轮调度执行一次）"""
+        while len(self._finished) > self.history_limit:
+            self.items.pop(self._finished.popleft(), None)
+
+    async def _run_loop(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"[Download] 下载调度失败: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+# 全局实例
+download_service = DownloadService()
@@ -16,6 +16,7 @@
 - cookies.py: Cookie管理和验证
 - download.py: 文件下载管理（aria2配置生成）
 - aria2_manager.py: Aria2进程管理和配置生成
+- aria2_client.py: Aria2 JSON-RPC客户端（批量调用、下载通知、健康状态缓存）
 
 使用示例：
     from backend.lib.douyin import Douyin
@@ -0,0 +1,227 @@
+# -*- encoding: utf-8 -*-
+"""
+aria2 JSON-RPC 客户端
+
+- 复用 HTTP 连接池（requests.Session），不再为每次调用新建连接
+- system.multicall 批量调用，数千个下载只需几次请求即可加入
+- 缓存健康状态，短时间内的重复检查直接返回缓存结果
+- 订阅 aria2 的 WebSocket 通知（onDownloadComplete / onDownloadError 等），
+  下载结束时立即得知，不必轮询
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from ..constants import ARIA2_DEFAULTS
+
+# (方法名, 参数列表)
+Aria2Call = Tuple[str, Sequence[Any]]
+
+
+class Aria2Error(Exception):
+    """aria2 RPC 调用失败"""
+
+
+class Aria2Client:
+    """
+    aria2 JSON-RPC 客户端（线程安全）
+
+    Args:
+        host / port / secret: aria2 RPC 服务地址和密钥
+        timeout: 单次请求超时（秒）
+        health_timeout: 健康检查请求超时（秒）
+        batch_size: 每次 system.multicall 包含的最大调用数
+        health_ttl: 健康状态缓存时长（秒）
+    """
+
+    # 通知方法 -> 下载状态
+    NOTIFICATIONS = {
+        "aria2.onDownloadStart": "active",
+        "aria2.onDownloadPause": "paused",
+        "aria2.onDownloadStop": "removed",
+        "aria2.onDownloadComplete": "complete",
+        "aria2.onBtDownloadComplete": "complete",
+        "aria2.onDownloadError": "error",
+    }
+
+    def __init__(
+        self,
+        host: str = ARIA2_DEFAULTS["HOST"],
+        port: int = ARIA2_DEFAULTS["PORT"],
+        secret: str = ARIA2_DEFAULTS["SECRET"],
+        timeout: float = ARIA2_DEFAULTS["TIMEOUT"],
+        health_timeout: float = ARIA2_DEFAULTS["HEALTH_TIMEOUT"],
+        batch_size: int = ARIA2_DEFAULTS["MULTICALL_BATCH"],
+        health_ttl: float = ARIA2_DEFAULTS["HEALTH_TTL"],
+    ) -> None:
+        self.url = f"http://{host}:{port}/jsonrpc"
+        self.ws_url = f"ws://{host}:{port}/jsonrpc"
+        self.secret = secret
+        self.timeout = timeout
+        self.health_timeout = health_timeout
+        self.batch_size = batch_size
+        self.health_ttl = health_ttl
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+        self._ids = iter(range(1, 1 << 62))
+        self._lock = threading.Lock()
+        self._healthy: Optional[bool] = None
+        self._checked_at = 0.0
+        self.notifications_connected = False
+
+    def call(self, method: str, *params: Any) -> Any:
+        """调用单个方法，失败时抛出 Aria2Error"""
+        return self._invoke(method, self._with_token(params))
+
+    def multicall(self, calls: Sequence[Aria2Call]) -> List[Union[Any, Aria2Error]]:
+        """
+        批量调用（system.multicall），每 batch_size 个调用一次请求
+
+        Returns:
+            list: 与 calls 一一对应的结果，单个调用失败时对应位置为 Aria2Error
+        """
+        results: List[Union[Any, Aria2Error]] = []
+        for start in range(0, len(calls), self.batch_size):
+            batch = calls[start : start + self.batch_size]
+            payload = [
+                {"methodName": method, "params": self._with_token(params)}
+                for method, params in batch
+            ]
+            # system.multicall 本身不接受密钥，只在每个子调用中携带
+            for (method, _), result in zip(batch, self._invoke("system.multicall", [payload])):
+                # 成功的调用结果包在单元素列表中，失败的是 {code, message}
+                if isinstance(result, list):
+                    results.append(result[0] if result else None)
+                else:
+                    results.append(Aria2Error(f"{method} 调用失败: {result.get('message')}"))
+        return results
+
+    def add_uris(
+        self, downloads: Sequence[Tuple[str, Dict[str, Any]]]
+    ) -> List[Union[str, Aria2Error]]:
+        """批量添加下载 (地址, 选项)，返回 gid 或 Aria2Error"""
+        return self.multicall([("aria2.addUri", [[url], options]) for url, options in downloads])
+
+    def tell_status(
+        self, gids: Sequence[str], keys: Sequence[str]
+    ) -> List[Union[Dict[str, Any], Aria2Error]]:
+        """批量查询下载状态"""
+        return self.multicall([("aria2.tellStatus", [gid, list(keys)]) for gid in gids])
+
+    def is_available(self, max_age: Optional[float] = None) -> bool:
+        """
+        aria2 服务是否可用
+
+        Args:
+            max_age: 可接受的缓存时长（秒），默认 health_ttl，0 表示立即检查
+        """
+        max_age = self.health_ttl if max_age is None else max_age
+        # WebSocket 通知连接正常时服务必然可用
+        if self.notifications_connected:
+            return True
+        if self._healthy is not None and time.monotonic() - self._checked_at < max_age:
+            return self._healthy
+        payload = self._request("aria2.getVersion", self._with_token([]))
+        try:
+            data = self._post(payload, self.health_timeout)
+        except Aria2Error:
+            return False
+        if "error" in data:
+            logger.debug(f"Aria2 RPC错误: {data['error']}")
+            self._set_health(False)
+        return bool(self._healthy)
+
+    async def listen(
+        self,
+        on_event: Callable[[str, str], Awaitable[None]],
+        retry_delay: float = ARIA2_DEFAULTS["NOTIFY_RETRY_DELAY"],
+    ) -> None:
+        """
+        订阅 WebSocket 通知，断开后自动重连，直到任务被取消
+
+        Args:
+            on_event: 回调 (gid, 状态)，状态为 active / paused / removed / complete / error
+            retry_delay: 重连间隔（秒）
+        """
+        import websockets
+
+        while True:
+            try:
+                async with websockets.connect(self.ws_url, max_size=None) as ws:
+                    self.notifications_connected = True
+                    self._set_health(True)
+                    logger.info("✓ 已订阅 aria2 下载通知")
+                    async for message in ws:
+                        for gid, status in self._parse_notification(message):
+                            await on_event(gid, status)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"[Aria2] 通知连接断开: {e}")
+            finally:
+                self.notifications_connected = False
+            await asyncio.sleep(retry_delay)
+
+    def close(self) -> None:
+        """关闭连接池"""
+        self.session.close()
+
+    def _parse_notification(self, message: Union[str, bytes]) -> List[Tuple[str, str]]:
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return []
+        status = self.NOTIFICATIONS.get(data.get("method"))
+        if status is None:
+            return []
+        return [(event["gid"], status) for event in data.get("params") or [] if "gid" in event]
+
+    def _invoke(self, method: str, params: List[Any]) -> Any:
+        data = self._post(self._request(method, params))
+        if "error" in data:
+            raise Aria2Error(f"{method} 调用失败: {data['error'].get('message')}")
+        return data.get("result")
+
+    def _with_token(self, params: Sequence[Any]) -> List[Any]:
+        return ([f"token:{self.secret}"] if self.secret else []) + list(params)
+
+    def _request(self, method: str, params: List[Any]) -> Dict[str, Any]:
+        with self._lock:
+            request_id = next(self._ids)
+        return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+
+    def _post(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        try:
+            response = self.session.post(
+                self.url, json=payload, timeout=timeout or self.timeout
+            )
+            data = response.json()
+        except Exception as e:
+            self._set_health(False)
+            raise Aria2Error(f"{payload['method']} 调用失败: {e}") from e
+        self._set_health(True)
+        return data
+
+    def _set_health(self, healthy: bool) -> None:
+        self._healthy = healthy
+        self._checked_at = time.monotonic()
+
+
+_clients: Dict[Tuple[str, int, str], Aria2Client] = {}
+_clients_lock = threading.Lock()
+
+
+def get_aria2_client(host: str, port: int, secret: str) -> Aria2Client:
+    """获取进程内共享的客户端（同一地址和密钥复用同一个连接池）"""
+    with _clients_lock:
+        key = (host, port, secret)
+        if key not in _clients:
+            _clients[key] = Aria2Client(host, port, secret)
+        return _clients[key]
@@ -13,6 +13,7 @@ Aria2管理模块 - 简化版
 - 后端只管理Aria2服务的启动和停止
 - 前端直接通过JSON-RPC与Aria2通信
 - 无需aria2p等第三方库，减少依赖
+- RPC 调用统一走 aria2_client 的共享客户端
 """
 
 import os
@@ -29,6 +30,7 @@ from ..constants import (
     DOWNLOAD_DEFAULTS,
     RESOURCE_ROOT,
 )
+from .aria2_client import Aria2Client, get_aria2_client
 from .douyin.types import DouyinURL, RequestHeaders
 
 
@@ -74,71 +76,26 @@ class Aria2Manager:
         self.max_concurrency = max_concurrency
         self.aria2_process = None
 
-    def _check_connection(self) -> bool:
+    @property
+    def client(self) -> Aria2Client:
+        """共享的 JSON-RPC 客户端（复用连接池并缓存健康状态）"""
+        return get_aria2_client(self.host, self.port, self.secret)
+
+    def _check_connection(self, max_age: Optional[float] = None) -> bool:
         """
-        检查Aria2 RPC服务是否可用（增强版本）
+        检查Aria2 RPC服务是否可用
+
+        通过共享客户端调用 aria2.getVersion，结果在 HEALTH_TTL 内缓存，
+        已订阅 WebSocket 通知时直接视为可用。
 
-        先检查端口连通性，再验证RPC服务响应，确保服务真正可用。
+        Args:
+            max_age: 可接受的缓存时长（秒），0 表示立即检查
 
         Returns:
             True: 服务可用
             False: 服务不可用
-
-        Note:
-            - 使用0.1秒超时进行端口检查
-            - 验证RPC服务响应，确保服务完全就绪
-            - 适合频繁调用的场景
         """
-        try:
-            import socket
-            import urllib.error
-            import urllib.request
-
-            import ujson as json
-
-            # 1. 快速检查端口是否开放
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(0.1)  # 100ms超时
-            result = sock.connect_ex((self.host, self.port))
-            sock.close()
-
-            if result != 0:
-                return False
-
-            # 2. 验证RPC服务响应（确保aria2服务真正就绪）
-            rpc_url = f"http://{self.host}:{self.port}/jsonrpc"
-
-            # 构建简单的RPC请求
-            rpc_data = {"jsonrpc": "2.0", "id": "test", "method": "aria2.getVersion"}
-
-            # 如果有密钥，添加到参数中
-            if self.secret:
-                rpc_data["params"] = [f"token:{self.secret}"]
-
-            # 发送RPC请求
-            req = urllib.request.Request(
-                rpc_url,
-                data=json.dumps(rpc_data).encode("utf-8"),
-                headers={"Content-Type": "application/json"},
-            )
-
-            with urllib.request.urlopen(req, timeout=0.5) as response:
-                result_data = json.loads(response.read().decode("utf-8"))
-
-                # 检查是否有错误
-                if "error" in result_data:
-                    logger.debug(f"Aria2 RPC错误: {result_data['error']}")
-                    return False
-
-                # 检查是否有结果
-                if "result" in result_data:
-                    return True
-
-            return False
-
-        except (socket.error, urllib.error.URLError, json.JSONDecodeError, Exception):
-            # 静默处理，避免日志干扰
-            return False
+        return self.client.is_available(max_age)
 
     def _find_aria2_executable(self) -> Optional[str]:
         """
@@ -203,7 +160,7 @@ class Aria2Manager:
             - 优化：减少日志输出，提高启动速度
         """
         # 先尝试连接现有服务，避免重复启动
-        if self._check_connection():
+        if self._check_connection(max_age=0):
             logger.info("✓ Aria2服务已就绪")
             return
 
@@ -306,7 +263,7 @@ class Aria2Manager:
             # 等待服务真正就绪（最多等待10秒）
             for i in range(20):  # 20次 * 0.5秒 = 10秒
                 time.sleep(0.5)
-                if self._check_connection():
+                if self._check_connection(max_age=0):
                     logger.success("✓ Aria2服务已就绪")
                     return
 
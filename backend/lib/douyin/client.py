@@ -61,6 +61,7 @@ class DouyinClient:
 
         Returns:
             tuple: (作品列表, 新游标, 日志ID, 是否还有更多)
+                   响应中没有 has_more 字段（通常是请求失败）时，是否还有更多为 None
         """
         uri, params, data = self._build_awemes_params(
             type, target_id, max_cursor, logid, filters
@@ -86,7 +87,7 @@ class DouyinClient:
             if items_list:
                 break
 
-        has_more = resp.get("has_more", 0)
+        has_more = resp.get("has_more")
 
         return items_list, new_cursor, logid, has_more
 
@@ -14,6 +14,8 @@ from threading import Lock
 import ujson as json
 from loguru import logger
 
+from ...downloader.index import get_download_index
+from ...downloader.items import build_entries
 from ...utils.text import quit, save_json
 from .client import DouyinClient
 from .parser import DataParser
@@ -77,6 +79,7 @@ class Douyin:
         self.info = {}
         self.render_data = {}
         self.aria2_conf = ""
+        self.download_entries = []  # 写入 aria2 配置的下载项（带作品ID和变体）
 
     def run(self):
         """运行爬虫"""
@@ -261,34 +264,16 @@ class Douyin:
                 for line in self.results
                 if line.get(FieldName.SEC_UID)
             ]
-        # 保存作品下载配置
+        # 保存作品下载配置（与后端下载服务使用相同的文件命名），跳过已下载的文件
         else:
-            for line in self.results:
-                desc = line.get("desc") or "无标题"
-                filename = f'{line["id"]}_{desc}'
-
-                if self.type == "mix":
-                    filename = f"第{line['no']}集_{filename}"
-
-                # 图文作品
-                if isinstance(line["download_addr"], list):
-                    if self.type == "aweme":
-                        down_path = self.down_path.replace(line["id"], filename)
-                    else:
-                        down_path = os.path.join(self.down_path, filename)
-
-                    for index, addr in enumerate(line["download_addr"]):
-                        lines.append(
-                            f'{addr}\n dir={down_path}\n out={line["id"]}_{index + 1}.jpeg\n'
-                        )
-                # 视频作品
-                elif isinstance(line["download_addr"], str):
-                    lines.append(
-                        f'{line["download_addr"]}\n dir={self.down_path}\n out={filename}.mp4\n'
-                    )
-                else:
-                    logger.error("下载地址错误")
-
-        if lines:
+            entries = build_entries(self.results, self.type, self.down_path)
+            missing = get_download_index().missing(entries)
+            if len(missing) < len(entries):
+                logger.info(f"已下载 {len(entries) - len(missing)} 个文件，跳过")
+            lines = [f"{entry.url}\n dir={entry.dir}\n out={entry.out}\n" for entry in missing]
+            self.download_entries = missing
+
+        # 没有需要下载的文件时也覆盖旧配置，避免重复下载上次的内容
+        if lines or os.path.exists(self.aria2_conf):
             with open(self.aria2_conf, "w", encoding="utf-8") as f:
                 f.writelines(lines)
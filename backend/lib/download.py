@@ -1,16 +1,34 @@
+import asyncio
 import os
 import subprocess
 
 from loguru import logger
 
 
-def download(path, aria2_conf):
+def download(path, aria2_conf, engine="aria2", entries=None):
     """
-    命令行调用aria2c下载
+    下载 aria2 配置文件中的全部文件
+
+    engine 为 "http" 时使用内置下载器；使用 aria2c 但找不到可执行文件时也改用内置下载器。
+    entries 为生成配置时的下载项（带作品ID和变体），下载后按它记入下载索引，
+    为空时按配置文件中的地址和路径记录
     """
     if os.path.exists(aria2_conf):
+        from ..downloader.items import read_input_file
+
+        conf_entries = read_input_file(aria2_conf, path)
+        if not conf_entries:
+            logger.info("没有需要下载的文件")
+            return
+        entries = entries or conf_entries
+
         logger.info("开始下载")
 
+        if engine == "http":
+            download_native(path, aria2_conf)
+            _record_downloaded(entries)
+            return
+
         # 查找aria2c可执行文件
         import platform
         import shutil
@@ -37,8 +55,10 @@ def download(path, aria2_conf):
                 aria2_path = os.path.join(RESOURCE_ROOT, "aria2", "aria2c")
 
             if not os.path.exists(aria2_path):
-                logger.error(f"未找到 aria2c 可执行文件: {aria2_path}")
-                logger.error("请运行: .\\scripts\\setup\\aria2.ps1 安装 aria2")
+                logger.warning(f"未找到 aria2c 可执行文件: {aria2_path}，改用内置下载器")
+                logger.warning("安装 aria2 请运行: .\\scripts\\setup\\aria2.ps1")
+                download_native(path, aria2_conf)
+                _record_downloaded(entries)
                 return
 
         logger.info(f"使用 aria2c: {aria2_path}")
@@ -54,5 +74,42 @@ def download(path, aria2_conf):
             aria2_conf,
         ]
         subprocess.run(command)
+        _record_downloaded(entries)
     else:
         logger.error(f"没有发现可下载的配置文件: {aria2_conf}")
+
+
+def download_native(path, aria2_conf):
+    """
+    使用内置异步下载器下载 aria2 配置文件中的全部文件
+    """
+    from ..constants import DOWNLOAD_DEFAULTS
+    from ..downloader.items import read_input_file
+    from ..downloader.native import HttpDownloader
+    from ..settings import settings
+
+    entries = read_input_file(aria2_conf, path)
+    downloader = HttpDownloader.from_settings()
+    succeeded, failed = asyncio.run(
+        downloader.fetch_all(
+            entries,
+            concurrency=settings.get("maxConcurrency", DOWNLOAD_DEFAULTS["MAX_CONCURRENCY"]),
+            per_host=settings.get(
+                "downloadPerHostConcurrency", DOWNLOAD_DEFAULTS["PER_HOST_CONCURRENCY"]
+            ),
+            retries=settings.get("maxRetries", DOWNLOAD_DEFAULTS["MAX_RETRIES"]),
+        )
+    )
+    if failed:
+        logger.warning(f"下载结束：成功 {succeeded} 个，失败 {failed} 个")
+    else:
+        logger.success(f"下载完成，共 {succeeded} 个文件")
+
+
+def _record_downloaded(entries):
+    """把下载完成的文件记入下载索引，下次生成配置时跳过"""
+    from ..downloader.index import get_download_index
+
+    remaining = get_download_index().missing(entries)
+    if remaining:
+        logger.warning(f"仍有 {len(remaining)} 个文件未下载完成")
@@ -9,7 +9,7 @@ import os
 import json
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from .settings import settings
 
@@ -23,6 +23,7 @@ class UserConfig:
         self.license_key = ""  # 授权码
         self.trial_start_time: Optional[datetime] = None  # 试用开始时间
         self.license_expiry: Optional[datetime] = None    # 授权过期时间
+        self.schedule: dict = {}  # 周期监控计划
         self.created_at = datetime.now()
         self.last_updated = datetime.now()
         
@@ -44,6 +45,7 @@ class UserConfig:
                 self.user_id = data.get('user_id', self.user_id)
                 self.sec_user_id = data.get('sec_user_id', '')
                 self.license_key = data.get('license_key', '')
+                self.schedule = data.get('schedule') or {}
                 
                 # 解析时间字段
                 if data.get('trial_start_time'):
@@ -82,6 +84,7 @@ class UserConfig:
                     'license_key': self.license_key,
                     'trial_start_time': self.trial_start_time.isoformat() if self.trial_start_time else None,
                     'license_expiry': self.license_expiry.isoformat() if self.license_expiry else None,
+                    'schedule': self.schedule,
                     'created_at': self.created_at.isoformat(),
                     'last_updated': datetime.now().isoformat()
                 }, f, ensure_ascii=False, indent=2)
@@ -128,6 +131,17 @@ class UserConfig:
             return user_dir
         return base_dir
     
+    @staticmethod
+    def list_user_ids() -> List[str]:
+        """列出所有已保存配置的用户ID"""
+        users_dir = os.path.join(UserConfig.get_user_data_dir(), 'users')
+        if not os.path.isdir(users_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(users_dir)
+            if os.path.exists(os.path.join(users_dir, name, 'user_config.json'))
+        )
+    
     def set_sec_user_id(self, sec_user_id: str):
         """设置抖音sec_user_id"""
         self.sec_user_id = sec_user_id
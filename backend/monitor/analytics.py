@@ -0,0 +1,296 @@
+# -*- encoding: utf-8 -*-
+"""
+作品趋势分析
+
+基于 like_history 中的采样，为所有作品一次性（NumPy 向量化）计算：
+- 点赞、评论、分享在各滑动窗口内的增速（每小时）
+- 第一个窗口的加速度（本窗口增速 - 上一窗口增速，每小时²）
+- 同账号其他作品的点赞增速基线（均值、标准差），以及 z-score 和爆款标记
+
+只在内存中保留最近一段时间的采样，每轮监控后增量读取新写入的记录，不重新读取全部历史。
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..constants import ANALYTICS_DEFAULTS
+from ..storage.user_db import UserDatabase
+
+# 采样指标（like_history 的列）
+METRICS = ("likes", "comments", "shares")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _timestamp(dt: datetime) -> float:
+    """本地时间转为秒数，与 SQL 中 julianday(recorded_at) 的换算保持一致"""
+    return (dt - _EPOCH).total_seconds()
+
+
+def _datetime(seconds: float) -> datetime:
+    return _EPOCH + timedelta(seconds=float(seconds))
+
+
+def _metrics(row: np.ndarray) -> Dict[str, float]:
+    return {metric: round(float(value), 2) for metric, value in zip(METRICS, row)}
+
+
+class TrendAnalytics:
+    """
+    单个用户的作品趋势分析
+
+    Args:
+        windows: 滑动窗口（分钟）
+        breakout_zscore: 爆款的 z-score 阈值
+        min_baseline_videos: 计算账号基线至少需要的其他作品数
+        min_breakout_velocity: 爆款的最低点赞增速（每小时）
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[int] = ANALYTICS_DEFAULTS["WINDOWS"],
+        breakout_zscore: float = ANALYTICS_DEFAULTS["BREAKOUT_ZSCORE"],
+        min_baseline_videos: int = ANALYTICS_DEFAULTS["MIN_BASELINE_VIDEOS"],
+        min_breakout_velocity: float = ANALYTICS_DEFAULTS["MIN_BREAKOUT_VELOCITY"],
+    ) -> None:
+        self.windows = [minutes * 60 for minutes in windows]
+        self.labels = [f"{minutes}m" for minutes in windows]
+        self.breakout_zscore = breakout_zscore
+        self.min_baseline_videos = min_baseline_videos
+        self.min_breakout_velocity = min_breakout_velocity
+        # 加速度需要两个主窗口的采样
+        self.retention = max(max(self.windows), 2 * self.windows[0])
+
+        # 采样缓冲区，按 (作品编号, 时间) 排序
+        self._video = np.empty(0, dtype=np.int64)
+        self._time = np.empty(0, dtype=np.float64)
+        self._values = np.empty((0, len(METRICS)), dtype=np.float64)
+
+        self._codes: Dict[str, int] = {}  # video_id -> 作品编号
+        self._video_ids: List[str] = []
+        self._accounts: List[Optional[str]] = []  # 作品编号 -> account_id
+        self._last_seen: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self.videos: Dict[str, Dict[str, Any]] = {}
+        self.accounts: Dict[str, Dict[str, Any]] = {}
+        self.updated_at: Optional[datetime] = None
+
+    def refresh(self, db: UserDatabase, now: Optional[datetime] = None) -> int:
+        """
+        读取上次之后新写入的采样并重新计算
+
+        Returns:
+            int: 新读取的采样数
+        """
+        if not db.conn:
+            return 0
+        now = now or datetime.now()
+        with self._lock:
+            since = (
+                self._last_seen - ANALYTICS_DEFAULTS["OVERLAP_SECONDS"]
+                if self._last_seen is not None
+                else _timestamp(now) - self.retention
+            )
+            with db.reader() as conn:
+                rows = conn.execute(
+                    """
+                    -- 旧版本的记录没有评论数、分享数，按 0 处理
+                    SELECT video_id, (julianday(recorded_at) - 2440587.5) * 86400.0,
+                           like_count, COALESCE(comment_count, 0), COALESCE(share_count, 0)
+                    FROM like_history
+                    WHERE recorded_at >= ?
+                    """,
+                    (_datetime(since).strftime("%Y-%m-%d %H:%M:%S"),),
+                ).fetchall()
+                self._append(conn, rows, _timestamp(now))
+            self._compute()
+            self.updated_at = now
+            return len(rows)
+
+    def get_videos(
+        self, limit: int = 100, sort: str = "velocity", breakout_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """按点赞增速 / 加速度 / z-score 降序返回作品指标"""
+        sort_keys = {
+            "velocity": lambda item: item["velocity"][self.labels[0]]["likes"],
+            "acceleration": lambda item: item["acceleration"]["likes"],
+            "zscore": lambda item: item["zscore"],
+        }
+        if sort not in sort_keys:
+            raise ValueError(f"不支持的排序方式: {sort}")
+        with self._lock:
+            items = [
+                item
+                for item in self.videos.values()
+                if item["breakout"] or not breakout_only
+            ]
+        items.sort(key=sort_keys[sort], reverse=True)
+        return items[:limit]
+
+    def get_accounts(self) -> List[Dict[str, Any]]:
+        """账号基线，按平均点赞增速降序"""
+        with self._lock:
+            accounts = list(self.accounts.values())
+        accounts.sort(key=lambda item: item["mean_velocity"], reverse=True)
+        return accounts
+
+    def _append(self, conn: sqlite3.Connection, rows: List[tuple], now: float) -> None:
+        """把新采样加入缓冲区，去重并丢弃超出保留时长的采样"""
+        new_ids = {row[0] for row in rows if row[0] not in self._codes}
+        if new_ids:
+            accounts = dict(
+                conn.execute(
+                    "SELECT video_id, account_id FROM videos "
+                    "WHERE video_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(sorted(new_ids)),),
+                ).fetchall()
+            )
+            for video_id in sorted(new_ids):
+                self._codes[video_id] = len(self._video_ids)
+                self._video_ids.append(video_id)
+                self._accounts.append(accounts.get(video_id))
+
+        if rows:
+            video = np.fromiter((self._codes[row[0]] for row in rows), np.int64, len(rows))
+            values = np.array([row[1:] for row in rows], dtype=np.float64)
+            self._video = np.concatenate([self._video, video])
+            self._time = np.concatenate([self._time, values[:, 0]])
+            self._values = np.concatenate([self._values, values[:, 1:]])
+            self._last_seen = max(self._last_seen or 0.0, float(values[:, 0].max()))
+
+        keep = self._time >= now - self.retention
+        video, times, values = self._video[keep], self._time[keep], self._values[keep]
+        order = np.lexsort((times, video))
+        video, times, values = video[order], times[order], values[order]
+        # 重叠读取会产生重复采样
+        unique = np.ones(len(video), dtype=bool)
+        unique[1:] = (video[1:] != video[:-1]) | (times[1:] != times[:-1])
+        self._video, self._time, self._values = video[unique], times[unique], values[unique]
+        self._compact()
+
+    def _compact(self) -> None:
+        """
+        回收已没有采样的作品编号
+
+        作品的采样全部超出保留时长后编号仍留在映射中，编号数超过在用作品数的两倍时重新编号，
+        均摊开销很小。编号按原顺序重排，缓冲区的排序不变
+        """
+        live = np.unique(self._video)
+        if len(self._video_ids) <= 2 * len(live):
+            return
+        remap = np.full(len(self._video_ids), -1, dtype=np.int64)
+        remap[live] = np.arange(len(live))
+        self._video = remap[self._video]
+        self._video_ids = [self._video_ids[code] for code in live]
+        self._accounts = [self._accounts[code] for code in live]
+        self._codes = {video_id: code for code, video_id in enumerate(self._video_ids)}
+
+    def _compute(self) -> None:
+        """向量化计算所有作品的增速、加速度和基线"""
+        video, times, values = self._video, self._time, self._values
+        if not len(video):
+            self.videos, self.accounts = {}, {}
+            return
+
+        starts = np.flatnonzero(np.r_[True, video[1:] != video[:-1]])
+        ends = np.r_[starts[1:], len(video)]
+        last = ends - 1
+        groups = len(starts)
+
+        # 组合键：作品序号 * 跨度 + 相对时间，使每个作品的时间查找可以一次 searchsorted 完成
+        origin = times.min()
+        span = times.max() - origin + 4 * self.retention + 1
+        group_of_row = np.repeat(np.arange(groups), ends - starts)
+        keys = group_of_row * span + (times - origin)
+        last_keys = np.arange(groups) * span + (times[last] - origin)
+
+        def locate(offset: float, side: str) -> np.ndarray:
+            """每个作品中时间为 (最新采样时间 - offset) 的位置"""
+            return np.searchsorted(keys, last_keys - offset, side=side)
+
+        def rate(begin: np.ndarray, end: np.ndarray) -> np.ndarray:
+            """begin 到 end 两次采样之间的每小时增量"""
+            elapsed = times[end] - times[begin]
+            delta = values[end] - values[begin]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result = delta / elapsed[:, None] * 3600
+            return np.where(elapsed[:, None] > 0, result, 0.0)
+
+        velocities = []
+        for window in self.windows:
+            begin = np.clip(locate(window, "left"), starts, last)
+            velocities.append(rate(begin, last))
+
+        # 加速度：上一主窗口 [t - 2W, t - W] 的增速与本窗口比较
+        window = self.windows[0]
+        previous_end = locate(window, "right") - 1
+        has_previous = previous_end >= starts
+        previous_end = np.clip(previous_end, starts, last)
+        previous_begin = np.clip(locate(2 * window, "left"), starts, previous_end)
+        previous = rate(previous_begin, previous_end)
+        acceleration = np.where(
+            has_previous[:, None], (velocities[0] - previous) / (window / 3600), 0.0
+        )
+
+        # 账号基线：同账号其他作品（留一法）的点赞增速均值和标准差
+        codes = video[starts]
+        account_ids = [self._accounts[code] for code in codes]
+        account_index = {account: i for i, account in enumerate(dict.fromkeys(account_ids))}
+        account_of_group = np.array([account_index[a] for a in account_ids], dtype=np.int64)
+        like_velocity = velocities[0][:, 0]
+        counts = np.bincount(account_of_group)
+        sums = np.bincount(account_of_group, like_velocity)
+        squares = np.bincount(account_of_group, like_velocity**2)
+        others = counts[account_of_group] - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = (sums[account_of_group] - like_velocity) / others
+            variance = (squares[account_of_group] - like_velocity**2) / others - mean**2
+            std = np.sqrt(np.maximum(variance, 0))
+            zscore = (like_velocity - mean) / std
+        valid = (others >= self.min_baseline_videos) & (std > 0)
+        zscore = np.where(valid, zscore, 0.0)
+        breakout = (zscore >= self.breakout_zscore) & (
+            like_velocity >= self.min_breakout_velocity
+        )
+
+        videos: Dict[str, Dict[str, Any]] = {}
+        for i, code in enumerate(codes):
+            video_id = self._video_ids[code]
+            videos[video_id] = {
+                "video_id": video_id,
+                "account_id": account_ids[i],
+                **{metric: int(values[last[i], m]) for m, metric in enumerate(METRICS)},
+                "velocity": {
+                    label: _metrics(velocity[i])
+                    for label, velocity in zip(self.labels, velocities)
+                },
+                "acceleration": _metrics(acceleration[i]),
+                "zscore": round(float(zscore[i]), 2),
+                "breakout": bool(breakout[i]),
+                "samples": int(ends[i] - starts[i]),
+                "last_sample_at": _datetime(times[last[i]]).isoformat(),
+            }
+
+        breakouts = np.bincount(account_of_group, breakout, minlength=len(counts))
+        accounts: Dict[str, Dict[str, Any]] = {}
+        for account, index in account_index.items():
+            if account is None:
+                continue
+            count = int(counts[index])
+            account_mean = sums[index] / count
+            account_std = np.sqrt(max(squares[index] / count - account_mean**2, 0))
+            accounts[account] = {
+                "account_id": account,
+                "videos": count,
+                "mean_velocity": round(float(account_mean), 2),
+                "std_velocity": round(float(account_std), 2),
+                "breakouts": int(breakouts[index]),
+            }
+
+        self.videos, self.accounts = videos, accounts
@@ -0,0 +1,164 @@
+# -*- encoding: utf-8 -*-
+"""
+自适应轮询间隔
+
+根据账号的发布频率和作品点赞增速为每个账号安排下次采集时间：
+- 作品点赞涨得快（hourly_likes 高）的账号间隔短，尽快捕捉数据变化
+- 经常发作品的账号按平均发布间隔的一部分轮询，及时发现新作品
+- 长期不发作品的账号间隔逐渐拉长，直到上限
+
+到期时间保存在最小堆中，每轮监控只采集已到期的账号。
+"""
+
+import heapq
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..constants import MONITOR_DEFAULTS
+
+
+class PollQueue:
+    """
+    按下次采集时间排序的账号队列
+
+    使用最小堆 + 惰性删除：重新安排时间时只压入新条目，
+    旧条目在弹出时根据版本号丢弃。
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, str]] = []
+        self._entries: Dict[str, Tuple[float, int]] = {}
+        self._counter = 0
+
+    def schedule(self, account_id: str, due_at: float) -> None:
+        """安排（或重新安排）账号的下次采集时间"""
+        self._counter += 1
+        self._entries[account_id] = (due_at, self._counter)
+        heapq.heappush(self._heap, (due_at, self._counter, account_id))
+
+    def remove(self, account_id: str) -> None:
+        """移除账号（例如已取消关注）"""
+        self._entries.pop(account_id, None)
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """弹出所有已到期的账号，最早到期（最久未更新）的在前"""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, version, account_id = heapq.heappop(self._heap)
+            if self._entries.get(account_id) == (due_at, version):
+                del self._entries[account_id]
+                due.append(account_id)
+        return due
+
+    def next_due_at(self) -> Optional[float]:
+        """最近一个到期时间，队列为空时返回 None"""
+        while self._heap:
+            due_at, version, account_id = self._heap[0]
+            if self._entries.get(account_id) == (due_at, version):
+                return due_at
+            heapq.heappop(self._heap)
+        return None
+
+    def due_at(self, account_id: str) -> Optional[float]:
+        """账号的下次采集时间"""
+        entry = self._entries.get(account_id)
+        return entry[0] if entry else None
+
+    def __contains__(self, account_id: str) -> bool:
+        return account_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CadencePlanner:
+    """
+    轮询间隔计算
+
+    Args:
+        min_interval: 最短轮询间隔（秒）
+        max_interval: 最长轮询间隔（秒）
+        hot_hourly_likes: 达到该小时点赞增量的账号按最短间隔轮询
+    """
+
+    # 按平均发布间隔的几分之一轮询
+    CADENCE_DIVISOR = 4
+
+    def __init__(
+        self,
+        min_interval: float = MONITOR_DEFAULTS["MIN_POLL_INTERVAL"],
+        max_interval: float = MONITOR_DEFAULTS["MAX_POLL_INTERVAL"],
+        hot_hourly_likes: int = MONITOR_DEFAULTS["HOT_HOURLY_LIKES"],
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.hot_hourly_likes = hot_hourly_likes
+
+    def interval(
+        self, activity: Optional[Dict[str, Any]], now: Optional[float] = None
+    ) -> float:
+        """
+        计算账号的轮询间隔
+
+        Args:
+            activity: 账号活跃度（get_account_activity 的单项），包含
+                post_count、first_post_time、last_post_time、max_hourly_likes
+            now: 当前时间戳
+
+        Returns:
+            float: 轮询间隔（秒）
+        """
+        if not activity:
+            return self.max_interval
+        now = time.time() if now is None else now
+
+        # 点赞增速：与小时点赞增量成反比
+        hourly_likes = activity.get("max_hourly_likes") or 0
+        if hourly_likes > 0:
+            velocity_interval = self.min_interval * self.hot_hourly_likes / hourly_likes
+        else:
+            velocity_interval = self.max_interval
+
+        # 发布频率：平均发布间隔，只有一个作品时用距上次发布的时间估计
+        post_count = activity.get("post_count") or 0
+        first_post = activity.get("first_post_time")
+        last_post = activity.get("last_post_time")
+        if post_count >= 2 and first_post and last_post and last_post > first_post:
+            gap = (last_post - first_post) / (post_count - 1)
+            # 最近一次发布已经超过平均间隔，说明发布频率在下降
+            gap = max(gap, now - last_post)
+        elif last_post:
+            gap = now - last_post
+        else:
+            gap = self.max_interval * self.CADENCE_DIVISOR
+        cadence_interval = gap / self.CADENCE_DIVISOR
+
+        interval = min(velocity_interval, cadence_interval)
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def next_poll_at(
+        self, activity: Optional[Dict[str, Any]], now: Optional[float] = None
+    ) -> float:
+        """计算账号的下次采集时间戳"""
+        now = time.time() if now is None else now
+        return now + self.interval(activity, now)
+
+
+def build_queue(
+    account_ids: Iterable[str], next_poll_times: Dict[str, Optional[float]]
+) -> PollQueue:
+    """
+    根据已保存的下次采集时间建立队列，从未采集过的账号立即到期
+
+    Args:
+        account_ids: 当前关注的账号
+        next_poll_times: account_id -> 下次采集时间戳
+
+    Returns:
+        PollQueue: 账号队列
+    """
+    queue = PollQueue()
+    for account_id in account_ids:
+        queue.schedule(account_id, next_poll_times.get(account_id) or 0)
+    return queue
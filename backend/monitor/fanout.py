@@ -0,0 +1,155 @@
+# -*- encoding: utf-8 -*-
+"""
+监控扇出引擎
+
+把一批阻塞的采集任务（每个关注账号一个）分发到线程池执行：
+- 全局并发上限，避免一次性提交全部账号
+- 单账号超时，慢账号不会拖住整轮监控
+- 整轮时间预算，超出预算的账号记为跳过，留到下一轮优先处理
+- 按时间间隔节流的进度回调
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+
+class FanoutStatus:
+    """单个采集项的结束状态"""
+
+    SUCCESS = "success"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+    SKIPPED = "skipped"  # 超出整轮时间预算，未执行
+
+
+class FanoutProgress:
+    """扇出进度"""
+
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.counts: Dict[str, int] = {
+            FanoutStatus.SUCCESS: 0,
+            FanoutStatus.FAILED: 0,
+            FanoutStatus.TIMEOUT: 0,
+            FanoutStatus.SKIPPED: 0,
+        }
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> int:
+        """已结束的采集项数量"""
+        return sum(self.counts.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            "total": self.total,
+            "done": self.done,
+            **self.counts,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": round((self.finished_at or time.time()) - self.started_at, 1),
+        }
+
+
+class FanoutEngine:
+    """
+    扇出引擎
+
+    Args:
+        concurrency: 同时执行的采集项上限
+        item_timeout: 单个采集项超时（秒）
+        budget: 整轮时间预算（秒）
+        progress_interval: 进度回调的最小间隔（秒）
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        item_timeout: float,
+        budget: float,
+        progress_interval: float = 2.0,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.item_timeout = item_timeout
+        self.budget = budget
+        self.progress_interval = progress_interval
+
+    async def run(
+        self,
+        items: Iterable[Any],
+        worker: Callable[[Any], Any],
+        executor: Optional[Executor] = None,
+        on_item_done: Optional[Callable[[Any, str, Any], None]] = None,
+        on_progress: Optional[Callable[[FanoutProgress], Awaitable[None]]] = None,
+    ) -> FanoutProgress:
+        """
+        执行扇出
+
+        Args:
+            items: 采集项
+            worker: 阻塞的采集函数，在线程池中执行
+            executor: 线程池，为空时使用事件循环默认线程池
+            on_item_done: 每个采集项结束时回调 (item, status, result 或异常)
+            on_progress: 节流后的进度回调（协程），结束时必定再回调一次
+
+        Returns:
+            最终进度
+        """
+        items = list(items)
+        progress = FanoutProgress(len(items))
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        deadline = time.monotonic() + self.budget
+        last_report = 0.0
+
+        async def report(force: bool = False) -> None:
+            nonlocal last_report
+            now = time.monotonic()
+            if on_progress and (force or now - last_report >= self.progress_interval):
+                last_report = now
+                try:
+                    await on_progress(progress)
+                except Exception as e:
+                    logger.warning(f"[Fanout] 进度回调失败: {e}")
+
+        def finish(item: Any, status: str, result: Any) -> None:
+            progress.counts[status] += 1
+            if on_item_done:
+                try:
+                    on_item_done(item, status, result)
+                except Exception as e:
+                    logger.warning(f"[Fanout] 结果回调失败: {e}")
+
+        async def run_item(item: Any) -> None:
+            async with semaphore:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    finish(item, FanoutStatus.SKIPPED, None)
+                    return
+
+                try:
+                    result = await asyncio.wait_for(
+                        loop.run_in_executor(executor, worker, item),
+                        timeout=min(self.item_timeout, remaining),
+                    )
+                    finish(item, FanoutStatus.SUCCESS, result)
+                except asyncio.TimeoutError as e:
+                    # 线程无法被中断，超时后不再等待其结果，信号量随即释放
+                    finish(item, FanoutStatus.TIMEOUT, e)
+                except Exception as e:
+                    finish(item, FanoutStatus.FAILED, e)
+
+            await report()
+
+        await report(force=True)
+        await asyncio.gather(*(run_item(item) for item in items))
+
+        progress.finished_at = time.time()
+        await report(force=True)
+        return progress
@@ -0,0 +1,182 @@
+# -*- encoding: utf-8 -*-
+"""
+关注列表快照同步
+
+关注列表保存为每个用户数据库中的快照（following_accounts），每轮监控不再全量采集：
+- 平时只请求关注列表开头几页（按关注时间倒序），连续出现多个快照中已有的账号后停止，发现新关注
+- 间隔较长时间才全量刷新一次，与快照对比得出新增、取消关注和资料变化的账号
+- 只把变化的账号批量写入数据库
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from ..constants import MONITOR_DEFAULTS
+from ..lib.douyin.client import DouyinClient
+from ..lib.douyin.parser import DataParser
+from ..lib.douyin.request import Request
+
+# 快照中参与比较的账号字段
+SNAPSHOT_FIELDS = ("nickname", "follower_count")
+
+
+class FollowingDiff:
+    """关注列表差异"""
+
+    def __init__(self) -> None:
+        self.added: List[Dict[str, Any]] = []  # 新关注的账号
+        self.removed: List[str] = []  # 取消关注的账号 ID
+        self.changed: List[Dict[str, Any]] = []  # 昵称、粉丝数等资料变化的账号
+
+    @property
+    def upserts(self) -> List[Dict[str, Any]]:
+        """需要写入数据库的账号"""
+        return self.added + self.changed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        return (
+            f"新增 {len(self.added)}，取消关注 {len(self.removed)}，"
+            f"资料变化 {len(self.changed)}"
+        )
+
+
+def diff_snapshot(
+    snapshot: Dict[str, Dict[str, Any]],
+    accounts: Iterable[Dict[str, Any]],
+    complete: bool = True,
+) -> FollowingDiff:
+    """
+    对比快照与最新采集的关注账号
+
+    Args:
+        snapshot: account_id -> 快照字段
+        accounts: 最新采集的关注账号
+        complete: 是否为完整的关注列表，不完整时不判断取消关注
+
+    Returns:
+        FollowingDiff: 差异
+    """
+    diff = FollowingDiff()
+    seen: Set[str] = set()
+
+    for account in accounts:
+        account_id = account.get("sec_uid")
+        if not account_id or account_id in seen:
+            continue
+        seen.add(account_id)
+
+        previous = snapshot.get(account_id)
+        if previous is None:
+            diff.added.append(account)
+        elif any(
+            account.get(field) is not None and account.get(field) != previous.get(field)
+            for field in SNAPSHOT_FIELDS
+        ):
+            diff.changed.append(account)
+
+    if complete:
+        diff.removed = [account_id for account_id in snapshot if account_id not in seen]
+    return diff
+
+
+class FollowingFetcher:
+    """
+    关注列表采集
+
+    Args:
+        cookie: Cookie字符串
+        max_retry: 单页请求失败的最大重试次数
+    """
+
+    def __init__(
+        self, cookie: str = "", max_retry: int = MONITOR_DEFAULTS["FOLLOWING_MAX_RETRY"]
+    ) -> None:
+        self.client = DouyinClient(Request(cookie))
+        self.max_retry = max_retry
+        self.requests = 0
+
+    def fetch_all(self, sec_user_id: str) -> List[Dict[str, Any]]:
+        """
+        采集完整关注列表，任一页多次失败时抛出异常（避免把不完整的列表当成取消关注）
+        """
+        accounts: List[Dict[str, Any]] = []
+        cursor = 0
+        has_more = True
+        while has_more:
+            items, cursor, has_more = self._fetch_page(sec_user_id, cursor)
+            accounts.extend(self._parse(items))
+        return accounts
+
+    def fetch_head(
+        self,
+        sec_user_id: str,
+        known_ids: Set[str],
+        max_pages: Optional[int] = None,
+        known_run: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        按关注时间倒序采集，返回新关注的账号
+
+        特别关注（置顶）的账号排在最前面，不代表后面都是已知账号：
+        置顶账号不计入，连续出现 known_run 个已知账号后才不再请求下一页（当前页仍检查完）。
+        """
+        max_pages = max_pages or MONITOR_DEFAULTS["FOLLOWING_HEAD_PAGES"]
+        known_run = known_run or MONITOR_DEFAULTS["FOLLOWING_KNOWN_RUN"]
+        added: List[Dict[str, Any]] = []
+        cursor = 0
+        has_more = True
+        pages = 0
+        run = 0
+        while has_more and pages < max_pages:
+            items, cursor, has_more = self._fetch_page(sec_user_id, cursor)
+            pages += 1
+            for item, account in self._parse_items(items):
+                if account.get("sec_uid") not in known_ids:
+                    added.append(account)
+                    run = 0
+                elif not item.get("is_top"):
+                    run += 1
+            if run >= known_run:
+                break
+        return added
+
+    def _fetch_page(self, sec_user_id: str, cursor: int) -> tuple:
+        """请求一页关注列表，失败时重试"""
+        last_error: Optional[Exception] = None
+        for attempt in range(1, self.max_retry + 1):
+            self.requests += 1
+            try:
+                items, new_cursor, _, has_more = self.client.fetch_awemes_list(
+                    "following", sec_user_id, cursor, "", {}
+                )
+            except Exception as e:
+                last_error = e
+                logger.warning(f"[Following] 关注列表请求失败: {e}... 第{attempt}次重试")
+                continue
+            # 空页只有在第一页、且响应明确没有更多时才是空的关注列表；
+            # 其他情况（请求失败返回 {}、翻页中途为空）按失败重试，避免把后面的账号当成取消关注
+            if items or (cursor == 0 and has_more is not None and not has_more):
+                return items, new_cursor, bool(has_more)
+            last_error = None
+            logger.warning(f"[Following] 关注列表请求结果为空... 第{attempt}次重试")
+        raise RuntimeError(f"关注列表采集失败: {last_error or '请求结果为空'}")
+
+    @classmethod
+    def _parse(cls, items: List[dict]) -> List[Dict[str, Any]]:
+        """解析关注账号，跳过无法解析的条目"""
+        return [account for _, account in cls._parse_items(items)]
+
+    @staticmethod
+    def _parse_items(items: List[dict]) -> List[Tuple[dict, Dict[str, Any]]]:
+        """解析关注账号，返回 (原始数据, 解析结果)，跳过无法解析的条目"""
+        accounts = []
+        for item in items:
+            try:
+                accounts.append((item, DataParser._parse_single_user(item)))
+            except Exception as e:
+                logger.warning(f"[Following] 解析关注账号失败: {e}")
+        return accounts
@@ -0,0 +1,246 @@
+# -*- encoding: utf-8 -*-
+"""
+增量采集关注账号作品
+
+每个账号记录最近见过的作品（ID 与发布时间），每轮监控：
+- 直接请求作品列表接口（不再请求主页 HTML、不写下载配置文件）
+- 翻页直到遇到已知作品或超出统计窗口为止，不发新作品的账号通常只需 1 次请求
+- 统计窗口内的已知作品优先用列表页里的数据刷新点赞等统计，
+  列表页没有覆盖到的少量作品再走单作品详情接口
+- 可选地先查跨用户共享缓存，其他用户刚采集过同一账号时不再重复请求
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from ..constants import MONITOR_DEFAULTS
+from ..lib.douyin.client import DouyinClient
+from ..lib.douyin.parser import DataParser
+from ..lib.douyin.request import Request
+from ..storage.shared_cache import SharedVideoCache
+
+
+class FetchResult:
+    """单个账号的增量采集结果"""
+
+    def __init__(self) -> None:
+        self.new_videos: List[Dict[str, Any]] = []  # 新发布的作品
+        self.refreshed: List[Dict[str, Any]] = []  # 刷新了统计数据的已知作品
+        self.last_aweme_id: Optional[str] = None
+        self.last_aweme_time: Optional[int] = None
+        self.pages = 0  # 列表页请求次数
+        self.detail_requests = 0  # 详情接口请求次数
+        # 列表页完整覆盖了发布时间晚于该值的全部作品，为空表示没有完整覆盖（达到翻页上限）
+        self.covered_since: Optional[int] = None
+        self.cached = False  # 是否来自共享缓存
+
+    @property
+    def videos(self) -> List[Dict[str, Any]]:
+        """需要保存的全部作品"""
+        return self.new_videos + self.refreshed
+
+    @property
+    def requests(self) -> int:
+        """本次采集的请求总数"""
+        return self.pages + self.detail_requests
+
+
+class IncrementalFetcher:
+    """
+    增量作品采集器，同一轮监控的所有账号共用一个请求客户端
+
+    Args:
+        cookie: Cookie字符串
+        window_days: 统计窗口（天），只采集和刷新窗口内发布的作品
+        max_pages: 单个账号最多请求的列表页数
+        detail_refresh_max: 列表页未覆盖的作品不超过该数量时走详情接口，否则继续翻页
+    """
+
+    def __init__(
+        self,
+        cookie: str = "",
+        window_days: int = MONITOR_DEFAULTS["WINDOW_DAYS"],
+        max_pages: int = MONITOR_DEFAULTS["MAX_PAGES"],
+        detail_refresh_max: int = MONITOR_DEFAULTS["DETAIL_REFRESH_MAX"],
+    ) -> None:
+        self.client = DouyinClient(Request(cookie))
+        self.window_days = window_days
+        self.max_pages = max_pages
+        self.detail_refresh_max = detail_refresh_max
+
+    def fetch(
+        self,
+        sec_uid: str,
+        state: Optional[Dict[str, Any]] = None,
+        refresh_targets: Iterable[str] = (),
+    ) -> FetchResult:
+        """
+        增量采集单个账号
+
+        Args:
+            sec_uid: 账号 sec_uid
+            state: 账号采集状态（last_aweme_id、last_aweme_time），首次采集为空
+            refresh_targets: 统计窗口内需要刷新统计数据的已知作品 ID，按上次刷新时间从早到晚排列
+
+        Returns:
+            FetchResult: 采集结果
+        """
+        result = FetchResult()
+        known_time = (state or {}).get("last_aweme_time")
+        result.last_aweme_id = (state or {}).get("last_aweme_id")
+        result.last_aweme_time = known_time
+
+        cutoff = int(time.time()) - self.window_days * 86400
+        refresh_targets = list(refresh_targets)
+        missing = set(refresh_targets)
+        seen = set()
+
+        cursor = 0
+        has_more = True
+        reached_known = False
+        failed = False
+        while has_more and result.pages < self.max_pages:
+            # 已到达已知作品后，只有未覆盖的作品较多时才继续翻页，否则交给详情接口
+            if reached_known and len(missing) <= self.detail_refresh_max:
+                break
+
+            items, cursor, _, has_more = self.client.fetch_awemes_list(
+                "post", sec_uid, cursor, "", {}
+            )
+            result.pages += 1
+            if not items:
+                # 响应中没有 has_more 字段说明请求失败，不能当作没有更多作品
+                failed = has_more is None
+                break
+
+            for item in items:
+                create_time = item.get("create_time", item.get("createTime")) or 0
+                is_top = item.get("is_top", item.get("tag", {}).get("isTop"))
+
+                if create_time < cutoff:
+                    # 置顶作品可能很旧，不代表后面都是窗口外的作品
+                    if not is_top:
+                        has_more = False
+                    continue
+
+                aweme = self._parse(item)
+                if not aweme or aweme["id"] in seen:
+                    continue
+                seen.add(aweme["id"])
+
+                is_known = known_time is not None and create_time <= known_time
+                if aweme["id"] in missing:
+                    missing.discard(aweme["id"])
+                    result.refreshed.append(aweme)
+                elif is_known:
+                    # 已知作品但不在刷新列表中（例如上轮保存失败），同样刷新
+                    result.refreshed.append(aweme)
+                else:
+                    result.new_videos.append(aweme)
+
+                if is_known and not is_top:
+                    reached_known = True
+                if not is_top and (
+                    result.last_aweme_time is None
+                    or create_time > result.last_aweme_time
+                ):
+                    result.last_aweme_id = aweme["id"]
+                    result.last_aweme_time = create_time
+
+        if not failed and not has_more:
+            result.covered_since = cutoff
+        elif reached_known:
+            result.covered_since = max(known_time, cutoff)
+        elif failed:
+            # 到达已知作品之前请求失败，中间可能还有没看到的新作品：保留原来的增量状态，
+            # 下一轮重新从第一页采集
+            logger.warning(
+                f"[Incremental] 账号 {sec_uid} 第 {result.pages} 页作品列表请求失败，保留增量状态"
+            )
+            result.last_aweme_id = (state or {}).get("last_aweme_id")
+            result.last_aweme_time = known_time
+
+        # 列表页未覆盖的作品走单作品详情接口刷新。超出数量上限的作品本轮不刷新，
+        # 它们的上次刷新时间最早，下一轮排在 refresh_targets 最前面
+        pending = [aweme_id for aweme_id in dict.fromkeys(refresh_targets) if aweme_id in missing]
+        if len(pending) > self.detail_refresh_max:
+            logger.debug(
+                f"[Incremental] 账号 {sec_uid} 有 {len(pending) - self.detail_refresh_max} "
+                f"个作品留到下一轮刷新"
+            )
+        for aweme_id in pending[: self.detail_refresh_max]:
+            result.detail_requests += 1
+            try:
+                detail = self.client.fetch_aweme_detail(aweme_id)
+            except Exception as e:
+                logger.warning(f"[Incremental] 刷新作品 {aweme_id} 失败: {e}")
+                continue
+            aweme = self._parse(detail)
+            if aweme:
+                result.refreshed.append(aweme)
+
+        return result
+
+    def fetch_shared(
+        self,
+        sec_uid: str,
+        state: Optional[Dict[str, Any]],
+        refresh_targets: Iterable[str],
+        cache: SharedVideoCache,
+        ttl: float,
+    ) -> FetchResult:
+        """
+        先查共享缓存，缓存覆盖了本用户需要的作品时直接返回，否则采集并写回缓存。
+        同一账号同时只有一个采集，其他用户等待后读取缓存。
+        """
+        refresh_targets = list(refresh_targets)
+        cutoff = int(time.time()) - self.window_days * 86400
+        known_time = (state or {}).get("last_aweme_time")
+        since = max(known_time, cutoff) if known_time is not None else cutoff
+
+        with cache.crawl_lock(sec_uid):
+            videos = cache.get(sec_uid, since, refresh_targets, ttl)
+            if videos is not None:
+                return self._from_cache(videos, state, since, refresh_targets)
+            result = self.fetch(sec_uid, state, refresh_targets)
+            try:
+                cache.put(sec_uid, result.videos, result.covered_since, cutoff)
+            except Exception as e:
+                logger.warning(f"[Incremental] 写入共享缓存失败: {e}")
+            return result
+
+    @staticmethod
+    def _from_cache(
+        videos: List[Dict[str, Any]],
+        state: Optional[Dict[str, Any]],
+        since: int,
+        refresh_targets: List[str],
+    ) -> FetchResult:
+        """按本用户的增量状态划分缓存中的新作品和需要刷新的作品"""
+        result = FetchResult()
+        result.cached = True
+        result.last_aweme_id = (state or {}).get("last_aweme_id")
+        result.last_aweme_time = (state or {}).get("last_aweme_time")
+        result.covered_since = since
+        targets = set(refresh_targets)
+        for aweme in videos:
+            create_time = aweme.get("time") or 0
+            if aweme["id"] in targets or create_time <= since:
+                result.refreshed.append(aweme)
+                continue
+            result.new_videos.append(aweme)
+            if result.last_aweme_time is None or create_time > result.last_aweme_time:
+                result.last_aweme_id = aweme["id"]
+                result.last_aweme_time = create_time
+        return result
+
+    @staticmethod
+    def _parse(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """解析作品数据，直播等不支持的类型返回 None"""
+        try:
+            return DataParser._parse_single_aweme(item, "post")
+        except Exception as e:
+            logger.warning(f"[Incremental] 解析作品失败: {e}")
+            return None
@@ -0,0 +1,405 @@
+# -*- encoding: utf-8 -*-
+"""
+周期性监控调度
+
+在服务端生命周期内按用户配置的计划自动运行监控任务：
+- 计划支持固定间隔（秒）或 5 段 cron 表达式（分 时 日 月 周）
+- 同一用户的任务仍在运行时不会重复启动（手动启动同样受此限制）
+- 用户授权和试用期都已过期时不再运行，并停用其计划
+- 每次计算下次运行时间时加入随机抖动，分散多个用户的请求
+- 服务停止或休眠期间错过的运行按策略处理：补跑一次（run_once）或直接跳过（skip）
+
+用户计划保存在用户配置（UserConfig.schedule）中，例如：
+    {"enabled": true, "interval": 1800, "jitter": 60, "misfire": "run_once"}
+    {"enabled": true, "cron": "*/30 8-23 * * *"}
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from loguru import logger
+
+from ..constants import SCHEDULE_DEFAULTS
+from ..models import UserConfig
+from ..settings import settings
+from .scheduler import monitoring_manager
+
+
+class MisfirePolicy:
+    """错过运行时间的处理策略"""
+
+    RUN_ONCE = "run_once"  # 补跑一次（多次错过也只补跑一次）
+    SKIP = "skip"  # 跳过，等待下一个计划时间
+
+
+class CronExpression:
+    """
+    5 段 cron 表达式（分 时 日 月 周）
+
+    每段支持 *、数字、范围 a-b、步长 */n 或 a-b/n，以及逗号分隔的列表。
+    周的取值为 0-6（0 和 7 都表示周日）。日和周都被限定时，满足任意一个即可，与 crontab 一致。
+    """
+
+    _FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str) -> None:
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron 表达式必须是 5 段: {expression}")
+
+        self.expression = expression
+        fields = [
+            self._parse_field(part, low, high)
+            for part, (low, high) in zip(parts, self._FIELDS)
+        ]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        # 7 也表示周日
+        self.weekdays = {0 if day == 7 else day for day in weekdays}
+        self._day_restricted = parts[2] != "*"
+        self._weekday_restricted = parts[4] != "*"
+
+    @staticmethod
+    def _parse_field(part: str, low: int, high: int) -> Set[int]:
+        """解析单个字段"""
+        values: Set[int] = set()
+        for item in part.split(","):
+            step = 1
+            if "/" in item:
+                item, step_text = item.split("/", 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"cron 步长必须大于 0: {part}")
+
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start_text, end_text = item.split("-", 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(item)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"cron 字段超出范围 [{low}-{high}]: {part}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        """日期是否匹配日和周字段"""
+        day_ok = dt.day in self.days
+        # Python 的 weekday() 周一为 0，cron 周日为 0
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._day_restricted and self._weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, dt: datetime) -> datetime:
+        """计算 dt 之后（不含 dt 所在分钟）的下一次触发时间"""
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 最多向后查找约 5 年，覆盖 2 月 29 日这类稀疏表达式
+        limit = candidate + timedelta(days=366 * 5)
+
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year = candidate.year + candidate.month // 12
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(
+                    year=year, month=month, day=1, hour=0, minute=0
+                )
+                continue
+            if not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+
+        raise ValueError(f"cron 表达式没有可触发的时间: {self.expression}")
+
+
+class ScheduledJob:
+    """单个用户的周期性监控任务"""
+
+    def __init__(self, user_id: str, schedule: Dict[str, Any]) -> None:
+        self.user_id = user_id
+        self.interval: Optional[int] = schedule.get("interval")
+        self.cron: Optional[CronExpression] = (
+            CronExpression(schedule["cron"]) if schedule.get("cron") else None
+        )
+        if not self.interval and not self.cron:
+            raise ValueError("计划必须设置 interval 或 cron")
+        if self.interval and self.interval < SCHEDULE_DEFAULTS["MIN_INTERVAL"]:
+            raise ValueError(f"间隔不能小于 {SCHEDULE_DEFAULTS['MIN_INTERVAL']} 秒")
+
+        self.jitter: float = schedule.get("jitter", SCHEDULE_DEFAULTS["JITTER"])
+        self.misfire: str = schedule.get("misfire", MisfirePolicy.RUN_ONCE)
+        if self.misfire not in (MisfirePolicy.RUN_ONCE, MisfirePolicy.SKIP):
+            raise ValueError(f"未知的错过处理策略: {self.misfire}")
+
+        self.last_run_at: Optional[datetime] = None
+        if schedule.get("last_run_at"):
+            try:
+                self.last_run_at = datetime.fromisoformat(schedule["last_run_at"])
+            except ValueError:
+                pass
+
+        self.next_run_at: Optional[datetime] = None  # 含抖动的实际运行时间
+        self.nominal_run_at: Optional[datetime] = None  # 不含抖动的计划时间
+        self.last_status: Optional[str] = None
+        self.missed_runs = 0  # 因服务停止等原因错过的运行次数
+        self.skipped_overlaps = 0  # 因上一次仍在运行而跳过的次数
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def plan_next(self, now: datetime) -> None:
+        """根据上次计划时间计算下次运行时间，处理错过的运行"""
+        base = self.nominal_run_at or self.last_run_at
+        if base is None:
+            # 首次启用：间隔计划立即运行（加抖动），cron 计划等待下一个触发时间
+            self.nominal_run_at = now if self.interval else self.cron.next_after(now)
+            self.next_run_at = self.nominal_run_at + self._jitter()
+            return
+
+        nominal = self._next_nominal(base)
+        missed = 0
+        while nominal < now:
+            missed += 1
+            nominal = self._next_nominal(nominal)
+
+        if missed and self.misfire == MisfirePolicy.RUN_ONCE:
+            # 错过的多次运行合并为一次，立即补跑
+            self.missed_runs += missed
+            logger.warning(f"[Schedule] 用户 {self.user_id} 错过 {missed} 次运行，立即补跑一次")
+            nominal = now
+        elif missed:
+            self.missed_runs += missed
+            logger.info(f"[Schedule] 用户 {self.user_id} 跳过 {missed} 次错过的运行")
+
+        self.nominal_run_at = nominal
+        self.next_run_at = nominal + self._jitter()
+
+    def _next_nominal(self, after: datetime) -> datetime:
+        """不含抖动的下一个计划时间"""
+        if self.cron:
+            return self.cron.next_after(after)
+        return after + timedelta(seconds=self.interval)
+
+    def _jitter(self) -> timedelta:
+        return timedelta(seconds=random.uniform(0, self.jitter)) if self.jitter else timedelta()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            "user_id": self.user_id,
+            "interval": self.interval,
+            "cron": self.cron.expression if self.cron else None,
+            "jitter": self.jitter,
+            "misfire": self.misfire,
+            "running": self.running,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_status": self.last_status,
+            "missed_runs": self.missed_runs,
+            "skipped_overlaps": self.skipped_overlaps,
+        }
+
+
+class PeriodicScheduler:
+    """周期性监控调度器，在服务端生命周期内运行"""
+
+    def __init__(self) -> None:
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}  # 各用户正在运行的监控任务（含手动启动）
+        self._loop_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        """加载所有用户的计划并启动调度循环"""
+        if self._loop_task:
+            return
+
+        self._wakeup = asyncio.Event()
+        for user_id in UserConfig.list_user_ids():
+            schedule = UserConfig(user_id).schedule
+            if schedule.get("enabled"):
+                try:
+                    self._add_job(user_id, schedule)
+                except ValueError as e:
+                    logger.error(f"[Schedule] 用户 {user_id} 的计划无效: {e}")
+
+        self._loop_task = asyncio.create_task(self._run_loop())
+        logger.info(f"✓ 周期监控调度已启动，共 {len(self.jobs)} 个计划")
+
+    async def stop(self) -> None:
+        """停止调度循环（不中断正在运行的监控任务）"""
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+
+    def set_schedule(self, user_id: str, schedule: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        设置用户的计划并保存到用户配置
+
+        Args:
+            user_id: 用户ID
+            schedule: 计划配置，enabled 为 False 时移除计划
+
+        Returns:
+            dict: 保存后的计划
+        """
+        user = UserConfig(user_id)
+        schedule = {**schedule, "last_run_at": user.schedule.get("last_run_at")}
+
+        if schedule.get("enabled"):
+            # 先校验再保存，无效计划抛出 ValueError
+            job = self._add_job(user_id, schedule)
+            if self._wakeup:
+                self._wakeup.set()
+            logger.info(f"[Schedule] 用户 {user_id} 下次运行: {job.next_run_at}")
+        else:
+            self.jobs.pop(user_id, None)
+
+        user.schedule = schedule
+        user.save()
+        return schedule
+
+    def disable(self, user_id: str) -> None:
+        """停用用户的计划（停止监控或授权过期时调用）"""
+        self.jobs.pop(user_id, None)
+        user = UserConfig(user_id)
+        if user.schedule.get("enabled"):
+            user.schedule["enabled"] = False
+            user.save()
+            logger.info(f"[Schedule] 用户 {user_id} 的周期监控已停用")
+
+    def get_status(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取计划状态（包含下次运行时间），按下次运行时间排序"""
+        jobs = [
+            job
+            for job in self.jobs.values()
+            if user_id is None or job.user_id == user_id
+        ]
+        jobs.sort(key=lambda job: job.next_run_at or datetime.max)
+        return [job.to_dict() for job in jobs]
+
+    def trigger(self, user_id: str, cookie: str = "") -> bool:
+        """
+        立即启动一次监控任务（手动启动也走这里，保证同一用户不会并发运行）
+
+        Returns:
+            bool: 已在运行时返回 False
+        """
+        scheduler = monitoring_manager.get_scheduler(user_id)
+        # 监控任务真正开始运行前 is_running 仍为 False，同时检查已创建的任务
+        task = self._tasks.get(user_id)
+        if scheduler.is_running or (task and not task.done()):
+            return False
+
+        task = asyncio.create_task(self._run_job(user_id, cookie))
+        self._tasks[user_id] = task
+        task.add_done_callback(lambda done: self._forget_task(user_id, done))
+        job = self.jobs.get(user_id)
+        if job:
+            job.task = task
+        return True
+
+    def _forget_task(self, user_id: str, task: asyncio.Task) -> None:
+        if self._tasks.get(user_id) is task:
+            del self._tasks[user_id]
+
+    def _add_job(self, user_id: str, schedule: Dict[str, Any]) -> ScheduledJob:
+        """创建计划任务，保留仍在运行的监控任务"""
+        job = ScheduledJob(user_id, schedule)
+        previous = self.jobs.get(user_id)
+        job.task = self._tasks.get(user_id)
+        if previous:
+            job.last_status = previous.last_status
+        job.plan_next(datetime.now())
+        self.jobs[user_id] = job
+        return job
+
+    async def _run_loop(self) -> None:
+        """调度循环：等待最近的运行时间，启动到期的任务"""
+        while True:
+            try:
+                now = datetime.now()
+                for job in list(self.jobs.values()):
+                    if job.next_run_at and job.next_run_at <= now:
+                        self._fire(job, now)
+
+                # 等待最近的运行时间，计划变更时提前唤醒
+                next_times = [job.next_run_at for job in self.jobs.values() if job.next_run_at]
+                timeout = SCHEDULE_DEFAULTS["MAX_SLEEP"]
+                if next_times:
+                    delay = (min(next_times) - datetime.now()).total_seconds()
+                    timeout = max(0.0, min(timeout, delay))
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[Schedule] 调度循环异常: {e}")
+                await asyncio.sleep(SCHEDULE_DEFAULTS["MAX_SLEEP"])
+
+    def _fire(self, job: ScheduledJob, now: datetime) -> None:
+        """启动到期的任务，上一次仍在运行时跳过本次"""
+        # 与手动启动（get_current_user）一样要求授权或试用期有效
+        if not UserConfig(job.user_id).has_valid_access():
+            logger.warning(f"[Schedule] 用户 {job.user_id} 授权已过期，停用周期监控")
+            self.disable(job.user_id)
+            return
+
+        cookie = settings.get("cookie", "").strip()
+        if self.trigger(job.user_id, cookie):
+            logger.info(f"[Schedule] 用户 {job.user_id} 定时监控已启动")
+        else:
+            job.skipped_overlaps += 1
+            logger.warning(f"[Schedule] 用户 {job.user_id} 上一次监控仍在运行，跳过本次")
+
+        # 按计划时间推进，运行耗时不影响后续计划
+        job.plan_next(now)
+
+    async def _run_job(self, user_id: str, cookie: str) -> None:
+        """运行一次监控任务并记录结果"""
+        started_at = datetime.now()
+        status = "success"
+        try:
+            await monitoring_manager.start_task(user_id, cookie)
+        except Exception as e:
+            status = "failed"
+            logger.error(f"[Schedule] 用户 {user_id} 监控任务失败: {e}")
+        finally:
+            job = self.jobs.get(user_id)
+            if job:
+                job.last_run_at = started_at
+                job.last_status = status
+            self._save_last_run(user_id, started_at)
+
+    @staticmethod
+    def _save_last_run(user_id: str, started_at: datetime) -> None:
+        """保存上次运行时间，重启后据此判断错过的运行"""
+        user = UserConfig(user_id)
+        if user.schedule:
+            user.schedule["last_run_at"] = started_at.isoformat()
+            user.save()
+
+
+# 全局周期调度器
+periodic_scheduler = PeriodicScheduler()
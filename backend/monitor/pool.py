@@ -0,0 +1,249 @@
+# -*- encoding: utf-8 -*-
+"""
+进程级采集线程池
+
+所有用户的监控调度器共享同一组采集线程，总并发由线程数统一限定。
+各用户的待执行任务分队列存放，空闲线程按赤字轮询（Deficit Round Robin）
+从各队列取任务：每轮给用户增加与权重相等的额度，每执行一个任务消耗 1，
+关注账号很多的用户不会饿死其他用户。
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Deque, Dict, Optional
+
+from loguru import logger
+
+from ..constants import MONITOR_DEFAULTS
+from ..settings import settings
+
+
+class _WorkItem:
+    """排队中的采集任务"""
+
+    __slots__ = ("future", "fn", "args", "kwargs")
+
+    def __init__(self, future: Future, fn: Callable, args: tuple, kwargs: dict):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self) -> None:
+        # 排队期间已被取消（例如扇出超时或停止监控）的任务直接丢弃
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+
+class _UserQueue:
+    """单个用户的任务队列与调度状态"""
+
+    __slots__ = ("items", "weight", "deficit", "running", "completed")
+
+    def __init__(self, weight: float):
+        self.items: Deque[_WorkItem] = deque()
+        self.weight = weight
+        self.deficit = 0.0
+        self.running = 0
+        self.completed = 0
+
+
+class CrawlWorkerPool:
+    """
+    按用户公平调度的共享采集线程池
+
+    Args:
+        max_workers: 线程数，为空时在首次提交任务时从设置读取
+    """
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        self.max_workers = max_workers
+        self._queues: Dict[str, _UserQueue] = {}
+        # 有待执行任务的用户，按轮询顺序排列
+        self._active: Deque[str] = deque()
+        self._cond = threading.Condition()
+        self._threads: list = []
+        self._shutdown = False
+
+    def submit(
+        self, user_id: str, fn: Callable, *args: Any, **kwargs: Any
+    ) -> Future:
+        """为指定用户提交采集任务"""
+        future: Future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("采集线程池已关闭")
+
+            queue = self._queues.get(user_id)
+            if queue is None:
+                queue = self._queues[user_id] = _UserQueue(1.0)
+            if not queue.items:
+                self._active.append(user_id)
+            queue.items.append(_WorkItem(future, fn, args, kwargs))
+
+            self._ensure_workers()
+            self._cond.notify()
+        return future
+
+    def for_user(self, user_id: str, weight: float = 1.0) -> "UserCrawlExecutor":
+        """获取绑定到用户的执行器，可直接传给 run_in_executor"""
+        self.set_weight(user_id, weight)
+        return UserCrawlExecutor(self, user_id)
+
+    def set_weight(self, user_id: str, weight: float) -> None:
+        """设置用户的调度权重，权重越大每轮可执行的任务越多"""
+        with self._cond:
+            queue = self._queues.get(user_id)
+            if queue is None:
+                self._queues[user_id] = _UserQueue(max(weight, 0.1))
+            else:
+                queue.weight = max(weight, 0.1)
+
+    def cancel_user(self, user_id: str) -> int:
+        """取消用户所有尚未开始的任务，返回取消数量"""
+        with self._cond:
+            queue = self._queues.get(user_id)
+            if queue is None:
+                return 0
+            items = list(queue.items)
+            queue.items.clear()
+            queue.deficit = 0.0
+            try:
+                self._active.remove(user_id)
+            except ValueError:
+                pass
+
+        for item in items:
+            item.future.cancel()
+        return len(items)
+
+    def stats(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """获取线程池状态，指定用户时只返回该用户的统计"""
+        with self._cond:
+            if user_id is not None:
+                queue = self._queues.get(user_id)
+                if queue is None:
+                    return {"pending": 0, "running": 0, "completed": 0, "weight": 1.0}
+                return {
+                    "pending": len(queue.items),
+                    "running": queue.running,
+                    "completed": queue.completed,
+                    "weight": queue.weight,
+                }
+            return {
+                "workers": len(self._threads),
+                "pending": sum(len(q.items) for q in self._queues.values()),
+                "running": sum(q.running for q in self._queues.values()),
+                "active_users": len(self._active),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭线程池，未开始的任务全部取消"""
+        with self._cond:
+            self._shutdown = True
+            pending = [item for q in self._queues.values() for item in q.items]
+            for queue in self._queues.values():
+                queue.items.clear()
+            self._active.clear()
+            self._cond.notify_all()
+            threads = list(self._threads)
+
+        for item in pending:
+            item.future.cancel()
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _ensure_workers(self) -> None:
+        """按需启动工作线程（调用方持有锁）"""
+        if self.max_workers is None:
+            self.max_workers = settings.get(
+                "monitorWorkers", MONITOR_DEFAULTS["WORKERS"]
+            )
+        # 与 ThreadPoolExecutor 相同，只在没有空闲线程时再启动新线程
+        idle = len(self._threads) - sum(q.running for q in self._queues.values())
+        pending = sum(len(q.items) for q in self._queues.values())
+        if pending > idle and len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"crawl-worker-{len(self._threads)}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _next_item(self) -> Optional[tuple]:
+        """按赤字轮询选出下一个任务（调用方持有锁）"""
+        while self._active:
+            user_id = self._active[0]
+            queue = self._queues[user_id]
+
+            if not queue.items:
+                # 队列已空，退出轮询并清空额度，避免空闲用户积攒额度
+                self._active.popleft()
+                queue.deficit = 0.0
+                continue
+
+            if queue.deficit < 1:
+                queue.deficit += queue.weight
+                if queue.deficit < 1:
+                    # 权重小于 1 的用户需要多轮积攒额度
+                    self._active.rotate(-1)
+                    continue
+
+            queue.deficit -= 1
+            item = queue.items.popleft()
+            if queue.deficit < 1 or not queue.items:
+                # 本轮额度用完，轮到下一个用户
+                self._active.rotate(-1)
+            return user_id, item
+        return None
+
+    def _worker(self) -> None:
+        """工作线程主循环"""
+        while True:
+            with self._cond:
+                picked = self._next_item()
+                while picked is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    picked = self._next_item()
+                user_id, item = picked
+                queue = self._queues[user_id]
+                queue.running += 1
+
+            try:
+                item.run()
+            except Exception as e:  # pragma: no cover - run 已捕获任务异常
+                logger.error(f"[CrawlPool] 任务执行异常: {e}")
+            finally:
+                with self._cond:
+                    queue.running -= 1
+                    queue.completed += 1
+
+
+class UserCrawlExecutor(Executor):
+    """绑定到单个用户的执行器视图，任务提交到共享线程池中该用户的队列"""
+
+    def __init__(self, pool: CrawlWorkerPool, user_id: str) -> None:
+        self.pool = pool
+        self.user_id = user_id
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        return self.pool.submit(self.user_id, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        # 共享线程池不随单个用户关闭，只取消该用户排队中的任务
+        self.pool.cancel_user(self.user_id)
+
+
+# 全局采集线程池
+crawl_pool = CrawlWorkerPool()
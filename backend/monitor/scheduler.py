@@ -7,31 +7,58 @@
 
 import asyncio
 import os
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
 
+from ..constants import MONITOR_DEFAULTS, SHARED_CACHE_DEFAULTS
 from ..lib.douyin.crawler import Douyin
+from ..storage.job_queue import get_job_queue
+from ..storage.rollup import RollupEngine
+from ..storage.shared_cache import get_shared_cache
 from ..storage.user_db import UserDatabase
 from ..models import UserConfig
+from ..settings import settings
+from ..sse import sse
+from .analytics import TrendAnalytics
+from .cadence import CadencePlanner, PollQueue, build_queue
+from .fanout import FanoutEngine, FanoutProgress, FanoutStatus
+from .following import FollowingFetcher, diff_snapshot
+from .incremental import IncrementalFetcher
+from .pool import crawl_pool
+
+
+class MonitorMode:
+    """监控运行方式"""
+    LOCAL = "local"  # 在服务端进程内采集
+    DISTRIBUTED = "distributed"  # 加入共享任务队列，由监控工作进程采集
+
+
+# 关注列表上次全量刷新时间（monitor_meta 键）
+FOLLOWING_REFRESH_KEY = "following_full_refresh_at"
 
 
 class MonitoringScheduler:
     """监控调度器 - 重用原项目爬虫"""
     
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, shared_db: Optional[bool] = None):
         self.user_id = user_id
         self.user_config = UserConfig(user_id)
         self.user_db = None  # 延迟初始化数据库连接
-        self.executor = ThreadPoolExecutor(max_workers=5)  # 并行采集
+        self.shared_db = shared_db  # 数据库是否由多台机器共享，见 UserDatabase
+        self.executor = crawl_pool.for_user(user_id)  # 共享采集线程池中该用户的队列
         self.is_running = False
         self.last_update_time = datetime.now()
+        self.progress: Dict = {}  # 最近一轮监控的进度
+        self.planner = CadencePlanner()
+        self.poll_queue = PollQueue()  # 各账号的下次采集时间
+        self.analytics = TrendAnalytics()  # 作品增速与爆款分析
     
     def _get_db(self):
         """获取数据库连接（延迟初始化）"""
         if self.user_db is None:
-            self.user_db = UserDatabase(self.user_id)
+            self.user_db = UserDatabase(self.user_id, self.shared_db)
         return self.user_db
     
     async def init_crawler(self, sec_user_id: str, cookie: str = "") -> Douyin:
@@ -45,61 +72,45 @@ class MonitoringScheduler:
         )
         return crawler
     
-    async def monitor_following(self, sec_user_id: str, cookie: str = ""):
-        """监控用户关注列表"""
+    async def monitor_following(self, sec_user_id: str, cookie: str = "", full: bool = False):
+        """
+        监控用户关注列表
+        
+        Args:
+            sec_user_id: 用户 sec_user_id
+            cookie: Cookie字符串
+            full: 为 True 时采集全部账号，否则只采集已到下次采集时间的账号
+        """
         logger.info(f"[{self.user_id}] 开始监控关注列表...")
         
         try:
-            # 1. 获取关注列表
-            following_crawler = Douyin(
-                target=sec_user_id,
-                type="following",
-                limit=0,  # 不设限制，获取所有关注账号
-                cookie=cookie
-            )
-            
-            # 同步运行关注列表采集
+            # 1. 同步关注列表快照（平时只检查新关注，定期全量刷新）
             loop = asyncio.get_event_loop()
-            await loop.run_in_executor(self.executor, following_crawler.run)
-            
-            following_list = following_crawler.results
-            logger.info(f"[{self.user_id}] 共关注 {len(following_list)} 个账号")
+            accounts = await loop.run_in_executor(
+                self.executor, self._sync_following, sec_user_id, cookie, full
+            )
+            logger.info(f"[{self.user_id}] 共关注 {len(accounts)} 个账号")
             
-            # 2. 并行采集每个账号的视频
-            tasks = []
-            for account in following_list:  # 处理所有关注账号
-                account_sec_uid = account.get('sec_uid')
-                account_name = account.get('nickname', 'Unknown')
-                
-                if account_sec_uid:
-                    # 尝试保存账号信息
-                    try:
-                        self._get_db().save_account(
-                            account_id=account_sec_uid,
-                            sec_uid=account_sec_uid,
-                            nickname=account_name,
-                            follower_count=account.get('follower_count', 0)
-                        )
-                    except Exception as e:
-                        logger.warning(f"[{self.user_id}] 保存账号信息失败: {e}")
-                    
-                    # 创建采集任务
-                    task = self.executor.submit(
-                        self.fetch_account_videos,
-                        account_sec_uid,
-                        account_name,
-                        cookie
-                    )
-                    tasks.append(task)
+            # 2. 按自适应轮询间隔挑出已到期的账号（最久未更新的在前，超时/跳过的账号仍保持到期）
+            states = self._get_db().get_account_states()
+            self.poll_queue = build_queue(
+                [account_id for account_id, _ in accounts],
+                {} if full else {
+                    account_id: state['next_poll_at'] for account_id, state in states.items()
+                }
+            )
+            names = dict(accounts)
+            due = [(account_id, names[account_id]) for account_id in self.poll_queue.pop_due()]
+            logger.info(f"[{self.user_id}] 本轮到期账号 {len(due)}/{len(accounts)} 个")
             
-            # 3. 处理结果
-            for future in as_completed(tasks, timeout=600):  # 10分钟超时
-                try:
-                    account_id, videos = future.result()
-                    if videos:
-                        logger.info(f"[{self.user_id}] 账号 {account_id} 采集到 {len(videos)} 个视频")
-                except Exception as e:
-                    logger.error(f"[{self.user_id}] 采集失败: {e}")
+            # 3. 扇出采集到期账号的视频；分布式模式下交给监控工作进程
+            if settings.get("monitorMode", MONITOR_DEFAULTS["MODE"]) == MonitorMode.DISTRIBUTED:
+                added = await loop.run_in_executor(None, get_job_queue().enqueue, self.user_id, due)
+                logger.info(f"[{self.user_id}] 已加入任务队列 {added} 个账号，由监控工作进程采集")
+            else:
+                await self._fanout_accounts(due, cookie, states)
+                # 4. 增量更新趋势分析（只读取本轮新写入的采样）
+                await loop.run_in_executor(None, self.refresh_analytics)
             
             self.last_update_time = datetime.now()
             logger.info(f"[{self.user_id}] 关注列表监控完成")
@@ -107,44 +118,185 @@ class MonitoringScheduler:
         except Exception as e:
             logger.error(f"[{self.user_id}] 监控任务失败: {e}")
     
+    def _sync_following(self, sec_user_id: str, cookie: str = "", full: bool = False) -> List[Tuple[str, str]]:
+        """同步关注列表快照，只写入变化的账号，返回正在监控的账号"""
+        db = self._get_db()
+        snapshot = db.get_following_snapshot()
+        fetcher = FollowingFetcher(cookie)
+        
+        last_refresh = db.get_meta(FOLLOWING_REFRESH_KEY)
+        refresh_interval = MONITOR_DEFAULTS["FOLLOWING_REFRESH_INTERVAL"]
+        refresh_due = (
+            full or not snapshot or last_refresh is None
+            or time.time() - float(last_refresh) >= refresh_interval
+        )
+        
+        if refresh_due:
+            try:
+                diff = diff_snapshot(snapshot, fetcher.fetch_all(sec_user_id))
+                # 接口失败时也可能返回空列表，大量账号同时"取消关注"时视为列表不完整
+                if snapshot and len(diff.removed) > len(snapshot) * MONITOR_DEFAULTS["FOLLOWING_MAX_REMOVED_RATIO"]:
+                    raise RuntimeError(f"关注列表疑似不完整，{len(diff.removed)} 个账号未出现")
+                db.set_meta(FOLLOWING_REFRESH_KEY, str(time.time()))
+            except Exception as e:
+                if not snapshot:
+                    raise
+                # 全量刷新失败时沿用快照，下一轮继续尝试
+                logger.warning(f"[{self.user_id}] 全量刷新关注列表失败，沿用快照: {e}")
+                diff = None
+        else:
+            added = fetcher.fetch_head(sec_user_id, set(snapshot))
+            diff = diff_snapshot(snapshot, added, complete=False)
+        
+        if diff:
+            db.apply_following_diff(
+                diff.upserts, diff.removed, [account['sec_uid'] for account in diff.added]
+            )
+            logger.info(f"[{self.user_id}] 关注列表变化: {diff.summary()}")
+        logger.info(
+            f"[{self.user_id}] 关注列表{'全量刷新' if refresh_due else '增量检查'}完成，"
+            f"请求 {fetcher.requests} 次"
+        )
+        return db.get_monitored_accounts()
+    
+    async def _fanout_accounts(self, accounts: List[Tuple[str, str]], cookie: str = "",
+                               states: Optional[Dict[str, Dict]] = None):
+        """在并发上限、单账号超时和整轮时间预算内采集全部账号"""
+        engine = FanoutEngine(
+            concurrency=settings.get("monitorConcurrency", MONITOR_DEFAULTS["CONCURRENCY"]),
+            item_timeout=settings.get("monitorAccountTimeout", MONITOR_DEFAULTS["ACCOUNT_TIMEOUT"]),
+            budget=settings.get("monitorSweepBudget", MONITOR_DEFAULTS["SWEEP_BUDGET"]),
+            progress_interval=MONITOR_DEFAULTS["PROGRESS_INTERVAL"],
+        )
+        
+        # 增量采集：一次性读取各账号最近见过的作品和需要刷新统计的视频
+        db = self._get_db()
+        fetcher = IncrementalFetcher(cookie)
+        if states is None:
+            states = db.get_account_states()
+        targets = db.get_refresh_targets(
+            int((datetime.now() - timedelta(days=fetcher.window_days)).timestamp())
+        )
+        
+        # 账号结果先缓存，随进度回调批量落库，中途停止也不会丢失已完成账号的进度
+        pending_results: List[Tuple[str, str, Optional[str]]] = []
+        request_count = 0
+        cache_hits = 0
+        
+        def on_item_done(account, status, result):
+            nonlocal request_count, cache_hits
+            account_id, account_name = account
+            error = None
+            if status == FanoutStatus.SUCCESS:
+                _, fetched, next_poll_at = result
+                request_count += fetched.requests
+                cache_hits += fetched.cached
+                self.poll_queue.schedule(account_id, next_poll_at)
+                if fetched.new_videos:
+                    logger.info(f"[{self.user_id}] 账号 {account_id} 发布了 {len(fetched.new_videos)} 个新视频")
+            elif status != FanoutStatus.SKIPPED:
+                error = str(result) or status
+                logger.error(f"[{self.user_id}] 采集账号 {account_name} 失败: {error}")
+                # 失败或超时的账号尽快重试
+                self.poll_queue.schedule(account_id, time.time() + self.planner.min_interval)
+            else:
+                # 超出时间预算的账号保持到期，下一轮优先采集
+                self.poll_queue.schedule(account_id, time.time())
+            pending_results.append((account_id, status, error))
+        
+        async def on_progress(progress: FanoutProgress):
+            self.progress = progress.to_dict()
+            if pending_results:
+                batch = pending_results[:]
+                pending_results.clear()
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self._get_db().save_sweep_results, batch)
+            await sse.send_monitor_status(self.user_id, "running", progress=self.progress)
+        
+        progress = await engine.run(
+            accounts,
+            lambda account: self._crawl_account(
+                account[0], fetcher, states.get(account[0]), targets.get(account[0], [])
+            ),
+            executor=self.executor,
+            on_item_done=on_item_done,
+            on_progress=on_progress,
+        )
+        
+        counts = progress.counts
+        logger.info(
+            f"[{self.user_id}] 采集完成: 成功 {counts[FanoutStatus.SUCCESS]}，"
+            f"失败 {counts[FanoutStatus.FAILED]}，超时 {counts[FanoutStatus.TIMEOUT]}，"
+            f"超出时间预算 {counts[FanoutStatus.SKIPPED]}，请求 {request_count} 次，"
+            f"共享缓存命中 {cache_hits} 个账号，"
+            f"耗时 {progress.to_dict()['elapsed']} 秒"
+        )
+    
     def fetch_account_videos(self, account_sec_uid: str, account_name: str, cookie: str = "") -> tuple:
-        """获取账号最近视频 - 重用原项目方法"""
+        """获取账号最近视频（增量采集）"""
         try:
-            # 创建爬虫实例（不使用回调函数，直接处理数据）
-            crawler = Douyin(
-                target=account_sec_uid,
-                type="post",
-                limit=10,  # 每个账号最多10个视频
-                cookie=cookie
-            )
-            
-            # 运行采集
-            crawler.run()
-            
-            # 过滤近3天的视频
-            three_days_ago = datetime.now() - timedelta(days=3)
-            recent_videos = []
-            
-            for video in crawler.results:
-                video_time = video.get('time')
-                if video_time:
-                    video_datetime = datetime.fromtimestamp(video_time)
-                    if video_datetime > three_days_ago:
-                        recent_videos.append(video)
-            
-            # 保存视频数据
-            if recent_videos:
-                try:
-                    self._get_db().save_video_data(account_sec_uid, recent_videos)
-                except Exception as e:
-                    logger.warning(f"[{self.user_id}] 保存视频数据失败: {e}")
-            
-            return account_sec_uid, recent_videos
-            
+            _, result, _ = self.crawl_account(account_sec_uid, IncrementalFetcher(cookie))
+            return account_sec_uid, result.videos
         except Exception as e:
             logger.error(f"[{self.user_id}] 采集账号 {account_name} 失败: {e}")
             return account_sec_uid, []
     
+    def crawl_account(self, account_sec_uid: str, fetcher: IncrementalFetcher) -> tuple:
+        """采集单个账号（按需读取该账号的增量状态），失败时抛出异常"""
+        db = self._get_db()
+        since = int((datetime.now() - timedelta(days=fetcher.window_days)).timestamp())
+        return self._crawl_account(
+            account_sec_uid,
+            fetcher,
+            db.get_account_states(account_sec_uid).get(account_sec_uid),
+            db.get_refresh_targets(since, account_sec_uid).get(account_sec_uid, [])
+        )
+    
+    def record_sweep_result(self, account_sec_uid: str, status: str, error: Optional[str] = None):
+        """记录单个账号的采集结果（success / failed）"""
+        self._get_db().save_sweep_results([(account_sec_uid, status, error)])
+    
+    def _crawl_account(self, account_sec_uid: str, fetcher: IncrementalFetcher,
+                       state: Optional[Dict], refresh_targets: List[str]) -> tuple:
+        """增量采集账号统计窗口内的视频并保存，失败时抛出异常"""
+        # 其他用户刚采集过同一账号时直接使用共享缓存
+        ttl = settings.get("sharedCacheTtl", SHARED_CACHE_DEFAULTS["TTL"])
+        if ttl > 0:
+            result = fetcher.fetch_shared(
+                account_sec_uid, state, refresh_targets, get_shared_cache(), ttl
+            )
+        else:
+            result = fetcher.fetch(account_sec_uid, state, refresh_targets)
+        
+        # 保存视频数据（新视频和刷新了统计数据的已知视频）
+        if result.videos:
+            try:
+                self._get_db().save_video_data(account_sec_uid, result.videos)
+            except Exception as e:
+                logger.warning(f"[{self.user_id}] 保存视频数据失败: {e}")
+                # 视频未保存时不推进增量状态，下一轮重新采集
+                return account_sec_uid, result, time.time()
+        
+        # 根据发布频率和点赞增速安排下次采集时间
+        lookback = MONITOR_DEFAULTS["CADENCE_LOOKBACK_DAYS"]
+        since = int((datetime.now() - timedelta(days=lookback)).timestamp())
+        activity = self._get_db().get_account_activity(since, account_sec_uid).get(account_sec_uid)
+        if activity and result.last_aweme_time:
+            # 数据库只保存统计窗口内的视频，最近发布时间以增量状态为准
+            activity['last_post_time'] = max(activity['last_post_time'] or 0, result.last_aweme_time)
+        elif result.last_aweme_time:
+            activity = {'post_count': 1, 'last_post_time': result.last_aweme_time}
+        next_poll_at = self.planner.next_poll_at(activity)
+        
+        self._get_db().save_account_state(
+            account_sec_uid,
+            result.last_aweme_id,
+            result.last_aweme_time,
+            has_new=bool(result.new_videos),
+            next_poll_at=next_poll_at
+        )
+        return account_sec_uid, result, next_poll_at
+    
     async def run_monitoring_task(self, cookie: str = ""):
         """运行监控任务"""
         self.is_running = True
@@ -159,10 +311,16 @@ class MonitoringScheduler:
                 return
             
             # 开始监控
+            await sse.send_monitor_status(self.user_id, "running")
             await self.monitor_following(self.user_config.sec_user_id, cookie)
             
         finally:
             self.is_running = False
+            await sse.send_monitor_status(
+                self.user_id,
+                "idle",
+                last_update=self.last_update_time.isoformat()
+            )
     
     def get_monitoring_state(self) -> Dict:
         """获取监控状态"""
@@ -170,19 +328,45 @@ class MonitoringScheduler:
             "is_running": self.is_running,
             "last_update": self.last_update_time.isoformat(),
             "following_count": self._get_db().get_following_count(),
+            "progress": self.progress,
+            "queue": crawl_pool.stats(self.user_id),
+            "next_poll_at": self.poll_queue.next_due_at(),
+            "jobs": (
+                get_job_queue().stats(self.user_id)
+                if settings.get("monitorMode", MONITOR_DEFAULTS["MODE"]) == MonitorMode.DISTRIBUTED
+                else None
+            ),
             "user_id": self.user_id
         }
     
     def stop(self):
         """停止监控"""
         self.is_running = False
-        # 关闭线程池
+        # 取消该用户排队中的采集任务（共享线程池本身不关闭）
         self.executor.shutdown(wait=False)
         logger.info(f"[{self.user_id}] 监控已停止")
     
     def get_monitoring_data(self, limit: int = 100) -> List[Dict]:
         """获取监控数据"""
         return self._get_db().get_monitoring_data(limit)
+    
+    def get_monitoring_page(self, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """分页获取监控数据，返回 (数据, 下一页游标)"""
+        return self._get_db().get_leaderboard_page(limit, cursor)
+    
+    def refresh_analytics(self) -> TrendAnalytics:
+        """读取新采样并更新趋势分析（分布式模式下由工作进程写入，查询时刷新）"""
+        self.analytics.refresh(self._get_db())
+        return self.analytics
+    
+    def run_rollup(self, **options) -> Dict[str, int]:
+        """对该用户的点赞历史执行一次降采样（使用调度器的数据库写线程），参数见 RollupEngine"""
+        return RollupEngine(self._get_db(), **options).run()
+    
+    def get_like_trend(self, video_id: str, hours: int = 24, resolution: str = "auto") -> List[Dict]:
+        """获取作品最近 hours 小时的点赞趋势（优先读取降采样汇总）"""
+        start = datetime.now() - timedelta(hours=hours)
+        return RollupEngine(self._get_db()).trend(video_id, start, resolution=resolution)
 
 
 # 全局监控任务管理器
@@ -0,0 +1,247 @@
+# -*- encoding: utf-8 -*-
+"""
+监控工作进程
+
+从共享任务队列（monitor_jobs.db）领取 (用户, 关注账号) 任务并采集，
+可以在同一台机器或共享数据目录的多台机器上启动多个进程分担监控负载。
+服务端把设置项 monitorMode 设为 distributed 后，每轮监控只负责同步关注列表并把到期账号加入队列。
+多台机器共享数据目录时不能使用 WAL，工作进程和 distributed 模式下的服务端都以回滚日志模式打开用户数据库。
+
+运行方式:
+    python -m backend.monitor.worker                     # 默认配置
+    python -m backend.monitor.worker -c 8 --shards 2 --shard 0
+    python -m backend.monitor.worker --once              # 处理完当前任务后退出
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import click
+from loguru import logger
+
+from ..constants import WORKER_DEFAULTS
+from ..settings import settings
+from ..storage.job_queue import JobQueue
+from .incremental import IncrementalFetcher
+from .scheduler import MonitoringScheduler
+
+
+class MonitorWorker:
+    """
+    监控工作进程
+
+    Args:
+        queue: 任务队列
+        worker_id: 工作进程ID，默认 主机名-进程号
+        concurrency: 同时采集的账号数
+        batch_size: 每次领取的任务数
+        lease_seconds: 租约时长（秒）
+        shard / shards: 静态分片
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        worker_id: Optional[str] = None,
+        concurrency: int = WORKER_DEFAULTS["CONCURRENCY"],
+        batch_size: int = WORKER_DEFAULTS["BATCH_SIZE"],
+        lease_seconds: float = WORKER_DEFAULTS["LEASE_SECONDS"],
+        poll_interval: float = WORKER_DEFAULTS["POLL_INTERVAL"],
+        retry_delay: float = WORKER_DEFAULTS["RETRY_DELAY"],
+        shard: Optional[int] = None,
+        shards: Optional[int] = None,
+    ) -> None:
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.shard = shard
+        self.shards = shards
+
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._schedulers: Dict[str, MonitoringScheduler] = {}
+        self._fetcher = IncrementalFetcher(settings.get("cookie", "").strip())
+        self._in_flight: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.processed = 0
+        self.failed = 0
+
+    def run(self, once: bool = False) -> None:
+        """
+        运行直到收到停止信号
+
+        Args:
+            once: 为 True 时队列中没有可领取的任务即退出
+        """
+        logger.info(
+            f"[Worker {self.worker_id}] 已启动，并发 {self.concurrency}，"
+            f"分片 {self.shard}/{self.shards or 1}，任务库 {self.queue.db_path}"
+        )
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+
+        try:
+            while not self._stop.is_set():
+                free = self.concurrency - len(self._in_flight)
+                if free <= 0:
+                    self._stop.wait(0.2)
+                    continue
+
+                jobs = self.queue.claim(
+                    self.worker_id,
+                    min(free, self.batch_size),
+                    self.lease_seconds,
+                    self.shard,
+                    self.shards,
+                )
+                if not jobs:
+                    if once and not self._in_flight:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                for job in jobs:
+                    # 在锁内登记并挂回调：任务很快结束时 _forget 要等登记完成后才执行
+                    with self._lock:
+                        future = self.executor.submit(self._process, job)
+                        self._in_flight[job["job_id"]] = future
+                    future.add_done_callback(
+                        lambda _, job_id=job["job_id"]: self._forget(job_id)
+                    )
+        finally:
+            self._stop.set()
+            # 等待处理中的任务结束（它们已持有租约，直接退出会等到租约过期才被接管）
+            self.executor.shutdown(wait=True)
+            logger.info(
+                f"[Worker {self.worker_id}] 已停止，完成 {self.processed} 个，失败 {self.failed} 个"
+            )
+
+    def stop(self) -> None:
+        """请求停止：不再领取新任务，处理中的任务完成后退出"""
+        self._stop.set()
+
+    def _process(self, job: Dict) -> None:
+        """采集单个账号并回写任务状态"""
+        user_id = job["user_id"]
+        account_id = job["account_id"]
+        scheduler = self._get_scheduler(user_id)
+        try:
+            scheduler.crawl_account(account_id, self._fetcher)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logger.error(
+                f"[Worker {self.worker_id}] [{user_id}] 采集账号 {job['account_name']} 失败: {e}"
+            )
+            scheduler.record_sweep_result(account_id, "failed", str(e))
+            self.queue.fail(
+                self.worker_id, job["job_id"], str(e), job["attempts"], self.retry_delay
+            )
+            return
+
+        with self._lock:
+            self.processed += 1
+        scheduler.record_sweep_result(account_id, "success")
+        if not self.queue.complete(self.worker_id, job["job_id"]):
+            logger.warning(
+                f"[Worker {self.worker_id}] 任务 {job['job_id']} 的租约已被其他进程接管"
+            )
+
+    def _get_scheduler(self, user_id: str) -> MonitoringScheduler:
+        """每个用户复用一个调度器（数据库连接）"""
+        with self._lock:
+            if user_id not in self._schedulers:
+                # 工作进程可能运行在共享数据目录的多台机器上，数据库不使用 WAL
+                self._schedulers[user_id] = MonitoringScheduler(user_id, shared_db=True)
+            return self._schedulers[user_id]
+
+    def _forget(self, job_id: int) -> None:
+        with self._lock:
+            self._in_flight.pop(job_id, None)
+
+    def _heartbeat_loop(self) -> None:
+        """定期为处理中的任务续租"""
+        interval = max(1.0, self.lease_seconds / 3)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                job_ids = list(self._in_flight)
+            # 停止后仍为未结束的任务续租，直到全部完成
+            if self._stop.is_set() and not job_ids:
+                return
+            try:
+                self.queue.heartbeat(self.worker_id, job_ids, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"[Worker {self.worker_id}] 续租失败: {e}")
+
+
+@click.command()
+@click.option("--db", "db_path", default=None, help="任务库路径，默认用户数据根目录下的 monitor_jobs.db")
+@click.option("--worker-id", default=None, help="工作进程ID，默认 主机名-进程号")
+@click.option(
+    "-c",
+    "--concurrency",
+    type=int,
+    default=WORKER_DEFAULTS["CONCURRENCY"],
+    help=f"同时采集的账号数，默认 {WORKER_DEFAULTS['CONCURRENCY']}",
+)
+@click.option(
+    "--batch-size",
+    type=int,
+    default=WORKER_DEFAULTS["BATCH_SIZE"],
+    help=f"每次领取的任务数，默认 {WORKER_DEFAULTS['BATCH_SIZE']}",
+)
+@click.option(
+    "--lease",
+    type=float,
+    default=WORKER_DEFAULTS["LEASE_SECONDS"],
+    help=f"任务租约时长（秒），默认 {WORKER_DEFAULTS['LEASE_SECONDS']}",
+)
+@click.option("--shard", type=int, default=None, help="静态分片序号（从 0 开始）")
+@click.option("--shards", type=int, default=None, help="静态分片总数")
+@click.option("--once", is_flag=True, help="处理完当前可领取的任务后退出")
+def main(
+    db_path: Optional[str],
+    worker_id: Optional[str],
+    concurrency: int,
+    batch_size: int,
+    lease: float,
+    shard: Optional[int],
+    shards: Optional[int],
+    once: bool,
+):
+    """抖音监控工作进程"""
+    if shards and (shard is None or not 0 <= shard < shards):
+        raise click.BadParameter("--shard 必须在 [0, --shards) 范围内")
+
+    worker = MonitorWorker(
+        JobQueue(db_path),
+        worker_id=worker_id,
+        concurrency=concurrency,
+        batch_size=batch_size,
+        lease_seconds=lease,
+        shard=shard,
+        shards=shards,
+    )
+
+    def handle_signal(signum, frame):
+        logger.info(f"[Worker {worker.worker_id}] 收到停止信号，等待处理中的任务完成...")
+        worker.stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    worker.run(once=once)
+
+
+if __name__ == "__main__":
+    main()
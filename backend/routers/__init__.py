@@ -5,6 +5,7 @@
 """
 
 from .aria2 import router as aria2_router
+from .download import router as download_router
 from .file import router as file_router
 from .monitor import router as monitor_router
 from .settings import router as settings_router
@@ -15,6 +16,7 @@ __all__ = [
     "task_router",
     "settings_router",
     "aria2_router",
+    "download_router",
     "file_router",
     "system_router",
     "monitor_router",
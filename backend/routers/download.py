@@ -0,0 +1,169 @@
+"""
+下载管理路由
+
+把采集结果交给后端下载服务，查询下载进度、调整优先级和取消下载。
+进度同时通过 SSE 的 download_progress 事件推送。
+"""
+
+import asyncio
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from ..downloader.index import get_download_index
+from ..downloader.items import DownloadEntry, build_entries
+from ..downloader.service import download_service
+from ..state import state
+
+router = APIRouter(prefix="/api/download", tags=["下载管理"])
+
+
+# ============================================================================
+# 请求/响应模型
+# ============================================================================
+
+
+class EnqueueTaskRequest(BaseModel):
+    """下载采集任务结果的请求模型"""
+
+    priority: int = 0
+
+
+class DownloadEntryModel(BaseModel):
+    """单个下载项"""
+
+    url: str
+    dir: str
+    out: str
+
+
+class EnqueueItemsRequest(BaseModel):
+    """直接加入下载项的请求模型"""
+
+    items: List[DownloadEntryModel] = Field(..., min_length=1)
+    priority: int = 0
+
+
+class PriorityRequest(BaseModel):
+    """调整优先级的请求模型"""
+
+    priority: int
+
+
+class LookupRequest(BaseModel):
+    """批量查询下载情况的请求模型"""
+
+    aweme_ids: List[str] = Field(..., min_length=1, max_length=10000)
+
+
+class EnqueueResponse(BaseModel):
+    """加入队列响应"""
+
+    count: int
+    ids: List[str]
+    skipped: int = 0
+
+
+# ============================================================================
+# 路由定义
+# ============================================================================
+
+
+@router.post("/tasks/{task_id}", response_model=EnqueueResponse)
+async def enqueue_task(task_id: str, request: EnqueueTaskRequest) -> Dict[str, Any]:
+    """
+    下载已完成采集任务的全部作品
+
+    - task_id: 采集任务ID
+    - priority: 优先级，越大越先下载
+
+    已下载过的文件（见下载索引）不会重复加入，数量在 skipped 中返回
+    """
+
+    task_info = state.task_status.get(task_id)
+    if task_info is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {task_id}")
+    if task_info["status"] != "completed" or "down_path" not in task_info:
+        raise HTTPException(status_code=400, detail=f"任务 {task_id} 尚未完成")
+
+    entries = build_entries(
+        state.task_results.get(task_id, []),
+        task_info.get("detected_type") or task_info["type"],
+        task_info["down_path"],
+    )
+    missing = await asyncio.to_thread(get_download_index().missing, entries)
+    items = download_service.enqueue(missing, request.priority, task_id)
+    return {
+        "count": len(items),
+        "ids": [item.id for item in items],
+        "skipped": len(entries) - len(missing),
+    }
+
+
+@router.post("/items", response_model=EnqueueResponse)
+def enqueue_items(request: EnqueueItemsRequest) -> Dict[str, Any]:
+    """直接加入下载项"""
+
+    items = download_service.enqueue(
+        [DownloadEntry(entry.url, entry.dir, entry.out) for entry in request.items],
+        request.priority,
+    )
+    return {"count": len(items), "ids": [item.id for item in items]}
+
+
+@router.get("/status")
+def get_download_status() -> Dict[str, Any]:
+    """整体下载进度：各状态数量、总速度（字节/秒）和预计剩余时间（秒）"""
+
+    return download_service.stats()
+
+
+@router.post("/lookup")
+def lookup_downloads(request: LookupRequest) -> Dict[str, Dict[str, Any]]:
+    """
+    按作品ID批量查询下载情况（只查下载索引，不检查磁盘）
+
+    返回 作品ID -> {downloaded, files, errors}：
+    - files: 下载完成的文件（path, variant, size, duration, completed_at）
+    - errors: 重试后仍失败的下载（path, variant, error, attempts, failed_at）
+
+    没有任何下载记录的作品不出现在结果中
+    """
+
+    return get_download_index().lookup(request.aweme_ids)
+
+
+@router.get("/items")
+def get_download_items(
+    status: Optional[Literal["queued", "active", "complete", "error", "cancelled"]] = None,
+    task_id: Optional[str] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """
+    列出下载项
+
+    - status: 只返回该状态的下载项
+    - task_id: 只返回该采集任务的下载项
+    - limit: 最多返回数量
+    """
+
+    return download_service.get_items(status, task_id, limit)
+
+
+@router.post("/items/{item_id}/priority")
+def set_download_priority(item_id: str, request: PriorityRequest) -> Dict[str, str]:
+    """调整排队中下载项的优先级"""
+
+    if not download_service.set_priority(item_id, request.priority):
+        raise HTTPException(status_code=404, detail=f"下载项不存在或不在排队中: {item_id}")
+    return {"status": "success"}
+
+
+@router.delete("/items/{item_id}")
+async def cancel_download(item_id: str) -> Dict[str, str]:
+    """取消下载项"""
+
+    if not await download_service.cancel(item_id):
+        raise HTTPException(status_code=404, detail=f"下载项不存在或已结束: {item_id}")
+    return {"status": "success"}
@@ -17,6 +17,7 @@ from loguru import logger
 from pydantic import BaseModel
 
 from ..constants import DOWNLOAD_DIR
+from ..downloader.index import get_download_index
 from ..settings import settings
 
 router = APIRouter(prefix="/api/file", tags=["文件操作"])
@@ -197,6 +198,11 @@ def find_local_file(work_id: str) -> Dict[str, Any]:
     try:
         download_dir = os.path.abspath(settings.get("downloadPath", DOWNLOAD_DIR))
 
+        # 优先查下载索引，只有没有记录时才按文件名搜索
+        indexed = _find_indexed(work_id, download_dir)
+        if indexed:
+            return indexed
+
         # 查找视频文件
         # 1. 直接在下载目录: {work_id}_*.mp4
         # 2. 在子目录中: aweme_{work_id}/{work_id}_*.mp4 或 {work_id}_*/{work_id}_*.mp4
@@ -283,3 +289,34 @@ def serve_media(file_path: str):
     except Exception as e:
         logger.error(f"提供媒体文件失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================================
+# 内部函数
+# ============================================================================
+
+
+def _find_indexed(work_id: str, download_dir: str) -> Optional[Dict[str, Any]]:
+    """从下载索引查找作品文件（只返回下载目录内仍存在的文件）"""
+    record = get_download_index().lookup([work_id]).get(work_id)
+    if not record:
+        return None
+    paths = [
+        file["path"]
+        for file in record["files"]
+        if file["path"].startswith(download_dir + os.sep) and os.path.exists(file["path"])
+    ]
+    videos = [path for path in paths if path.endswith(".mp4")]
+    if videos:
+        return {
+            "found": True,
+            "video_path": os.path.relpath(videos[0], download_dir),
+            "images": None,
+        }
+    if paths:
+        return {
+            "found": True,
+            "video_path": None,
+            "images": sorted(os.path.relpath(path, download_dir) for path in paths),
+        }
+    return None
@@ -5,12 +5,15 @@
 提供监控相关的API接口，支持状态查询、任务控制和数据获取。
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from typing import Dict, List, Any
 import asyncio
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel
+from typing import Dict, List, Any, Literal, Optional
+
 from ..models import UserConfig
 from ..auth.license_manager import LicenseManager
+from ..monitor.periodic import periodic_scheduler
 from ..monitor.scheduler import monitoring_manager
 from ..settings import settings
 
@@ -43,12 +46,14 @@ async def get_monitor_status(user: UserConfig = Depends(get_current_user)):
     """获取监控状态"""
     scheduler = monitoring_manager.get_scheduler(user.user_id)
     state = scheduler.get_monitoring_state()
+    schedule = periodic_scheduler.get_status(user.user_id)
     
     return {
         "sec_user_id": user.sec_user_id,
         "monitoring": state["is_running"],
         "last_update": state["last_update"],
         "accounts_count": state["following_count"],
+        "next_run_at": schedule[0]["next_run_at"] if schedule else None,
         "user_id": user.user_id
     }
 
@@ -73,10 +78,9 @@ async def start_monitoring(
     if not cookie:
         cookie = settings.get("cookie", "").strip()
     
-    # 启动后台任务
-    asyncio.create_task(
-        monitoring_manager.get_scheduler(user.user_id).run_monitoring_task(cookie)
-    )
+    # 启动后台任务（与周期计划共用，同一用户不会并发运行）
+    if not periodic_scheduler.trigger(user.user_id, cookie):
+        raise HTTPException(status_code=409, detail="监控任务正在运行")
     
     return {
         "message": "监控任务已启动",
@@ -87,8 +91,9 @@ async def start_monitoring(
 
 @router.post("/stop")
 async def stop_monitoring(user: UserConfig = Depends(get_current_user)):
-    """停止监控任务"""
+    """停止监控任务，同时停用周期计划（否则下一个计划时间又会启动）"""
     monitoring_manager.stop_task(user.user_id)
+    periodic_scheduler.disable(user.user_id)
     return {
         "message": "监控任务已停止",
         "user_id": user.user_id
@@ -97,20 +102,145 @@ async def stop_monitoring(user: UserConfig = Depends(get_current_user)):
 
 @router.get("/data")
 async def get_monitoring_data(
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     user: UserConfig = Depends(get_current_user)
 ):
-    """获取监控数据"""
+    """获取监控数据，按小时点赞增量排序，使用返回的 next_cursor 获取下一页"""
     scheduler = monitoring_manager.get_scheduler(user.user_id)
-    data = scheduler.get_monitoring_data(limit)
+    try:
+        data, next_cursor = await asyncio.to_thread(scheduler.get_monitoring_page, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "data": data,
         "total": len(data),
+        "next_cursor": next_cursor,
+        "user_id": user.user_id
+    }
+
+
+@router.get("/videos/{video_id}/trend")
+async def get_video_trend(
+    video_id: str,
+    hours: int = Query(24, ge=1, le=24 * 365),
+    resolution: Literal["auto", "hour", "day"] = "auto",
+    user: UserConfig = Depends(get_current_user)
+):
+    """获取作品点赞趋势，跨度超过 7 天时默认按天汇总"""
+    scheduler = monitoring_manager.get_scheduler(user.user_id)
+    points = await asyncio.to_thread(scheduler.get_like_trend, video_id, hours, resolution)
+    
+    return {
+        "video_id": video_id,
+        "points": points,
+        "user_id": user.user_id
+    }
+
+
+@router.get("/analytics/videos")
+async def get_video_analytics(
+    limit: int = Query(100, ge=1, le=1000),
+    sort: Literal["velocity", "acceleration", "zscore"] = "velocity",
+    breakout_only: bool = False,
+    user: UserConfig = Depends(get_current_user)
+):
+    """获取作品的点赞/评论/分享增速、加速度和爆款标记"""
+    scheduler = monitoring_manager.get_scheduler(user.user_id)
+    # 读取采样和重新计算较耗时，放到线程中执行，不阻塞事件循环
+    analytics = await asyncio.to_thread(scheduler.refresh_analytics)
+    videos = analytics.get_videos(limit, sort, breakout_only)
+    
+    return {
+        "data": videos,
+        "total": len(videos),
+        "windows": analytics.labels,
+        "updated_at": analytics.updated_at.isoformat() if analytics.updated_at else None,
+        "user_id": user.user_id
+    }
+
+
+@router.get("/analytics/videos/{video_id}")
+async def get_single_video_analytics(
+    video_id: str,
+    user: UserConfig = Depends(get_current_user)
+):
+    """获取单个作品的趋势指标"""
+    scheduler = monitoring_manager.get_scheduler(user.user_id)
+    video = (await asyncio.to_thread(scheduler.refresh_analytics)).videos.get(video_id)
+    if video is None:
+        raise HTTPException(status_code=404, detail="最近没有该作品的采样数据")
+    return video
+
+
+@router.get("/analytics/accounts")
+async def get_account_analytics(user: UserConfig = Depends(get_current_user)):
+    """获取各账号的点赞增速基线和爆款数量"""
+    scheduler = monitoring_manager.get_scheduler(user.user_id)
+    accounts = (await asyncio.to_thread(scheduler.refresh_analytics)).get_accounts()
+    
+    return {
+        "data": accounts,
+        "total": len(accounts),
+        "user_id": user.user_id
+    }
+
+
+class ScheduleRequest(BaseModel):
+    """周期监控计划"""
+    enabled: bool = True
+    interval: Optional[int] = None  # 运行间隔（秒）
+    cron: Optional[str] = None  # 5 段 cron 表达式，与 interval 二选一
+    jitter: Optional[float] = None  # 随机抖动上限（秒）
+    misfire: Optional[str] = None  # 错过运行的处理策略: run_once / skip
+
+
+@router.get("/schedule")
+async def get_schedule(user: UserConfig = Depends(get_current_user)):
+    """获取当前用户的周期监控计划"""
+    status = periodic_scheduler.get_status(user.user_id)
+    return {
+        "schedule": user.schedule,
+        "status": status[0] if status else None,
+        "user_id": user.user_id
+    }
+
+
+@router.put("/schedule")
+async def set_schedule(
+    request_data: ScheduleRequest,
+    user: UserConfig = Depends(get_current_user)
+):
+    """设置当前用户的周期监控计划，enabled 为 false 时停用"""
+    if request_data.enabled and not user.sec_user_id:
+        raise HTTPException(status_code=400, detail="请先设置抖音sec_user_id")
+    
+    try:
+        schedule = periodic_scheduler.set_schedule(
+            user.user_id, request_data.model_dump(exclude_none=True)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    status = periodic_scheduler.get_status(user.user_id)
+    return {
+        "schedule": schedule,
+        "status": status[0] if status else None,
         "user_id": user.user_id
     }
 
 
+@router.get("/schedule/status")
+async def get_schedule_status(user: UserConfig = Depends(get_current_user)):
+    """获取当前用户的周期监控计划状态，按下次运行时间排序"""
+    jobs = periodic_scheduler.get_status(user.user_id)
+    return {
+        "jobs": jobs,
+        "total": len(jobs)
+    }
+
+
 @router.post("/set-sec-user-id")
 async def set_sec_user_id(
     request_data: dict,
@@ -5,13 +5,20 @@
 提供应用设置的查询和保存接口。
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Literal, Optional
 
 from fastapi import APIRouter, HTTPException
 from loguru import logger
 from pydantic import BaseModel, Field
 
-from ..constants import ARIA2_DEFAULTS, DEFAULT_SETTINGS, DOWNLOAD_DEFAULTS
+from ..constants import (
+    ARIA2_DEFAULTS,
+    DEFAULT_SETTINGS,
+    DOWNLOAD_DEFAULTS,
+    MONITOR_DEFAULTS,
+    ROLLUP_DEFAULTS,
+    SHARED_CACHE_DEFAULTS,
+)
 from ..settings import settings
 
 router = APIRouter(prefix="/api/settings", tags=["设置管理"])
@@ -30,12 +37,25 @@ class SettingsUpdate(BaseModel):
     downloadPath: Optional[str] = None
     maxRetries: Optional[int] = Field(None, ge=0, le=10)
     maxConcurrency: Optional[int] = Field(None, ge=1, le=10)
+    downloadPerHostConcurrency: Optional[int] = Field(None, ge=1, le=16)
+    downloadEngine: Optional[Literal["aria2", "http"]] = None
+    downloadSegments: Optional[int] = Field(None, ge=1, le=16)
+    downloadSpeedLimit: Optional[int] = Field(None, ge=0, le=1048576)
     windowWidth: Optional[int] = Field(None, ge=800, le=3840)
     windowHeight: Optional[int] = Field(None, ge=600, le=2160)
     enableIncrementalFetch: Optional[bool] = None
     aria2Host: Optional[str] = None
     aria2Port: Optional[int] = Field(None, ge=1, le=65535)
     aria2Secret: Optional[str] = None
+    monitorConcurrency: Optional[int] = Field(None, ge=1, le=32)
+    monitorWorkers: Optional[int] = Field(None, ge=1, le=64)
+    monitorAccountTimeout: Optional[int] = Field(None, ge=10, le=600)
+    monitorSweepBudget: Optional[int] = Field(None, ge=60, le=86400)
+    monitorMode: Optional[Literal["local", "distributed"]] = None
+    rollupRawRetentionHours: Optional[int] = Field(None, ge=2, le=720)
+    rollupHourlyRetentionDays: Optional[int] = Field(None, ge=1, le=365)
+    rollupDailyRetentionDays: Optional[int] = Field(None, ge=0, le=3650)
+    sharedCacheTtl: Optional[int] = Field(None, ge=0, le=3600)
 
 
 class SettingsResponse(BaseModel):
@@ -46,12 +66,25 @@ class SettingsResponse(BaseModel):
     downloadPath: str = ""
     maxRetries: int = DOWNLOAD_DEFAULTS["MAX_RETRIES"]
     maxConcurrency: int = DOWNLOAD_DEFAULTS["MAX_CONCURRENCY"]
+    downloadPerHostConcurrency: int = DOWNLOAD_DEFAULTS["PER_HOST_CONCURRENCY"]
+    downloadEngine: str = DOWNLOAD_DEFAULTS["ENGINE"]
+    downloadSegments: int = DOWNLOAD_DEFAULTS["SEGMENTS"]
+    downloadSpeedLimit: int = DOWNLOAD_DEFAULTS["SPEED_LIMIT"]
     windowWidth: int = DEFAULT_SETTINGS["windowWidth"]
     windowHeight: int = DEFAULT_SETTINGS["windowHeight"]
     enableIncrementalFetch: bool = True
     aria2Host: str = ARIA2_DEFAULTS["HOST"]
     aria2Port: int = ARIA2_DEFAULTS["PORT"]
     aria2Secret: str = ""
+    monitorConcurrency: int = MONITOR_DEFAULTS["CONCURRENCY"]
+    monitorWorkers: int = MONITOR_DEFAULTS["WORKERS"]
+    monitorAccountTimeout: int = MONITOR_DEFAULTS["ACCOUNT_TIMEOUT"]
+    monitorSweepBudget: int = MONITOR_DEFAULTS["SWEEP_BUDGET"]
+    monitorMode: str = MONITOR_DEFAULTS["MODE"]
+    rollupRawRetentionHours: int = ROLLUP_DEFAULTS["RAW_RETENTION_HOURS"]
+    rollupHourlyRetentionDays: int = ROLLUP_DEFAULTS["HOURLY_RETENTION_DAYS"]
+    rollupDailyRetentionDays: int = ROLLUP_DEFAULTS["DAILY_RETENTION_DAYS"]
+    sharedCacheTtl: int = SHARED_CACHE_DEFAULTS["TTL"]
 
 
 class FirstRunResponse(BaseModel):
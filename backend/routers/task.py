@@ -15,6 +15,7 @@ from loguru import logger
 from pydantic import BaseModel
 
 from ..constants import DOWNLOAD_DIR
+from ..downloader.index import get_download_index
 from ..lib.cookies import CookieManager
 from ..settings import settings
 from ..sse import SSEEventType, sse
@@ -149,17 +150,26 @@ def get_task_status(task_id: Optional[str] = None) -> List[Dict[str, Any]]:
 
 
 @router.get("/results/{task_id}")
-def get_task_results(task_id: str) -> List[Dict[str, Any]]:
+def get_task_results(task_id: str, with_download: bool = True) -> List[Dict[str, Any]]:
     """
     获取任务的采集结果
 
     - task_id: 任务ID
+    - with_download: 是否附带每个作品的下载情况（download 字段，见 /api/download/lookup）
     """
 
     if task_id not in state.task_results:
         raise HTTPException(status_code=404, detail=f"任务不存在: {task_id}")
 
-    return state.task_results[task_id]
+    results = state.task_results[task_id]
+    if not with_download:
+        return results
+
+    downloads = get_download_index().lookup(item["id"] for item in results if "id" in item)
+    return [
+        {**item, "download": downloads.get(item["id"])} if "id" in item else item
+        for item in results
+    ]
 
 
 # ============================================================================
@@ -245,9 +255,11 @@ def _execute_task(
         # 获取后端实际识别的类型
         detected_type = douyin.type
 
-        # 保存 aria2_conf 路径
+        # 保存 aria2_conf 路径，以及后端下载服务生成下载项所需的目录和类型
         state.aria2_config_paths[task_id] = douyin.aria2_conf
         state.task_status[task_id]["aria2_conf"] = douyin.aria2_conf
+        state.task_status[task_id]["down_path"] = douyin.down_path
+        state.task_status[task_id]["detected_type"] = detected_type
 
         # 检查是否有未回调的结果
         has_new_results = (
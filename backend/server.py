@@ -1,7 +1,7 @@
 """
 FastAPI Server - 后端 HTTP API 服务
 
-提供 RESTful API 接口和 SSE 实时通信。
+提供 RESTful API 接口和 SSE / WebSocket 实时通信。
 支持 GUI 模式（PyWebView）和本地 Web 模式（浏览器）。
 
 运行方式:
@@ -18,11 +18,11 @@ FastAPI Server - 后端 HTTP API 服务
 
 import os
 from contextlib import asynccontextmanager
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import click
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
@@ -32,14 +32,19 @@ from pydantic import BaseModel
 from .constants import RESOURCE_ROOT, SERVER_DEFAULTS
 from .routers import (
     aria2_router,
+    download_router,
     file_router,
     monitor_router,
     settings_router,
     system_router,
     task_router,
 )
+from .downloader.service import download_service
+from .monitor.periodic import periodic_scheduler
+from .storage.rollup import rollup_service
 from .sse import sse
 from .state import state
+from .ws import ws_channel
 
 # ============================================================================
 # 响应模型
@@ -78,8 +83,16 @@ async def lifespan(app: FastAPI):
     # state 在模块导入时已初始化
     logger.info("✓ 应用状态已初始化")
 
+    await periodic_scheduler.start()
+    await rollup_service.start()
+    await download_service.start()
+
     yield
 
+    await download_service.stop()
+    await rollup_service.stop()
+    await periodic_scheduler.stop()
+
     logger.info("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
     logger.info("🧹 正在清理资源...")
     state.cleanup()
@@ -109,6 +122,7 @@ app.add_middleware(
 app.include_router(task_router)
 app.include_router(settings_router)
 app.include_router(aria2_router)
+app.include_router(download_router)
 app.include_router(file_router)
 app.include_router(system_router)
 app.include_router(monitor_router)
@@ -136,10 +150,32 @@ def health_check() -> Dict[str, Any]:
 
 
 @app.get("/api/events")
-async def events_stream():
-    """SSE 端点，向前端推送实时事件"""
+async def events_stream(request: Request):
+    """
+    SSE 端点，向前端推送实时事件
+
+    断线重连时浏览器会自动携带 Last-Event-ID 请求头，服务端据此补发错过的事件；
+    无法设置请求头的客户端可使用 last_event_id 查询参数。
+
+    订阅过滤（均可重复或用逗号分隔，不传表示全部）:
+    - types: 事件类型，如 task_result,task_status
+    - task_id: 任务 ID
+    - user_id: 监控用户 ID
+
+    compress=gzip 时，较大的事件数据以 {"encoding": "gzip+base64", "payload": ...} 发送。
+    """
+    params = request.query_params
+    last_event_id = request.headers.get("last-event-id") or params.get(
+        "last_event_id"
+    )
     return StreamingResponse(
-        sse.connect(),
+        sse.connect(
+            last_event_id,
+            event_types=_split_query_values(params.getlist("types")),
+            task_ids=_split_query_values(params.getlist("task_id")),
+            user_ids=_split_query_values(params.getlist("user_id")),
+            compress=params.get("compress") == "gzip",
+        ),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -149,6 +185,19 @@ async def events_stream():
     )
 
 
+@app.websocket("/api/ws")
+async def events_websocket(websocket: WebSocket):
+    """WebSocket 端点，推送与 SSE 相同的事件（msgpack 二进制帧，支持订阅与确认）"""
+    await ws_channel.handle(websocket)
+
+
+def _split_query_values(values: List[str]) -> List[str]:
+    """展开重复或逗号分隔的查询参数"""
+    return [
+        item.strip() for value in values for item in value.split(",") if item.strip()
+    ]
+
+
 # ============================================================================
 # 静态文件挂载
 # ============================================================================
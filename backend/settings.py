@@ -40,12 +40,64 @@ class SettingsManager:
             lambda x: isinstance(x, int) and 1 <= x <= 10,
             "必须是1-10的整数",
         ),
+        "downloadPerHostConcurrency": (
+            lambda x: isinstance(x, int) and 1 <= x <= 16,
+            "必须是1-16的整数",
+        ),
+        "downloadEngine": (
+            lambda x: x in ("aria2", "http"),
+            "必须是 aria2 或 http",
+        ),
+        "downloadSegments": (
+            lambda x: isinstance(x, int) and 1 <= x <= 16,
+            "必须是1-16的整数",
+        ),
+        "downloadSpeedLimit": (
+            lambda x: isinstance(x, int) and 0 <= x <= 1048576,
+            "必须是0-1048576的整数",
+        ),
         "aria2Host": (lambda x: isinstance(x, str) and len(x) > 0, "必须是非空字符串"),
         "aria2Port": (
             lambda x: isinstance(x, int) and 1 <= x <= 65535,
             "必须是1-65535的整数",
         ),
         "aria2Secret": (lambda x: isinstance(x, str), "必须是字符串"),
+        "monitorConcurrency": (
+            lambda x: isinstance(x, int) and 1 <= x <= 32,
+            "必须是1-32的整数",
+        ),
+        "monitorWorkers": (
+            lambda x: isinstance(x, int) and 1 <= x <= 64,
+            "必须是1-64的整数",
+        ),
+        "monitorMode": (
+            lambda x: x in ("local", "distributed"),
+            "必须是 local 或 distributed",
+        ),
+        "monitorAccountTimeout": (
+            lambda x: isinstance(x, int) and 10 <= x <= 600,
+            "必须是10-600的整数",
+        ),
+        "monitorSweepBudget": (
+            lambda x: isinstance(x, int) and 60 <= x <= 86400,
+            "必须是60-86400的整数",
+        ),
+        "rollupRawRetentionHours": (
+            lambda x: isinstance(x, int) and 2 <= x <= 720,
+            "必须是2-720的整数",
+        ),
+        "rollupHourlyRetentionDays": (
+            lambda x: isinstance(x, int) and 1 <= x <= 365,
+            "必须是1-365的整数",
+        ),
+        "rollupDailyRetentionDays": (
+            lambda x: isinstance(x, int) and 0 <= x <= 3650,
+            "必须是0-3650的整数",
+        ),
+        "sharedCacheTtl": (
+            lambda x: isinstance(x, int) and 0 <= x <= 3600,
+            "必须是0-3600的整数",
+        ),
     }
 
     def __init__(self, auto_load: bool = True) -> None:
@@ -6,14 +6,44 @@ SSE 事件管理模块
 - 任务状态变化（task_status）
 - 任务错误（task_error）
 - 日志消息（log）
+- 监控任务状态（monitor_status）
+
+每个事件都带有单调递增的 `id:` 字段，并保存在有界的重放缓冲区中。
+客户端断线重连时（浏览器会自动携带 Last-Event-ID 请求头），
+服务端会补发断线期间错过的事件，无需重新拉取全部结果。
+
+客户端可以按任务 ID、事件类型、监控用户订阅，管理器通过订阅索引
+只把事件投递给关心它的连接，而不是遍历全部客户端。
+
+同一任务在合并窗口内的多次采集结果（task_result）会被合并为一个事件发送，
+减少事件数量、JSON 编码开销和前端重复渲染；开启压缩的客户端会收到
+gzip+base64 编码的大事件数据。
 """
 
 import asyncio
+import base64
+import gzip
 import json
-from typing import Any, AsyncGenerator, Dict, List, Optional
+import threading
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from loguru import logger
 
+from .constants import SSE_DEFAULTS
+
 
 # SSE 事件类型常量
 class SSEEventType:
@@ -23,79 +53,314 @@ class SSEEventType:
     TASK_STATUS = "task_status"  # 任务状态变化
     TASK_ERROR = "task_error"  # 任务错误
     LOG = "log"  # 日志消息
+    MONITOR_STATUS = "monitor_status"  # 监控任务状态变化
+    DOWNLOAD_PROGRESS = "download_progress"  # 后端下载进度
     PING = "ping"  # 心跳
+    RESYNC = "resync"  # 重放缓冲区无法覆盖断线期间的事件，需要全量刷新
+
+
+class SSEEvent:
+    """
+    已发布的事件
+
+    事件数据只在首次需要时序列化一次，所有订阅者与重放共享同一份编码结果。
+    """
+
+    __slots__ = (
+        "id",
+        "event_type",
+        "data",
+        "task_id",
+        "user_id",
+        "created_at",
+        "_json",
+        "_text",
+        "_compressed_text",
+        "_encoded",
+    )
+
+    def __init__(self, event_id: int, event_type: str, data: Dict[str, Any]) -> None:
+        self.id = event_id
+        self.event_type = event_type
+        self.data = data
+        self.task_id: Optional[str] = data.get("task_id")
+        self.user_id: Optional[str] = data.get("user_id")
+        self.created_at = time.monotonic()
+        self._json: Optional[str] = None
+        self._text: Optional[str] = None
+        self._compressed_text: Optional[str] = None
+        self._encoded: Dict[str, Any] = {}
+
+    @property
+    def json_data(self) -> str:
+        """JSON 编码后的事件数据"""
+        if self._json is None:
+            self._json = json.dumps(self.data, ensure_ascii=False)
+        return self._json
+
+    @property
+    def sse_text(self) -> str:
+        """SSE 格式的消息文本"""
+        if self._text is None:
+            self._text = self._format(self.json_data)
+        return self._text
+
+    @property
+    def compressed_text(self) -> str:
+        """
+        压缩后的 SSE 消息文本
+
+        数据较小时压缩收益不大，直接返回原始消息。
+        """
+        if self._compressed_text is None:
+            raw = self.json_data
+            if len(raw) < SSE_DEFAULTS["COMPRESS_MIN_BYTES"]:
+                self._compressed_text = self.sse_text
+            else:
+                payload = base64.b64encode(gzip.compress(raw.encode("utf-8")))
+                body = json.dumps(
+                    {"encoding": "gzip+base64", "payload": payload.decode("ascii")}
+                )
+                self._compressed_text = self._format(body)
+        return self._compressed_text
+
+    def encoded(self, codec: str, encoder: Callable[["SSEEvent"], Any]) -> Any:
+        """按编码方式缓存事件的其他编码结果（如 WebSocket 帧）"""
+        if codec not in self._encoded:
+            self._encoded[codec] = encoder(self)
+        return self._encoded[codec]
+
+    def _format(self, body: str) -> str:
+        """拼接 SSE 消息"""
+        return f"id: {self.id}\nevent: {self.event_type}\ndata: {body}\n\n"
+
+
+class SSESubscription:
+    """
+    单个客户端的订阅
+
+    过滤条件为空表示不过滤该维度；事件本身不携带某个维度（例如日志没有 task_id）时，
+    该维度同样不参与过滤。
+    """
+
+    def __init__(
+        self,
+        event_types: Optional[Iterable[str]] = None,
+        task_ids: Optional[Iterable[str]] = None,
+        user_ids: Optional[Iterable[str]] = None,
+        compress: bool = False,
+    ) -> None:
+        self.event_types: Set[str] = set(event_types or [])
+        self.task_ids: Set[str] = set(task_ids or [])
+        self.user_ids: Set[str] = set(user_ids or [])
+        self.compress = compress
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+
+    def matches(self, event: SSEEvent) -> bool:
+        """判断事件是否符合订阅条件（用于重放缓冲区过滤）"""
+        if self.event_types and event.event_type not in self.event_types:
+            return False
+        if self.task_ids and event.task_id is not None:
+            if event.task_id not in self.task_ids:
+                return False
+        if self.user_ids and event.user_id is not None:
+            if event.user_id not in self.user_ids:
+                return False
+        return True
+
+    def deliver(self, event: SSEEvent) -> None:
+        """投递事件，可在任意线程调用"""
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.loop:
+            self.queue.put_nowait(event)
+        elif not self.loop.is_closed():
+            # 后台线程不能直接操作 asyncio.Queue，交给事件循环执行
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    def render(self, event: SSEEvent) -> str:
+        """按客户端的压缩偏好输出消息文本"""
+        return event.compressed_text if self.compress else event.sse_text
 
 
 class SSEManager:
     """
     SSE 事件管理器
 
-    管理所有 SSE 客户端连接，并广播事件到所有客户端。
+    管理所有 SSE 客户端连接，并按订阅索引投递事件。
+    最近的事件保存在重放缓冲区中（按数量和时间双重限制），
+    用于断线重连后按 Last-Event-ID 补发。
     """
 
-    def __init__(self) -> None:
-        """初始化 SSE 管理器"""
-        self._clients: List[asyncio.Queue] = []
-        self._lock = asyncio.Lock()
+    # 订阅索引中表示“不过滤”的键
+    _WILDCARD = "*"
+
+    def __init__(
+        self,
+        buffer_size: int = SSE_DEFAULTS["REPLAY_BUFFER_SIZE"],
+        buffer_ttl: float = SSE_DEFAULTS["REPLAY_TTL"],
+        batch_window: float = SSE_DEFAULTS["RESULT_BATCH_WINDOW"],
+        batch_max_items: int = SSE_DEFAULTS["RESULT_BATCH_MAX_ITEMS"],
+    ) -> None:
+        """
+        初始化 SSE 管理器
 
-    async def connect(self) -> AsyncGenerator[str, None]:
+        Args:
+            buffer_size: 重放缓冲区最多保留的事件数
+            buffer_ttl: 重放缓冲区事件保留时长（秒）
+            batch_window: 采集结果合并窗口（秒），0 表示不合并
+            batch_max_items: 合并窗口内累计达到该条数时立即发送
+        """
+        self._clients: List[SSESubscription] = []
+
+        # 订阅索引：维度 -> 过滤值 -> 订阅集合
+        self._index: Dict[str, Dict[str, Set[SSESubscription]]] = {
+            "type": {},
+            "task": {},
+            "user": {},
+        }
+
+        # 客户端列表、订阅索引、事件 ID 与重放缓冲区，
+        # broadcast_sync 会在后台线程调用，因此使用线程锁
+        self._history_lock = threading.Lock()
+        self._last_event_id = 0
+        self._history: Deque[SSEEvent] = deque(maxlen=buffer_size)
+        self._buffer_ttl = buffer_ttl
+
+        # 采集结果合并：task_id -> 待发送的合并结果
+        # 合并结果的取出与发布在同一把锁内完成，保证同一任务的事件顺序不变
+        self._batch_window = batch_window
+        self._batch_max_items = batch_max_items
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_cond = threading.Condition()
+        self._flusher: Optional[threading.Thread] = None
+
+    async def connect(
+        self,
+        last_event_id: Optional[str] = None,
+        event_types: Optional[Iterable[str]] = None,
+        task_ids: Optional[Iterable[str]] = None,
+        user_ids: Optional[Iterable[str]] = None,
+        compress: bool = False,
+    ) -> AsyncGenerator[str, None]:
         """
         创建新的 SSE 连接
 
+        Args:
+            last_event_id: 客户端最后收到的事件 ID（Last-Event-ID），用于断线补发
+            event_types: 只接收这些类型的事件（为空表示全部）
+            task_ids: 只接收这些任务的事件（为空表示全部）
+            user_ids: 只接收这些监控用户的事件（为空表示全部）
+            compress: 是否接收压缩后的大事件数据
+
         Yields:
             SSE 格式的消息字符串
         """
-        queue: asyncio.Queue = asyncio.Queue()
-
-        async with self._lock:
-            self._clients.append(queue)
-            client_count = len(self._clients)
-
-        logger.info(f"[SSE] 新客户端连接，当前连接数: {client_count}")
+        subscription = SSESubscription(event_types, task_ids, user_ids, compress)
+        replay, gap = self.subscribe(subscription, last_event_id)
 
         try:
             # 发送初始 ping
             yield ": ping\n\n"
 
+            if gap:
+                yield self._format_sse_message(
+                    SSEEventType.RESYNC,
+                    {
+                        "last_event_id": last_event_id,
+                        "current_event_id": self._last_event_id,
+                    },
+                )
+            for event in replay:
+                yield subscription.render(event)
+
             while True:
                 try:
                     # 等待消息，超时后发送心跳
-                    message = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    yield message
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        timeout=SSE_DEFAULTS["HEARTBEAT_INTERVAL"],
+                    )
+                    yield subscription.render(event)
                 except asyncio.TimeoutError:
                     # 发送心跳保持连接
                     yield ": heartbeat\n\n"
         finally:
             # 客户端断开时清理
-            async with self._lock:
-                if queue in self._clients:
-                    self._clients.remove(queue)
-                    client_count = len(self._clients)
-            logger.info(f"[SSE] 客户端断开，剩余连接数: {client_count}")
+            self.unsubscribe(subscription)
 
-    async def broadcast(self, event_type: str, data: Dict[str, Any]) -> None:
+    def subscribe(
+        self, subscription: SSESubscription, last_event_id: Optional[str] = None
+    ) -> Tuple[List[SSEEvent], bool]:
         """
-        广播事件到所有连接的客户端
+        注册订阅（SSE 与 WebSocket 通道共用）
+
+        注册订阅与读取补发事件在同一把锁内完成，保证事件既不丢失也不重复。
 
         Args:
-            event_type: 事件类型（task_result、task_status、task_error、log）
-            data: 事件数据
+            subscription: 订阅
+            last_event_id: 客户端最后收到的事件 ID，用于断线补发
+
+        Returns:
+            (符合订阅条件的补发事件, 是否存在无法补发的缺口)
         """
-        if not self._clients:
-            return
+        with self._history_lock:
+            self._add_subscription(subscription)
+            client_count = len(self._clients)
+            replay, gap = self._events_since(self._parse_event_id(last_event_id))
 
-        # 构建 SSE 消息格式
-        message = self._format_sse_message(event_type, data)
+        logger.info(f"[SSE] 新客户端连接，当前连接数: {client_count}")
+        if gap:
+            logger.info(f"[SSE] Last-Event-ID={last_event_id} 已超出重放缓冲区")
+
+        replay = [event for event in replay if subscription.matches(event)]
+        if replay:
+            logger.info(f"[SSE] 补发 {len(replay)} 条断线期间的事件")
+        return replay, gap
+
+    def unsubscribe(self, subscription: SSESubscription) -> None:
+        """注销订阅"""
+        with self._history_lock:
+            self._remove_subscription(subscription)
+            client_count = len(self._clients)
+        logger.info(f"[SSE] 客户端断开，剩余连接数: {client_count}")
+
+    def update_subscription(
+        self,
+        subscription: SSESubscription,
+        event_types: Optional[Iterable[str]] = None,
+        task_ids: Optional[Iterable[str]] = None,
+        user_ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        修改已注册订阅的过滤条件并重建其索引
+
+        Args:
+            subscription: 已注册的订阅
+            event_types: 新的事件类型过滤（为空表示全部）
+            task_ids: 新的任务 ID 过滤（为空表示全部）
+            user_ids: 新的监控用户过滤（为空表示全部）
+        """
+        with self._history_lock:
+            self._remove_subscription(subscription)
+            subscription.event_types = set(event_types or [])
+            subscription.task_ids = set(task_ids or [])
+            subscription.user_ids = set(user_ids or [])
+            self._add_subscription(subscription)
 
-        async with self._lock:
-            clients_copy = self._clients.copy()
+    async def broadcast(self, event_type: str, data: Dict[str, Any]) -> None:
+        """
+        广播事件到订阅了该事件的客户端
 
-        # 广播到所有客户端
-        for queue in clients_copy:
-            try:
-                await queue.put(message)
-            except Exception as e:
-                logger.warning(f"[SSE] 发送消息失败: {e}")
+        Args:
+            event_type: 事件类型（task_result、task_status、task_error、log）
+            data: 事件数据
+        """
+        self._emit(event_type, data)
 
     def broadcast_sync(self, event_type: str, data: Dict[str, Any]) -> None:
         """
@@ -105,37 +370,221 @@ class SSEManager:
             event_type: 事件类型
             data: 事件数据
         """
-        if not self._clients:
-            return
+        sent_count = self._emit(event_type, data)
+        if sent_count:
+            logger.debug(f"[SSE] broadcast_sync: 发送到 {sent_count} 个客户端")
 
-        message = self._format_sse_message(event_type, data)
-        client_count = len(self._clients)
+    def flush_results(self, task_id: Optional[str] = None) -> None:
+        """
+        立即发送合并窗口中尚未发送的采集结果
+
+        Args:
+            task_id: 只发送该任务的结果，为空时发送全部
+        """
+        with self._pending_cond:
+            task_ids = [task_id] if task_id else list(self._pending)
+            for pending_task_id in task_ids:
+                pending = self._pending.pop(pending_task_id, None)
+                if pending:
+                    self._emit_batch(pending)
+
+    def _emit(self, event_type: str, data: Dict[str, Any]) -> int:
+        """发布事件，采集结果进入合并窗口，返回立即投递的数量"""
+        task_id = data.get("task_id")
+        batching = self._batch_window > 0
+        if task_id and batching and event_type == SSEEventType.TASK_RESULT:
+            self._coalesce(task_id, data)
+            return 0
+
+        if task_id:
+            # 任务的其他事件（完成、出错）必须排在已采集结果之后
+            with self._pending_cond:
+                pending = self._pending.pop(task_id, None)
+                if pending:
+                    self._emit_batch(pending)
+                return self._dispatch(*self._publish(event_type, data))
+
+        return self._dispatch(*self._publish(event_type, data))
+
+    def _coalesce(self, task_id: str, data: Dict[str, Any]) -> None:
+        """把采集结果合并到任务的待发送批次中"""
+        with self._pending_cond:
+            pending = self._pending.get(task_id)
+            if pending is None:
+                pending = {
+                    "data": {**data, "data": list(data.get("data") or [])},
+                    "deadline": time.monotonic() + self._batch_window,
+                    "merged": 1,
+                }
+                self._pending[task_id] = pending
+                self._ensure_flusher()
+                self._pending_cond.notify()
+            else:
+                batch = pending["data"]
+                batch["data"].extend(data.get("data") or [])
+                # 其余字段（如累计总数 total）以最新的为准
+                batch.update({k: v for k, v in data.items() if k != "data"})
+                pending["merged"] += 1
+
+            if len(pending["data"]["data"]) >= self._batch_max_items:
+                self._emit_batch(self._pending.pop(task_id))
+
+    def _emit_batch(self, pending: Dict[str, Any]) -> None:
+        """发布一个合并后的采集结果事件（调用方需持有 _pending_cond）"""
+        data = pending["data"]
+        data["batched"] = pending["merged"]
+        self._dispatch(*self._publish(SSEEventType.TASK_RESULT, data))
+
+    def _ensure_flusher(self) -> None:
+        """启动合并窗口的后台发送线程（调用方需持有 _pending_cond）"""
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="sse-result-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        """到期发送合并窗口中的采集结果"""
+        with self._pending_cond:
+            while True:
+                if not self._pending:
+                    self._pending_cond.wait()
+                    continue
+
+                now = time.monotonic()
+                next_deadline = None
+                for task_id, pending in list(self._pending.items()):
+                    if pending["deadline"] <= now:
+                        self._emit_batch(self._pending.pop(task_id))
+                    elif next_deadline is None or pending["deadline"] < next_deadline:
+                        next_deadline = pending["deadline"]
+
+                if next_deadline is not None:
+                    self._pending_cond.wait(timeout=next_deadline - now)
+
+    def _publish(
+        self, event_type: str, data: Dict[str, Any]
+    ) -> Tuple[SSEEvent, Set[SSESubscription]]:
+        """
+        分配事件 ID、写入重放缓冲区，并通过订阅索引找出接收者
 
-        # 直接放入队列（后台线程没有事件循环）
+        即使当前没有客户端也会写入缓冲区，以便断线中的客户端重连后补发。
+        """
+        with self._history_lock:
+            self._last_event_id += 1
+            event = SSEEvent(self._last_event_id, event_type, data)
+            self._history.append(event)
+            self._prune_history(event.created_at)
+            return event, self._route(event)
+
+    def _dispatch(self, event: SSEEvent, recipients: Set[SSESubscription]) -> int:
+        """投递事件到接收者，返回成功投递的数量"""
         sent_count = 0
-        for queue in self._clients:
+        for subscription in recipients:
             try:
-                queue.put_nowait(message)
+                subscription.deliver(event)
                 sent_count += 1
             except Exception as e:
-                logger.warning(f"[SSE] 放入队列失败: {e}")
+                logger.warning(f"[SSE] 发送消息失败: {e}")
+        return sent_count
+
+    def _route(self, event: SSEEvent) -> Set[SSESubscription]:
+        """根据订阅索引计算事件的接收者（调用方需持有 _history_lock）"""
+        if not self._clients:
+            return set()
+
+        recipients = self._lookup("type", event.event_type)
+        if event.task_id is not None and recipients:
+            recipients &= self._lookup("task", event.task_id)
+        if event.user_id is not None and recipients:
+            recipients &= self._lookup("user", event.user_id)
+        return recipients
+
+    def _lookup(self, dimension: str, value: str) -> Set[SSESubscription]:
+        """查找某个维度上精确匹配或不过滤的订阅"""
+        index = self._index[dimension]
+        return index.get(value, set()) | index.get(self._WILDCARD, set())
+
+    def _add_subscription(self, subscription: SSESubscription) -> None:
+        """注册订阅并写入索引（调用方需持有 _history_lock）"""
+        self._clients.append(subscription)
+        for dimension, values in self._subscription_keys(subscription):
+            for value in values:
+                self._index[dimension].setdefault(value, set()).add(subscription)
+
+    def _remove_subscription(self, subscription: SSESubscription) -> None:
+        """注销订阅并清理索引（调用方需持有 _history_lock）"""
+        if subscription not in self._clients:
+            return
+        self._clients.remove(subscription)
+        for dimension, values in self._subscription_keys(subscription):
+            index = self._index[dimension]
+            for value in values:
+                bucket = index.get(value)
+                if bucket is not None:
+                    bucket.discard(subscription)
+                    if not bucket:
+                        del index[value]
+
+    def _subscription_keys(
+        self, subscription: SSESubscription
+    ) -> List[Tuple[str, Set[str]]]:
+        """订阅在各维度上的索引键，未设置过滤条件的维度使用通配键"""
+        return [
+            ("type", subscription.event_types or {self._WILDCARD}),
+            ("task", subscription.task_ids or {self._WILDCARD}),
+            ("user", subscription.user_ids or {self._WILDCARD}),
+        ]
+
+    def _prune_history(self, now: float) -> None:
+        """移除超过保留时长的事件（调用方需持有 _history_lock）"""
+        expire_before = now - self._buffer_ttl
+        while self._history and self._history[0].created_at < expire_before:
+            self._history.popleft()
+
+    def _events_since(
+        self, last_event_id: Optional[int]
+    ) -> Tuple[List[SSEEvent], bool]:
+        """
+        获取指定事件 ID 之后的缓冲事件（调用方需持有 _history_lock）
 
-        logger.debug(f"[SSE] broadcast_sync: 发送到 {sent_count}/{client_count} 个客户端")
+        Args:
+            last_event_id: 客户端最后收到的事件 ID，None 表示新连接
+
+        Returns:
+            (待补发的事件列表, 是否存在无法补发的缺口)
+        """
+        if last_event_id is None:
+            return [], False
 
-    async def _broadcast_message(self, message: str) -> None:
-        """内部方法：广播消息"""
-        async with self._lock:
-            clients_copy = self._clients.copy()
+        # 客户端的 ID 比服务端还新，说明服务端已重启，ID 重新计数
+        if last_event_id > self._last_event_id:
+            return [], True
 
-        for queue in clients_copy:
-            try:
-                await queue.put(message)
-            except Exception:
-                pass
+        self._prune_history(time.monotonic())
+
+        if not self._history:
+            return [], last_event_id < self._last_event_id
+
+        oldest_id = self._history[0].id
+        gap = last_event_id + 1 < oldest_id
+        replay = [event for event in self._history if event.id > last_event_id]
+        return replay, gap
+
+    @staticmethod
+    def _parse_event_id(value: Optional[str]) -> Optional[int]:
+        """解析 Last-Event-ID，无效值视为新连接"""
+        if value is None or value == "":
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            logger.debug(f"[SSE] 忽略无效的 Last-Event-ID: {value}")
+            return None
 
     def _format_sse_message(self, event_type: str, data: Dict[str, Any]) -> str:
         """
-        格式化 SSE 消息
+        格式化不带 ID 的 SSE 消息（不影响客户端的 Last-Event-ID）
 
         Args:
             event_type: 事件类型
@@ -152,6 +601,11 @@ class SSEManager:
         """获取当前连接的客户端数量"""
         return len(self._clients)
 
+    @property
+    def last_event_id(self) -> int:
+        """获取最新的事件 ID"""
+        return self._last_event_id
+
     # 便捷方法
     async def send_task_result(
         self, task_id: str, data: List[Dict[str, Any]], total: int
@@ -204,6 +658,19 @@ class SSEManager:
             },
         )
 
+    async def send_monitor_status(
+        self, user_id: str, status: str, **extra: Any
+    ) -> None:
+        """发送监控任务状态事件"""
+        await self.broadcast(
+            SSEEventType.MONITOR_STATUS,
+            {
+                "user_id": user_id,
+                "status": status,
+                **extra,
+            },
+        )
+
 
 # 全局 SSE 管理器实例
 sse = SSEManager()
@@ -0,0 +1,219 @@
+# -*- encoding: utf-8 -*-
+"""
+SQLite 连接管理
+
+用户数据库的读写分离：
+- ReadPool: 只读连接池，WAL 模式下读操作不会被写事务阻塞
+- WriterThread: 单写线程，所有写操作通过队列交给它执行。
+  队列中积压的多个写任务合并到一个事务中提交，每个任务使用独立的 SAVEPOINT，
+  单个任务失败只回滚它自己的修改
+"""
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from ..constants import DATABASE_DEFAULTS
+
+WriteJob = Tuple[Callable[[sqlite3.Cursor], Any], Optional[Callable[[Any], None]], Future]
+
+
+def connect(db_path: str, read_only: bool = False) -> sqlite3.Connection:
+    """打开连接，读连接设置为只读"""
+    conn = sqlite3.connect(
+        db_path, timeout=DATABASE_DEFAULTS["BUSY_TIMEOUT"], check_same_thread=False
+    )
+    if read_only:
+        conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+class ReadPool:
+    """
+    只读连接池（按需创建，最多 size 个）
+
+    Args:
+        db_path: 数据库路径
+        size: 最大连接数
+    """
+
+    def __init__(self, db_path: str, size: int = DATABASE_DEFAULTS["READ_POOL_SIZE"]) -> None:
+        self.db_path = db_path
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """借出一个读连接，用完归还"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            # 结束可能残留的读事务，避免长期占用 WAL 快照
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    def close(self) -> None:
+        """关闭空闲连接，借出中的连接归还时关闭"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return connect(self.db_path, read_only=True)
+        return self._idle.get()
+
+
+class WriterThread:
+    """
+    单写线程
+
+    Args:
+        conn: 写连接（只在写线程中使用）
+        name: 线程名
+        max_batch: 合并到一个事务中的最大任务数
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        name: str = "db-writer",
+        max_batch: int = DATABASE_DEFAULTS["WRITE_BATCH"],
+    ) -> None:
+        self.conn = conn
+        self.name = name
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[WriteJob]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        fn: Callable[[sqlite3.Cursor], Any],
+        on_commit: Optional[Callable[[Any], None]] = None,
+    ) -> Future:
+        """
+        提交写任务
+
+        Args:
+            fn: 在写事务中执行，参数为游标，返回值作为结果
+            on_commit: 事务提交后在写线程中按提交顺序调用，参数为 fn 的返回值
+
+        Returns:
+            Future: 事务提交后完成
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._queue.put((fn, on_commit, future))
+        return future
+
+    def execute(
+        self,
+        fn: Callable[[sqlite3.Cursor], Any],
+        on_commit: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """提交写任务并等待提交完成，返回 fn 的结果"""
+        if threading.current_thread() is self._thread:
+            # 写任务中再次写入：直接在当前事务中执行，避免等待自己
+            result = fn(self.conn.cursor())
+            if on_commit:
+                on_commit(result)
+            return result
+        return self.submit(fn, on_commit).result()
+
+    def stop(self) -> None:
+        """处理完队列中的任务后停止"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(None)
+        if thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            jobs = [job]
+            stop = False
+            while len(jobs) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                jobs.append(job)
+            self._run_batch(jobs)
+            if stop:
+                return
+
+    def _run_batch(self, jobs: List[WriteJob]) -> None:
+        """在一个事务中执行一批写任务"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+        except Exception as e:
+            for _, _, future in jobs:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+
+        committed = []
+        for fn, on_commit, future in jobs:
+            if not future.set_running_or_notify_cancel():
+                continue
+            cursor.execute("SAVEPOINT write_job")
+            try:
+                result = fn(cursor)
+            except Exception as e:
+                cursor.execute("ROLLBACK TO write_job")
+                cursor.execute("RELEASE write_job")
+                future.set_exception(e)
+                continue
+            cursor.execute("RELEASE write_job")
+            committed.append((on_commit, future, result))
+
+        try:
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            for _, future, _ in committed:
+                future.set_exception(e)
+            return
+
+        for on_commit, future, result in committed:
+            if on_commit:
+                try:
+                    on_commit(result)
+                except Exception as e:
+                    logger.warning(f"[{self.name}] 提交回调失败: {e}")
+            future.set_result(result)
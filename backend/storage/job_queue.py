@@ -0,0 +1,300 @@
+# -*- encoding: utf-8 -*-
+"""
+监控任务队列
+
+多个监控工作进程共享的 SQLite 任务表，每个任务对应一个 (用户, 关注账号)：
+- 工作进程批量领取任务并获得租约，处理期间定期续租
+- 工作进程崩溃后租约过期，任务自动回到可领取状态
+- 失败的任务按退避时间重试，超过最大次数后标记为失败
+- 可选的静态分片：shard_key % shards == shard 的任务只由对应分片的进程处理
+
+数据库文件默认位于用户数据根目录（monitor_jobs.db），多台机器共享同一目录时
+请勿开启 WAL（网络文件系统不支持共享内存），这里保持 SQLite 默认的回滚日志模式。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..models import UserConfig
+
+
+class JobStatus:
+    """任务状态"""
+
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+
+# 分片键取值范围，按 shard_key % shards 划分分片
+SHARD_SPACE = 1024
+
+
+def shard_key(user_id: str, account_id: str) -> int:
+    """计算任务的分片键（稳定哈希，不受进程随机种子影响）"""
+    return zlib.crc32(f"{user_id}:{account_id}".encode("utf-8")) % SHARD_SPACE
+
+
+class JobQueue:
+    """
+    SQLite 任务队列
+
+    Args:
+        db_path: 数据库路径，为空时使用用户数据根目录下的 monitor_jobs.db
+        max_attempts: 单个任务的最大尝试次数
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_attempts: int = 3) -> None:
+        self.db_path = os.path.abspath(
+            db_path or os.path.join(UserConfig.get_user_data_dir(), "monitor_jobs.db")
+        )
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # 自动提交模式，写事务显式使用 BEGIN IMMEDIATE 避免多进程死锁
+        self.conn = sqlite3.connect(
+            self.db_path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._init_table()
+
+    def _init_table(self) -> None:
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS monitor_jobs (
+                    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    account_id TEXT NOT NULL,
+                    account_name TEXT,
+                    shard_key INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires_at REAL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    UNIQUE (user_id, account_id)
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_monitor_jobs_claim "
+                "ON monitor_jobs (status, available_at)"
+            )
+
+    def enqueue(self, user_id: str, accounts: Iterable[Tuple[str, str]]) -> int:
+        """
+        加入待处理任务，已在队列中（待处理或处理中）的账号不会重复加入
+
+        Args:
+            user_id: 用户ID
+            accounts: (account_id, account_name)
+
+        Returns:
+            int: 新加入（或重新激活）的任务数
+        """
+        now = time.time()
+        rows = [
+            (user_id, account_id, name, shard_key(user_id, account_id), now, now, now)
+            for account_id, name in accounts
+        ]
+        if not rows:
+            return 0
+
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self.conn.total_changes
+                self.conn.executemany(
+                    f"""
+                    INSERT INTO monitor_jobs
+                    (user_id, account_id, account_name, shard_key, status,
+                     available_at, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, '{JobStatus.PENDING}', ?, ?, ?)
+                    ON CONFLICT(user_id, account_id) DO UPDATE SET
+                        account_name = excluded.account_name,
+                        status = '{JobStatus.PENDING}',
+                        attempts = 0,
+                        available_at = excluded.available_at,
+                        last_error = NULL,
+                        updated_at = excluded.updated_at
+                    WHERE monitor_jobs.status IN ('{JobStatus.DONE}', '{JobStatus.FAILED}')
+                    """,
+                    rows,
+                )
+                added = self.conn.total_changes - before
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def claim(
+        self,
+        worker_id: str,
+        limit: int,
+        lease_seconds: float,
+        shard: Optional[int] = None,
+        shards: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        领取一批任务：待处理且已到可执行时间的任务，以及租约已过期的任务
+
+        Args:
+            worker_id: 工作进程ID
+            limit: 最多领取数量
+            lease_seconds: 租约时长（秒）
+            shard / shards: 静态分片，只领取 shard_key % shards == shard 的任务
+
+        Returns:
+            list: 领取到的任务
+        """
+        now = time.time()
+        shard_sql = ""
+        params: List[Any] = [now, now]
+        if shards and shards > 1:
+            shard_sql = "AND shard_key % ? = ?"
+            params += [shards, shard or 0]
+
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    f"""
+                    UPDATE monitor_jobs SET
+                        status = '{JobStatus.LEASED}',
+                        lease_owner = ?,
+                        lease_expires_at = ?,
+                        attempts = attempts + 1,
+                        updated_at = ?
+                    WHERE job_id IN (
+                        SELECT job_id FROM monitor_jobs
+                        WHERE (
+                            (status = '{JobStatus.PENDING}' AND available_at <= ?)
+                            OR (status = '{JobStatus.LEASED}' AND lease_expires_at < ?)
+                        )
+                        {shard_sql}
+                        ORDER BY available_at
+                        LIMIT ?
+                    )
+                    RETURNING job_id, user_id, account_id, account_name, attempts
+                    """,
+                    [worker_id, now + lease_seconds, now] + params + [limit],
+                ).fetchall()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        return [
+            {
+                "job_id": row[0],
+                "user_id": row[1],
+                "account_id": row[2],
+                "account_name": row[3],
+                "attempts": row[4],
+            }
+            for row in rows
+        ]
+
+    def heartbeat(
+        self, worker_id: str, job_ids: Iterable[int], lease_seconds: float
+    ) -> None:
+        """为仍在处理的任务续租"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        expires = time.time() + lease_seconds
+        with self._lock:
+            self.conn.executemany(
+                f"""
+                UPDATE monitor_jobs SET lease_expires_at = ?
+                WHERE job_id = ? AND lease_owner = ? AND status = '{JobStatus.LEASED}'
+                """,
+                [(expires, job_id, worker_id) for job_id in job_ids],
+            )
+
+    def complete(self, worker_id: str, job_id: int) -> bool:
+        """标记任务完成，租约已被其他进程接管时返回 False"""
+        return self._finish(
+            worker_id,
+            job_id,
+            f"status = '{JobStatus.DONE}', lease_owner = NULL, last_error = NULL",
+            [],
+        )
+
+    def fail(
+        self, worker_id: str, job_id: int, error: str, attempts: int, retry_delay: float
+    ) -> bool:
+        """任务失败：未超过最大次数时延迟重试，否则标记为失败"""
+        if attempts >= self.max_attempts:
+            return self._finish(
+                worker_id,
+                job_id,
+                f"status = '{JobStatus.FAILED}', lease_owner = NULL, last_error = ?",
+                [error],
+            )
+        return self._finish(
+            worker_id,
+            job_id,
+            f"status = '{JobStatus.PENDING}', lease_owner = NULL, last_error = ?, "
+            "available_at = ?",
+            [error, time.time() + retry_delay],
+        )
+
+    def stats(self, user_id: Optional[str] = None) -> Dict[str, int]:
+        """按状态统计任务数量"""
+        sql = "SELECT status, COUNT(*) FROM monitor_jobs"
+        params: List[Any] = []
+        if user_id is not None:
+            sql += " WHERE user_id = ?"
+            params.append(user_id)
+        sql += " GROUP BY status"
+        with self._lock:
+            counts = dict(self.conn.execute(sql, params).fetchall())
+        return {
+            status: counts.get(status, 0)
+            for status in (
+                JobStatus.PENDING,
+                JobStatus.LEASED,
+                JobStatus.DONE,
+                JobStatus.FAILED,
+            )
+        }
+
+    def _finish(
+        self, worker_id: str, job_id: int, assignments: str, params: List[Any]
+    ) -> bool:
+        with self._lock:
+            cursor = self.conn.execute(
+                f"""
+                UPDATE monitor_jobs SET {assignments}, updated_at = ?
+                WHERE job_id = ? AND lease_owner = ? AND status = '{JobStatus.LEASED}'
+                """,
+                params + [time.time(), job_id, worker_id],
+            )
+        return cursor.rowcount > 0
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self.conn.close()
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """获取进程内共享的任务队列（首次调用时打开数据库）"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
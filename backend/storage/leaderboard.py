@@ -0,0 +1,120 @@
+# -*- encoding: utf-8 -*-
+"""
+监控排行榜
+
+监控页面每隔几秒轮询一次 /api/monitor/data，每次都联表排序并逐行构造字典代价较高。
+这里在内存中维护按 (小时点赞增量, 总点赞数) 降序排列的排行榜：
+- 首次查询时从数据库构建，之后每批视频写入后只更新这一批的位置
+- 数据库被修改后（通过只读连接的 PRAGMA data_version 发现），整体重建
+- 分页使用游标（上一页最后一项的排序键），翻页期间数据变化也不会重复或遗漏
+"""
+
+import base64
+import bisect
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SortKey = Tuple[int, int, str]
+
+
+def sort_key(item: Dict[str, Any]) -> SortKey:
+    """排序键：小时点赞增量降序，总点赞数降序，视频ID升序"""
+    return (-(item["hourly_likes"] or 0), -(item["total_likes"] or 0), item["video_id"])
+
+
+def encode_cursor(key: SortKey) -> str:
+    """把排序键编码为游标"""
+    raw = json.dumps([-key[0], -key[1], key[2]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """解析游标，格式错误时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        hourly, likes, video_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (-int(hourly), -int(likes), str(video_id))
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+class Leaderboard:
+    """内存排行榜"""
+
+    def __init__(self) -> None:
+        self._keys: List[SortKey] = []
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # 构建时的 (读连接标识, data_version)，None 表示尚未构建或需要重建。
+        # data_version 只在同一连接上可比较，所以同时记录连接
+        self.version: Optional[Tuple[int, int]] = None
+        # 每次增量更新或失效加一，用于发现与重建并发的更新
+        self.generation = 0
+
+    def rebuild(
+        self,
+        items: Iterable[Dict[str, Any]],
+        version: Tuple[int, int],
+        generation: Optional[int] = None,
+    ) -> None:
+        """
+        用完整数据重建排行榜
+
+        Args:
+            items: 全部数据
+            version: 数据对应的 (读连接标识, data_version)
+            generation: 开始读取数据前的 generation。读取期间有增量更新时，
+                这些更新可能不在 items 中，重建后仍标记为需要重建
+        """
+        items = {item["video_id"]: item for item in items}
+        keys = sorted(sort_key(item) for item in items.values())
+        with self._lock:
+            self._items = items
+            self._keys = keys
+            stale = generation is not None and generation != self.generation
+            self.version = None if stale else version
+
+    def upsert(self, items: Iterable[Dict[str, Any]]) -> None:
+        """更新一批视频的位置（尚未构建时忽略，查询时会整体构建）"""
+        with self._lock:
+            self.generation += 1
+            if self.version is None:
+                return
+            for item in items:
+                previous = self._items.get(item["video_id"])
+                if previous is not None:
+                    index = bisect.bisect_left(self._keys, sort_key(previous))
+                    del self._keys[index]
+                self._items[item["video_id"]] = item
+                bisect.insort(self._keys, sort_key(item))
+
+    def invalidate(self) -> None:
+        """标记需要重建（如账号昵称变化、取消关注）"""
+        with self._lock:
+            self.generation += 1
+            self.version = None
+
+    def page(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        获取一页数据
+
+        Args:
+            limit: 每页数量
+            cursor: 上一页返回的游标，为空时从第一名开始
+
+        Returns:
+            tuple: (数据, 下一页游标)，没有更多数据时游标为 None
+        """
+        with self._lock:
+            start = bisect.bisect_right(self._keys, decode_cursor(cursor)) if cursor else 0
+            keys = self._keys[start : start + limit]
+            items = [self._items[key[2]] for key in keys]
+            has_more = start + limit < len(self._keys)
+        next_cursor = encode_cursor(keys[-1]) if keys and has_more else None
+        return items, next_cursor
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,260 @@
+# -*- encoding: utf-8 -*-
+"""
+用户数据库（monitor_data.db）结构迁移
+
+数据库版本记录在 PRAGMA user_version 中，打开数据库时依次执行版本号更高的迁移：
+- 每个迁移在一个 BEGIN IMMEDIATE 事务中执行，并在同一事务中更新 user_version，
+  中途失败会整体回滚，下次打开时重试
+- WAL 模式下迁移期间其他连接仍可读取；加列只修改表定义，不重写数据
+- 多个进程同时打开数据库时，拿到写锁后重新读取版本，已执行的迁移不会重复执行
+- 迁移对旧版本数据库（user_version 为 0，表可能已部分存在）同样适用，
+  因此建表使用 IF NOT EXISTS，加列前先检查列是否存在
+
+新增结构变更时在 MIGRATIONS 末尾追加一项，不要修改已发布的迁移。
+"""
+
+import sqlite3
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+from loguru import logger
+
+
+class Migration(NamedTuple):
+    """单个迁移"""
+
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Cursor], None]
+
+
+def add_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str) -> bool:
+    """列不存在时添加，返回是否添加"""
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    if column in columns:
+        return False
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
+
+def _core_tables(cursor: sqlite3.Cursor) -> None:
+    # 关注账号表
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS following_accounts (
+            account_id TEXT PRIMARY KEY,
+            sec_uid TEXT NOT NULL,
+            nickname TEXT,
+            follower_count INTEGER,
+            last_updated TIMESTAMP,
+            is_monitoring BOOLEAN DEFAULT 1
+        )
+        """
+    )
+    # 视频数据表
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS videos (
+            video_id TEXT PRIMARY KEY,
+            account_id TEXT,
+            description TEXT,
+            create_time INTEGER,
+            like_count INTEGER,
+            collect_count INTEGER,
+            comment_count INTEGER,
+            share_count INTEGER,
+            cover_url TEXT,
+            video_url TEXT,
+            collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            hourly_likes INTEGER DEFAULT 0,  -- 近一小时点赞增量
+            FOREIGN KEY (account_id) REFERENCES following_accounts (account_id)
+        )
+        """
+    )
+    # 手工修复过的旧数据库可能缺少小时增量列
+    add_column(cursor, "videos", "hourly_likes", "INTEGER DEFAULT 0")
+    # 点赞历史表（用于计算小时增量）
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS like_history (
+            video_id TEXT,
+            like_count INTEGER,
+            recorded_at TIMESTAMP,
+            PRIMARY KEY (video_id, recorded_at)
+        )
+        """
+    )
+
+
+def _monitor_state_tables(cursor: sqlite3.Cursor) -> None:
+    # 监控进度表（记录每个账号最近一次采集结果，超时/跳过的账号下一轮优先处理）
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sweep_state (
+            account_id TEXT PRIMARY KEY,
+            last_status TEXT,
+            last_attempt_at TIMESTAMP,
+            last_success_at TIMESTAMP,
+            last_error TEXT
+        )
+        """
+    )
+    # 账号增量采集状态（最近见过的作品，用于只采集新作品）
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS account_state (
+            account_id TEXT PRIMARY KEY,
+            last_aweme_id TEXT,
+            last_aweme_time INTEGER,
+            last_checked_at TIMESTAMP,
+            last_new_at TIMESTAMP
+        )
+        """
+    )
+    add_column(cursor, "account_state", "next_poll_at", "REAL")
+    # 关注列表变化记录
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS following_changes (
+            account_id TEXT,
+            change TEXT,
+            changed_at TIMESTAMP
+        )
+        """
+    )
+    # 监控元数据（如关注列表上次全量刷新时间）
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS monitor_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """
+    )
+
+
+def _query_indexes(cursor: sqlite3.Cursor) -> None:
+    # 点赞历史按视频和时间查找（覆盖 like_count，无需回表），监控列表按小时增量排序，
+    # 按账号和发布时间筛选作品
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_like_history_video_time
+        ON like_history (video_id, recorded_at, like_count)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_videos_hourly_likes
+        ON videos (hourly_likes DESC, like_count DESC)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_videos_account_time
+        ON videos (account_id, create_time)
+        """
+    )
+
+
+def _rollup_tables(cursor: sqlite3.Cursor) -> None:
+    # 点赞历史小时/每日汇总（由 rollup 降采样生成，bucket 为本地时间）
+    for table in ("like_history_hourly", "like_history_daily"):
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                video_id TEXT,
+                bucket TEXT,
+                min_likes INTEGER,
+                max_likes INTEGER,
+                last_likes INTEGER,
+                last_at TIMESTAMP,
+                samples INTEGER,
+                PRIMARY KEY (video_id, bucket)
+            )
+            """
+        )
+    # 按时间降采样和清理原始记录
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_like_history_recorded_at
+        ON like_history (recorded_at)
+        """
+    )
+
+
+def _engagement_columns(cursor: sqlite3.Cursor) -> None:
+    # 点赞历史同时记录评论数、分享数（用于互动增速），旧记录为 NULL
+    add_column(cursor, "like_history", "comment_count", "INTEGER")
+    add_column(cursor, "like_history", "share_count", "INTEGER")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "关注账号、视频、点赞历史表", _core_tables),
+    Migration(2, "监控进度、增量采集状态、关注变化和元数据表", _monitor_state_tables),
+    Migration(3, "点赞历史和监控列表查询索引", _query_indexes),
+    Migration(4, "点赞历史小时/每日汇总表", _rollup_tables),
+    Migration(5, "点赞历史评论数、分享数列", _engagement_columns),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """数据库当前结构版本"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending(conn: sqlite3.Connection) -> List[Migration]:
+    """尚未执行的迁移"""
+    version = get_version(conn)
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def migrate(
+    conn: sqlite3.Connection,
+    target: Optional[int] = None,
+    migrations: Optional[List[Migration]] = None,
+) -> List[int]:
+    """
+    把数据库迁移到 target 版本（默认最新）
+
+    Args:
+        conn: 数据库连接（需要写权限）
+        target: 目标版本
+        migrations: 迁移列表，默认 MIGRATIONS
+
+    Returns:
+        list: 本次执行的迁移版本号
+    """
+    migrations = migrations if migrations is not None else MIGRATIONS
+    target = target if target is not None else migrations[-1].version
+    version = get_version(conn)
+    if version > migrations[-1].version:
+        logger.warning(f"数据库结构版本 {version} 高于当前程序支持的 {migrations[-1].version}")
+        return []
+
+    applied = []
+    for migration in migrations:
+        if migration.version <= version or migration.version > target:
+            continue
+        start = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 其他进程可能在等待写锁期间已完成迁移
+            version = get_version(conn)
+            if migration.version <= version:
+                conn.rollback()
+                continue
+            migration.apply(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = migration.version
+        applied.append(migration.version)
+        logger.info(
+            f"数据库迁移到版本 {migration.version}（{migration.description}），"
+            f"耗时 {time.perf_counter() - start:.2f} 秒"
+        )
+    return applied
@@ -0,0 +1,407 @@
+# -*- encoding: utf-8 -*-
+"""
+点赞历史降采样
+
+like_history 每轮监控为每个作品新增一条记录，长期运行后数据库会无限增长。
+这里把原始记录逐级汇总并按保留期清理：
+- 已结束的小时汇总到 like_history_hourly，原始记录超过保留期后删除
+- 已结束且完成小时汇总的日期汇总到 like_history_daily，小时汇总超过保留期后删除
+- 汇总进度（水位线）保存在 monitor_meta 中，每次运行只处理新数据，分批提交
+
+趋势图查询优先读取汇总表，尚未汇总的最近数据从原始记录补齐。
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from ..constants import ROLLUP_DEFAULTS
+from ..models import UserConfig
+from ..settings import settings
+from .user_db import UserDatabase
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 水位线（monitor_meta 键）：早于该时间的原始记录 / 小时汇总已完成上一级汇总
+HOURLY_WATERMARK_KEY = "rollup_hourly_until"
+DAILY_WATERMARK_KEY = "rollup_daily_until"
+
+# 汇总行合并规则：同一时间段多次汇总时取最小/最大值，最新点赞数以时间较晚的为准
+_MERGE_SQL = """
+    ON CONFLICT(video_id, bucket) DO UPDATE SET
+        min_likes = MIN(min_likes, excluded.min_likes),
+        max_likes = MAX(max_likes, excluded.max_likes),
+        last_likes = CASE WHEN excluded.last_at >= last_at
+                          THEN excluded.last_likes ELSE last_likes END,
+        last_at = MAX(last_at, excluded.last_at),
+        samples = samples + excluded.samples
+"""
+
+HOURLY_ROLLUP_SQL = (
+    """
+    INSERT INTO like_history_hourly
+    (video_id, bucket, min_likes, max_likes, last_likes, last_at, samples)
+    SELECT video_id, hour || ':00:00', MIN(like_count), MAX(like_count),
+           MAX(CASE WHEN rn = 1 THEN like_count END), MAX(recorded_at), COUNT(*)
+    FROM (
+        SELECT video_id, like_count, recorded_at, substr(recorded_at, 1, 13) AS hour,
+               ROW_NUMBER() OVER (
+                   PARTITION BY video_id, substr(recorded_at, 1, 13)
+                   ORDER BY recorded_at DESC
+               ) AS rn
+        FROM like_history
+        WHERE recorded_at >= ? AND recorded_at < ?
+    )
+    WHERE true
+    GROUP BY video_id, hour
+    """
+    + _MERGE_SQL
+)
+
+DAILY_ROLLUP_SQL = (
+    """
+    INSERT INTO like_history_daily
+    (video_id, bucket, min_likes, max_likes, last_likes, last_at, samples)
+    SELECT video_id, day, MIN(min_likes), MAX(max_likes),
+           MAX(CASE WHEN rn = 1 THEN last_likes END), MAX(last_at), SUM(samples)
+    FROM (
+        SELECT video_id, min_likes, max_likes, last_likes, last_at, samples,
+               substr(bucket, 1, 10) AS day,
+               ROW_NUMBER() OVER (
+                   PARTITION BY video_id, substr(bucket, 1, 10)
+                   ORDER BY last_at DESC
+               ) AS rn
+        FROM like_history_hourly
+        WHERE bucket >= ? AND bucket < ?
+    )
+    WHERE true
+    GROUP BY video_id, day
+    """
+    + _MERGE_SQL
+)
+
+
+def _format(dt: datetime) -> str:
+    return dt.strftime(TIME_FORMAT)
+
+
+def _floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_day(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class RollupEngine:
+    """
+    单个用户数据库的降采样
+
+    Args:
+        db: 用户数据库
+        raw_retention_hours: 原始记录保留时长（小时）
+        hourly_retention_days: 小时汇总保留天数
+        daily_retention_days: 每日汇总保留天数，0 表示永久保留
+    """
+
+    # 趋势图时间跨度超过该天数时按天汇总
+    TREND_HOURLY_MAX_DAYS = 7
+
+    def __init__(
+        self,
+        db: UserDatabase,
+        raw_retention_hours: int = ROLLUP_DEFAULTS["RAW_RETENTION_HOURS"],
+        hourly_retention_days: int = ROLLUP_DEFAULTS["HOURLY_RETENTION_DAYS"],
+        daily_retention_days: int = ROLLUP_DEFAULTS["DAILY_RETENTION_DAYS"],
+        chunk_hours: int = ROLLUP_DEFAULTS["CHUNK_HOURS"],
+        delete_batch: int = ROLLUP_DEFAULTS["DELETE_BATCH"],
+    ) -> None:
+        self.db = db
+        self.raw_retention = timedelta(hours=raw_retention_hours)
+        self.hourly_retention = timedelta(days=hourly_retention_days)
+        self.daily_retention = (
+            timedelta(days=daily_retention_days) if daily_retention_days else None
+        )
+        self.chunk = timedelta(hours=chunk_hours)
+        self.delete_batch = delete_batch
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        执行一次降采样和清理
+
+        Returns:
+            dict: 汇总写入行数和删除行数
+        """
+        if not self.db.conn:
+            return {}
+        now = now or datetime.now()
+        stats: Dict[str, int] = {}
+
+        # 原始记录 -> 小时汇总（只处理已结束的小时）
+        hourly_until, stats["hourly"] = self._rollup(
+            HOURLY_WATERMARK_KEY,
+            HOURLY_ROLLUP_SQL,
+            "SELECT MIN(recorded_at) FROM like_history",
+            _floor_hour(now),
+            _floor_hour,
+        )
+        # 小时汇总 -> 每日汇总（只处理已结束且小时汇总完整的日期）
+        daily_until, stats["daily"] = self._rollup(
+            DAILY_WATERMARK_KEY,
+            DAILY_ROLLUP_SQL,
+            "SELECT MIN(bucket) FROM like_history_hourly",
+            _floor_day(min(now, hourly_until)),
+            _floor_day,
+        )
+
+        # 清理：未汇总的数据不会被删除
+        stats["deleted_raw"] = self._delete_before(
+            "like_history", "recorded_at", min(hourly_until, now - self.raw_retention)
+        )
+        stats["deleted_hourly"] = self._delete_before(
+            "like_history_hourly",
+            "bucket",
+            min(daily_until, _floor_day(now - self.hourly_retention)),
+        )
+        stats["deleted_daily"] = 0
+        if self.daily_retention:
+            stats["deleted_daily"] = self._delete_before(
+                "like_history_daily",
+                "bucket",
+                _floor_day(now - self.daily_retention),
+                date_only=True,
+            )
+        return stats
+
+    def trend(
+        self,
+        video_id: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        resolution: str = "auto",
+    ) -> List[Dict[str, Any]]:
+        """
+        作品点赞趋势
+
+        Args:
+            video_id: 作品ID
+            start: 起始时间
+            end: 结束时间，默认当前时间
+            resolution: hour / day / auto（跨度超过 7 天按天）
+
+        Returns:
+            list: 按时间排序的数据点，likes 为该时间段内最后一次记录的点赞数
+        """
+        if not self.db.conn:
+            return []
+        end = end or datetime.now()
+        if resolution == "auto":
+            resolution = (
+                "day"
+                if end - start > timedelta(days=self.TREND_HOURLY_MAX_DAYS)
+                else "hour"
+            )
+        start = _floor_day(start) if resolution == "day" else _floor_hour(start)
+        start_s, end_s = _format(start), _format(end)
+        hourly_until = self.db.get_meta(HOURLY_WATERMARK_KEY) or ""
+        daily_until = self.db.get_meta(DAILY_WATERMARK_KEY) or ""
+
+        rows: List[Tuple] = []
+        # 三个查询在同一个读事务中执行，看到一致的快照
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            hourly_from = start_s
+            if resolution == "day":
+                cursor.execute(
+                    """
+                    SELECT bucket, min_likes, max_likes, last_likes, last_at, samples
+                    FROM like_history_daily
+                    WHERE video_id = ? AND bucket >= ? AND bucket < ? AND bucket < ?
+                    """,
+                    (video_id, start_s[:10], end_s, daily_until[:10]),
+                )
+                rows += cursor.fetchall()
+                hourly_from = max(start_s, daily_until)
+            cursor.execute(
+                """
+                SELECT bucket, min_likes, max_likes, last_likes, last_at, samples
+                FROM like_history_hourly
+                WHERE video_id = ? AND bucket >= ? AND bucket < ? AND bucket < ?
+                """,
+                (video_id, hourly_from, end_s, hourly_until),
+            )
+            rows += cursor.fetchall()
+            cursor.execute(
+                """
+                SELECT recorded_at, like_count, like_count, like_count, recorded_at, 1
+                FROM like_history
+                WHERE video_id = ? AND recorded_at >= ? AND recorded_at < ?
+                """,
+                (video_id, max(start_s, hourly_until), end_s),
+            )
+            rows += cursor.fetchall()
+
+        return self._merge(rows, 10 if resolution == "day" else 13)
+
+    def _rollup(
+        self, key: str, sql: str, earliest_sql: str, target: datetime, floor
+    ) -> Tuple[datetime, int]:
+        """从水位线开始分批汇总到 target，返回新的水位线和写入行数"""
+        value = self.db.get_meta(key)
+        if value:
+            start = datetime.strptime(value, TIME_FORMAT)
+        else:
+            with self.db.reader() as conn:
+                earliest = conn.execute(earliest_sql).fetchone()[0]
+            start = floor(datetime.fromisoformat(earliest)) if earliest else target
+
+        if not value:
+            initial = min(start, target)
+            self.db.write(lambda cursor: self._set_watermark(cursor, key, initial))
+
+        def write_chunk(cursor) -> int:
+            cursor.execute(sql, (_format(start), _format(end)))
+            written = max(cursor.rowcount, 0)
+            self._set_watermark(cursor, key, end)
+            return written
+
+        written = 0
+        while start < target:
+            end = min(start + self.chunk, target)
+            written += self.db.write(write_chunk)
+            start = end
+        return max(start, target), written
+
+    def _delete_before(
+        self, table: str, column: str, cutoff: datetime, date_only: bool = False
+    ) -> int:
+        """分批删除 column 早于 cutoff 的记录，每批一个写任务"""
+        value = _format(cutoff)[:10] if date_only else _format(cutoff)
+        deleted = 0
+        sql = f"""
+            DELETE FROM {table} WHERE rowid IN (
+                SELECT rowid FROM {table} WHERE {column} < ? LIMIT ?
+            )
+        """
+
+        def delete_chunk(cursor) -> int:
+            cursor.execute(sql, (value, self.delete_batch))
+            return cursor.rowcount
+
+        while True:
+            count = self.db.write(delete_chunk)
+            deleted += count
+            if count < self.delete_batch:
+                return deleted
+
+    @staticmethod
+    def _set_watermark(cursor, key: str, value: datetime) -> None:
+        cursor.execute(
+            "INSERT INTO monitor_meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, _format(value)),
+        )
+
+    @staticmethod
+    def _merge(rows: List[Tuple], key_len: int) -> List[Dict[str, Any]]:
+        """把不同来源的记录按时间段合并为数据点"""
+        points: Dict[str, List[Any]] = {}
+        for bucket, min_likes, max_likes, last_likes, last_at, samples in rows:
+            key = bucket[:key_len]
+            point = points.get(key)
+            if point is None:
+                points[key] = [min_likes, max_likes, last_likes, last_at, samples]
+                continue
+            point[0] = min(point[0], min_likes)
+            point[1] = max(point[1], max_likes)
+            if last_at >= point[3]:
+                point[2], point[3] = last_likes, last_at
+            point[4] += samples
+
+        suffix = ":00:00" if key_len == 13 else ""
+        return [
+            {
+                "time": key + suffix,
+                "likes": point[2],
+                "min_likes": point[0],
+                "max_likes": point[1],
+                "samples": point[4],
+            }
+            for key, point in sorted(points.items())
+        ]
+
+
+class RollupService:
+    """
+    后台降采样服务：定期对所有用户的数据库执行降采样
+
+    Args:
+        interval: 运行间隔（秒）
+    """
+
+    def __init__(self, interval: float = ROLLUP_DEFAULTS["INTERVAL"]) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """启动后台循环"""
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info("✓ 点赞历史降采样已启动")
+
+    async def stop(self) -> None:
+        """停止后台循环（正在执行的一批会在线程中完成）"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def run_once(self) -> Dict[str, Dict[str, int]]:
+        """
+        对所有用户执行一次降采样，保留期设置每次运行时读取
+
+        通过各用户调度器已打开的数据库执行，与监控采集共用同一个写线程，不争抢写锁
+        """
+        # 调度器模块导入了本模块，这里延迟导入
+        from ..monitor.scheduler import monitoring_manager
+
+        results = {}
+        for user_id in UserConfig.list_user_ids():
+            try:
+                results[user_id] = stats = monitoring_manager.get_scheduler(user_id).run_rollup(
+                    raw_retention_hours=settings.get(
+                        "rollupRawRetentionHours", ROLLUP_DEFAULTS["RAW_RETENTION_HOURS"]
+                    ),
+                    hourly_retention_days=settings.get(
+                        "rollupHourlyRetentionDays",
+                        ROLLUP_DEFAULTS["HOURLY_RETENTION_DAYS"],
+                    ),
+                    daily_retention_days=settings.get(
+                        "rollupDailyRetentionDays",
+                        ROLLUP_DEFAULTS["DAILY_RETENTION_DAYS"],
+                    ),
+                )
+                if any(stats.values()):
+                    logger.info(f"[Rollup] [{user_id}] 降采样完成: {stats}")
+            except Exception as e:
+                logger.error(f"[Rollup] [{user_id}] 降采样失败: {e}")
+        return results
+
+    async def _run_loop(self) -> None:
+        await asyncio.sleep(ROLLUP_DEFAULTS["INITIAL_DELAY"])
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"[Rollup] 降采样失败: {e}")
+            await asyncio.sleep(self.interval)
+
+
+# 全局实例
+rollup_service = RollupService()
@@ -0,0 +1,232 @@
+# -*- encoding: utf-8 -*-
+"""
+跨用户共享的账号作品缓存
+
+每个用户的监控数据保存在各自的 monitor_data.db 中，多个用户关注同一个账号时，
+每个用户的调度器都会各自采集一遍。这里在用户数据根目录维护一份共享缓存（shared_cache.db），
+按 sec_uid / aweme_id 存放最近采集到的作品数据：
+- 采集前先查缓存，缓存在有效期内且覆盖了本用户需要的作品时直接使用，不再请求接口
+- 采集后写回缓存，并记录这次采集完整覆盖的发布时间范围
+- 同一进程内同一账号同时只有一个采集，其他用户等待后直接读取缓存
+
+各用户的视频表、点赞历史仍写入自己的数据库，缓存只用于减少重复请求。
+与 monitor_jobs.db 一样可能被多台机器共享，保持 SQLite 默认的回滚日志模式。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..constants import SHARED_CACHE_DEFAULTS
+from ..models import UserConfig
+
+
+class SharedVideoCache:
+    """
+    共享作品缓存
+
+    Args:
+        db_path: 数据库路径，为空时使用用户数据根目录下的 shared_cache.db
+    """
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        self.db_path = os.path.abspath(
+            db_path or os.path.join(UserConfig.get_user_data_dir(), "shared_cache.db")
+        )
+        self._lock = threading.Lock()
+        # 没有线程持有或等待时锁会被回收，映射不随采集过的账号数增长
+        self._crawl_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+        self.hits = 0
+        self.misses = 0
+        # 自动提交模式，写事务显式使用 BEGIN IMMEDIATE 避免多进程死锁
+        self.conn = sqlite3.connect(
+            self.db_path,
+            timeout=SHARED_CACHE_DEFAULTS["BUSY_TIMEOUT"],
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._init_tables()
+
+    def _init_tables(self) -> None:
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cached_accounts (
+                    sec_uid TEXT PRIMARY KEY,
+                    fetched_at REAL NOT NULL,
+                    covered_since INTEGER NOT NULL
+                )
+                """
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cached_videos (
+                    aweme_id TEXT PRIMARY KEY,
+                    sec_uid TEXT NOT NULL,
+                    create_time INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cached_videos_account "
+                "ON cached_videos (sec_uid, create_time)"
+            )
+
+    def crawl_lock(self, sec_uid: str) -> threading.Lock:
+        """同一账号的采集锁，持有期间其他用户的采集等待，结束后读取缓存"""
+        with self._lock:
+            return self._crawl_locks.setdefault(sec_uid, threading.Lock())
+
+    def get(
+        self,
+        sec_uid: str,
+        since: int,
+        refresh_targets: Iterable[str],
+        ttl: float,
+        now: Optional[float] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        读取缓存
+
+        Args:
+            sec_uid: 账号 sec_uid
+            since: 需要完整覆盖的发布时间下限（不含），即本用户最近见过的作品的发布时间
+            refresh_targets: 需要刷新统计数据的已知作品 ID
+            ttl: 有效期（秒）
+            now: 当前时间戳，默认 time.time()
+
+        Returns:
+            list: 发布时间晚于 since 的作品及 refresh_targets 中的作品；
+                缓存过期或没有完整覆盖时返回 None
+        """
+        fresh_after = (now or time.time()) - ttl
+        targets = sorted(set(refresh_targets))
+        with self._lock:
+            account = self.conn.execute(
+                "SELECT fetched_at, covered_since FROM cached_accounts WHERE sec_uid = ?",
+                (sec_uid,),
+            ).fetchone()
+            if not account or account[0] < fresh_after or account[1] > since:
+                self.misses += 1
+                return None
+
+            rows = self.conn.execute(
+                """
+                SELECT aweme_id, data, updated_at FROM cached_videos
+                WHERE sec_uid = ?
+                  AND (create_time > ? OR aweme_id IN (SELECT value FROM json_each(?)))
+                ORDER BY create_time DESC
+                """,
+                (sec_uid, since, json.dumps(targets)),
+            ).fetchall()
+            # 任何一个作品的数据过期或缺失都视为未命中，重新采集
+            found = {row[0] for row in rows}
+            if any(row[2] < fresh_after for row in rows) or any(
+                aweme_id not in found for aweme_id in targets
+            ):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return [json.loads(row[1]) for row in rows]
+
+    def put(
+        self,
+        sec_uid: str,
+        videos: List[Dict[str, Any]],
+        covered_since: Optional[int],
+        cutoff: int,
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        写入采集结果
+
+        Args:
+            sec_uid: 账号 sec_uid
+            videos: 采集到的作品
+            covered_since: 这次采集完整覆盖了发布时间晚于该值的全部作品，
+                为空表示没有完整覆盖（如达到翻页上限），只更新作品数据
+            cutoff: 统计窗口起点，早于该时间发布的缓存作品会被删除
+            now: 当前时间戳，默认 time.time()
+        """
+        now = now or time.time()
+        rows = [
+            (
+                video["id"],
+                sec_uid,
+                video.get("time") or 0,
+                json.dumps(video, ensure_ascii=False),
+                now,
+            )
+            for video in videos
+        ]
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    """
+                    INSERT INTO cached_videos (aweme_id, sec_uid, create_time, data, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(aweme_id) DO UPDATE SET
+                        data = excluded.data,
+                        updated_at = excluded.updated_at
+                    """,
+                    rows,
+                )
+                if covered_since is not None:
+                    # 这次覆盖的范围与上一次采集的时间衔接时（上次采集之后发布的作品都已覆盖），
+                    # 两次采集合起来覆盖到更早的发布时间；数据是否过期在读取时逐个判断
+                    self.conn.execute(
+                        """
+                        INSERT INTO cached_accounts (sec_uid, fetched_at, covered_since)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT(sec_uid) DO UPDATE SET
+                            covered_since = CASE
+                                WHEN excluded.covered_since <= cached_accounts.fetched_at
+                                THEN MIN(cached_accounts.covered_since, excluded.covered_since)
+                                ELSE excluded.covered_since
+                            END,
+                            fetched_at = excluded.fetched_at
+                        """,
+                        (sec_uid, now, covered_since),
+                    )
+                self.conn.execute(
+                    "DELETE FROM cached_videos WHERE sec_uid = ? AND create_time < ?",
+                    (sec_uid, cutoff),
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        with self._lock:
+            accounts = self.conn.execute("SELECT COUNT(*) FROM cached_accounts").fetchone()[0]
+            videos = self.conn.execute("SELECT COUNT(*) FROM cached_videos").fetchone()[0]
+        return {"accounts": accounts, "videos": videos, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self.conn.close()
+
+
+_shared_cache: Optional[SharedVideoCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> SharedVideoCache:
+    """获取进程内共享的作品缓存（首次调用时打开数据库）"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SharedVideoCache()
+        return _shared_cache
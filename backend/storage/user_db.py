@@ -5,20 +5,65 @@
 为每个用户提供独立的 SQLite 数据库，存储监控数据和视频信息。
 """
 
+import json
 import os
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Any
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
 
+from loguru import logger
+
+from ..constants import MONITOR_DEFAULTS
 from ..models import UserConfig
+from ..settings import settings
+from .connection import ReadPool, WriterThread, connect
+from .leaderboard import Leaderboard
+from .migrations import migrate
 
 
 class UserDatabase:
     """用户专属SQLite数据库"""
     
-    def __init__(self, user_id: str):
+    # 监控列表（排行榜）数据
+    LEADERBOARD_SQL = '''
+        SELECT v.video_id, v.account_id, v.description, v.create_time, 
+               v.like_count, v.collect_count, v.comment_count, v.share_count, 
+               v.cover_url, v.video_url, v.hourly_likes, 
+               a.nickname as account_name, a.follower_count
+        FROM videos v
+        JOIN following_accounts a ON v.account_id = a.account_id
+    '''
+    
+    # 一批视频的近一小时点赞增量：每个视频最新一条记录减去窗口内最早一条记录
+    HOURLY_DELTA_SQL = '''
+        SELECT video_id, like_count - first_likes FROM (
+            SELECT video_id, like_count,
+                   FIRST_VALUE(like_count) OVER (
+                       PARTITION BY video_id ORDER BY recorded_at
+                   ) AS first_likes,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY video_id ORDER BY recorded_at DESC
+                   ) AS rn
+            FROM like_history
+            WHERE video_id IN (SELECT value FROM json_each(?)) AND recorded_at >= ?
+        )
+        WHERE rn = 1
+    '''
+    
+    def __init__(self, user_id: str, shared: Optional[bool] = None):
+        """
+        Args:
+            user_id: 用户ID
+            shared: 是否由多台机器通过共享目录写入（分布式监控），为空时按设置项 monitorMode 判断
+        """
         self.user_id = user_id
+        # 写连接只由写线程使用（打开时建表除外），读操作使用只读连接池
         self.conn = None
+        self.db_path = None
+        self._writer = None
+        self._readers = None
+        self.leaderboard = Leaderboard()
         try:
             user_dir = UserConfig.get_user_data_dir(user_id)
             db_path = os.path.join(user_dir, 'monitor_data.db')
@@ -30,169 +75,197 @@ class UserDatabase:
             db_path = os.path.abspath(db_path)
             
             # 尝试连接数据库
-            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn = connect(db_path)
+            if shared is None:
+                shared = settings.get("monitorMode", MONITOR_DEFAULTS["MODE"]) == "distributed"
+            if shared:
+                # 网络文件系统不支持 WAL 依赖的共享内存，多台机器共享时使用回滚日志（与任务队列一致）
+                mode = self.conn.execute('PRAGMA journal_mode=DELETE').fetchone()[0]
+                self.conn.execute('PRAGMA synchronous=FULL')
+                if mode != 'delete':
+                    logger.warning(f"[{user_id}] 数据库仍有其他连接，无法切换为回滚日志模式（当前 {mode}）")
+            else:
+                # WAL 模式下读操作不阻塞写入，写入只追加日志，NORMAL 同步级别即可保证一致性
+                self.conn.execute('PRAGMA journal_mode=WAL')
+                self.conn.execute('PRAGMA synchronous=NORMAL')
             self.init_tables()
+            self.db_path = db_path
+            self._writer = WriterThread(self.conn, name=f'db-writer-{user_id}')
+            self._readers = ReadPool(db_path)
         except Exception as e:
             # 无法创建数据库，设置conn为None
             print(f"创建数据库失败: {e}")
             pass
     
     def init_tables(self):
-        """初始化用户数据表"""
+        """初始化用户数据表（执行尚未执行的结构迁移）"""
         if not self.conn:
             return
         
-        cursor = self.conn.cursor()
-        
-        # 关注账号表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS following_accounts (
-                account_id TEXT PRIMARY KEY,
-                sec_uid TEXT NOT NULL,
-                nickname TEXT,
-                follower_count INTEGER,
-                last_updated TIMESTAMP,
-                is_monitoring BOOLEAN DEFAULT 1
-            )
-        ''')
-        
-        # 视频数据表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS videos (
-                video_id TEXT PRIMARY KEY,
-                account_id TEXT,
-                description TEXT,
-                create_time INTEGER,
-                like_count INTEGER,
-                collect_count INTEGER,
-                comment_count INTEGER,
-                share_count INTEGER,
-                cover_url TEXT,
-                video_url TEXT,
-                collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                hourly_likes INTEGER DEFAULT 0,  # 近一小时点赞增量
-                FOREIGN KEY (account_id) REFERENCES following_accounts (account_id)
-            )
-        ''')
-        
-        # 点赞历史表（用于计算小时增量）
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS like_history (
-                video_id TEXT,
-                like_count INTEGER,
-                recorded_at TIMESTAMP,
-                PRIMARY KEY (video_id, recorded_at)
-            )
-        ''')
+        migrate(self.conn)
+    
+    def write(self, fn, on_commit=None):
+        """
+        在写线程中执行写操作并等待提交
         
-        self.conn.commit()
+        Args:
+            fn: 参数为写事务游标的函数，返回值作为结果
+            on_commit: 提交后按提交顺序调用的回调，参数为 fn 的返回值
+        """
+        return self._writer.execute(fn, on_commit)
+    
+    @contextmanager
+    def reader(self):
+        """借出只读连接"""
+        with self._readers.connection() as conn:
+            yield conn
     
     def save_account(self, account_id: str, sec_uid: str, nickname: str, follower_count: int):
         """保存关注账号信息"""
         if not self.conn:
             return
         
-        cursor = self.conn.cursor()
+        def _write(cursor):
+            cursor.execute('''
+                INSERT OR REPLACE INTO following_accounts 
+                (account_id, sec_uid, nickname, follower_count, last_updated)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (account_id, sec_uid, nickname, follower_count, datetime.now()))
         
-        cursor.execute('''
-            INSERT OR REPLACE INTO following_accounts 
-            (account_id, sec_uid, nickname, follower_count, last_updated)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (account_id, sec_uid, nickname, follower_count, datetime.now()))
+        self.write(_write)
+        self.leaderboard.invalidate()
+    
+    def get_following_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """获取关注列表快照（正在监控的账号）"""
+        if not self.conn:
+            return {}
         
-        self.conn.commit()
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT account_id, nickname, follower_count
+                FROM following_accounts WHERE is_monitoring = 1
+            ''')
+            return {
+                row[0]: {'nickname': row[1], 'follower_count': row[2]}
+                for row in cursor.fetchall()
+            }
     
-    def save_video_data(self, account_id: str, videos: List[Dict[str, Any]]):
-        """保存视频数据并计算增量"""
+    def get_monitored_accounts(self) -> List[Tuple[str, str]]:
+        """获取正在监控的账号 (account_id, nickname)"""
         if not self.conn:
+            return []
+        
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT account_id, COALESCE(nickname, 'Unknown')
+                FROM following_accounts WHERE is_monitoring = 1
+            ''')
+            return cursor.fetchall()
+    
+    def apply_following_diff(self, upserts: List[Dict[str, Any]], removed: List[str],
+                             added_ids: Optional[List[str]] = None):
+        """批量写入关注列表变化：新增/资料变化的账号 upsert，取消关注的账号停止监控"""
+        if not self.conn or not (upserts or removed):
             return
         
-        cursor = self.conn.cursor()
-        
-        # 确保表存在（在多线程环境下可能需要重新检查）
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS videos (
-                video_id TEXT PRIMARY KEY,
-                account_id TEXT,
-                description TEXT,
-                create_time INTEGER,
-                like_count INTEGER,
-                collect_count INTEGER,
-                comment_count INTEGER,
-                share_count INTEGER,
-                cover_url TEXT,
-                video_url TEXT,
-                collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                hourly_likes INTEGER DEFAULT 0,
-                FOREIGN KEY (account_id) REFERENCES following_accounts (account_id)
+        now = datetime.now()
+        
+        def _write(cursor):
+            cursor.executemany('''
+                INSERT INTO following_accounts
+                (account_id, sec_uid, nickname, follower_count, last_updated, is_monitoring)
+                VALUES (?, ?, ?, ?, ?, 1)
+                ON CONFLICT(account_id) DO UPDATE SET
+                    nickname = excluded.nickname,
+                    follower_count = excluded.follower_count,
+                    last_updated = excluded.last_updated,
+                    is_monitoring = 1
+            ''', [
+                (account['sec_uid'], account['sec_uid'], account.get('nickname', 'Unknown'),
+                 account.get('follower_count', 0), now)
+                for account in upserts
+            ])
+            cursor.executemany(
+                'UPDATE following_accounts SET is_monitoring = 0, last_updated = ? WHERE account_id = ?',
+                [(now, account_id) for account_id in removed]
             )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS like_history (
-                video_id TEXT,
-                like_count INTEGER,
-                recorded_at TIMESTAMP,
-                PRIMARY KEY (video_id, recorded_at)
+            cursor.executemany(
+                'INSERT INTO following_changes (account_id, change, changed_at) VALUES (?, ?, ?)',
+                [(account_id, 'added', now) for account_id in (added_ids or [])] +
+                [(account_id, 'removed', now) for account_id in removed]
             )
-        ''')
         
-        self.conn.commit()
+        self.write(_write)
+        # 昵称、粉丝数变化需要重建排行榜
+        self.leaderboard.invalidate()
+    
+    def get_meta(self, key: str) -> Optional[str]:
+        """读取监控元数据"""
+        if not self.conn:
+            return None
+        
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT value FROM monitor_meta WHERE key = ?', (key,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+    
+    def set_meta(self, key: str, value: str):
+        """写入监控元数据"""
+        if not self.conn:
+            return
         
-        for video in videos:
-            # 检查是否已存在
+        def _write(cursor):
             cursor.execute(
-                "SELECT like_count FROM videos WHERE video_id = ?",
-                (video['id'],)
+                'INSERT INTO monitor_meta (key, value) VALUES (?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                (key, value)
             )
-            existing = cursor.fetchone()
-            
+        
+        self.write(_write)
+    
+    def save_video_data(self, account_id: str, videos: List[Dict[str, Any]]):
+        """保存视频数据并计算增量（整批在一个事务中写入）"""
+        if not self.conn or not videos:
+            return
+        
+        # recorded_at 按本地时间保存，一小时前的边界也用本地时间比较
+        now = datetime.now()
+        hour_ago = now - timedelta(hours=1)
+        
+        def _write(cursor):
             # 保存点赞历史
-            cursor.execute(
-                '''INSERT INTO like_history (video_id, like_count, recorded_at) 
-                   VALUES (?, ?, ?)''',
-                (video['id'], video['digg_count'], datetime.now())
-            )
+            cursor.executemany('''
+                INSERT INTO like_history
+                (video_id, like_count, recorded_at, comment_count, share_count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(video_id, recorded_at) DO NOTHING
+            ''', [
+                (video['id'], video['digg_count'], now, video['comment_count'],
+                 video['share_count'])
+                for video in videos
+            ])
             
-            # 计算近一小时点赞增量
-            hour_ago = datetime.now().timestamp() - 3600
-            cursor.execute('''
-                SELECT like_count FROM like_history 
-                WHERE video_id = ? AND recorded_at >= datetime(?, 'unixepoch')
-                ORDER BY recorded_at ASC LIMIT 1
-            ''', (video['id'], hour_ago))
-            
-            hour_ago_likes = cursor.fetchone()
-            hourly_inc = 0
-            if hour_ago_likes:
-                hourly_inc = video['digg_count'] - hour_ago_likes[0]
+            # 近一小时点赞增量 = 当前点赞 - 一小时内最早的一条记录，整批一次查询
+            hourly = self.hourly_deltas(cursor, [video['id'] for video in videos], hour_ago)
             
             # 插入或更新视频数据
-            if existing:
-                cursor.execute('''
-                    UPDATE videos SET 
-                        like_count = ?,
-                        collect_count = ?,
-                        comment_count = ?,
-                        share_count = ?,
-                        hourly_likes = ?,
-                        collected_at = CURRENT_TIMESTAMP
-                    WHERE video_id = ?
-                ''', (
-                    video['digg_count'],
-                    video['collect_count'],
-                    video['comment_count'],
-                    video['share_count'],
-                    hourly_inc,
-                    video['id']
-                ))
-            else:
-                # 获取视频播放地址
-                video_url = video.get('download_addr', '')
-                
-                cursor.execute('''
-                    INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+            cursor.executemany('''
+                INSERT INTO videos
+                (video_id, account_id, description, create_time, like_count, collect_count,
+                 comment_count, share_count, cover_url, video_url, collected_at, hourly_likes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    like_count = excluded.like_count,
+                    collect_count = excluded.collect_count,
+                    comment_count = excluded.comment_count,
+                    share_count = excluded.share_count,
+                    hourly_likes = excluded.hourly_likes,
+                    collected_at = CURRENT_TIMESTAMP
+            ''', [
+                (
                     video['id'],
                     account_id,
                     video['desc'],
@@ -202,82 +275,255 @@ class UserDatabase:
                     video['comment_count'],
                     video['share_count'],
                     video['cover'],
-                    video_url,
-                    datetime.now(),
-                    hourly_inc
-                ))
+                    video.get('download_addr', ''),
+                    now,
+                    hourly.get(video['id'], 0)
+                )
+                for video in videos
+            ])
+            
+            # 这一批视频的最新排行数据，提交后由写线程按提交顺序更新排行榜
+            return self._leaderboard_items(cursor, [video['id'] for video in videos])
         
-        self.conn.commit()
+        self.write(_write, on_commit=self.leaderboard.upsert)
     
-    def get_monitoring_data(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """获取监控数据"""
+    @classmethod
+    def hourly_deltas(cls, cursor: sqlite3.Cursor, video_ids: List[str],
+                      since: datetime) -> Dict[str, int]:
+        """批量计算视频在 since 之后的点赞增量 {video_id: 增量}"""
+        if not video_ids:
+            return {}
+        cursor.execute(cls.HOURLY_DELTA_SQL, (json.dumps(video_ids), since))
+        return dict(cursor.fetchall())
+    
+    def save_sweep_results(self, results: List[Tuple[str, str, Optional[str]]]):
+        """批量保存账号采集结果 (account_id, status, error)"""
+        if not self.conn or not results:
+            return
+        
+        now = datetime.now()
+        
+        def _write(cursor):
+            cursor.executemany('''
+                INSERT INTO sweep_state
+                (account_id, last_status, last_attempt_at, last_success_at, last_error)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(account_id) DO UPDATE SET
+                    last_status = excluded.last_status,
+                    last_attempt_at = excluded.last_attempt_at,
+                    last_success_at = COALESCE(excluded.last_success_at, sweep_state.last_success_at),
+                    last_error = excluded.last_error
+            ''', [
+                (account_id, status, now, now if status == 'success' else None, error)
+                for account_id, status, error in results
+            ])
+        
+        self.write(_write)
+    
+    def get_account_states(self, account_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """获取账号的增量采集状态，未指定账号时返回全部"""
         if not self.conn:
-            return []
+            return {}
         
-        try:
-            cursor = self.conn.cursor()
-            
+        sql = '''
+            SELECT account_id, last_aweme_id, last_aweme_time, last_checked_at, last_new_at,
+                   next_poll_at
+            FROM account_state
+        '''
+        params: List[Any] = []
+        if account_id is not None:
+            sql += ' WHERE account_id = ?'
+            params.append(account_id)
+        
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return {
+                row[0]: {
+                    'last_aweme_id': row[1],
+                    'last_aweme_time': row[2],
+                    'last_checked_at': row[3],
+                    'last_new_at': row[4],
+                    'next_poll_at': row[5]
+                }
+                for row in cursor.fetchall()
+            }
+    
+    def save_account_state(self, account_id: str, last_aweme_id: Optional[str],
+                           last_aweme_time: Optional[int], has_new: bool,
+                           next_poll_at: Optional[float] = None):
+        """保存账号增量采集状态"""
+        if not self.conn:
+            return
+        
+        now = datetime.now()
+        
+        def _write(cursor):
             cursor.execute('''
-                SELECT v.video_id, v.account_id, v.description, v.create_time, 
-                       v.like_count, v.collect_count, v.comment_count, v.share_count, 
-                       v.cover_url, v.video_url, v.hourly_likes, 
-                       a.nickname as account_name, a.follower_count
-                FROM videos v
-                JOIN following_accounts a ON v.account_id = a.account_id
-                ORDER BY v.hourly_likes DESC, v.like_count DESC
-                LIMIT ?
-            ''', (limit,))
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    'key': row[0],
-                    'video_id': row[0],
-                    'account_id': row[1],
-                    'video_desc': row[2],
-                    'create_time': row[3],
-                    'total_likes': row[4],
-                    'collect_count': row[5],
-                    'comment_count': row[6],
-                    'share_count': row[7],
-                    'cover_url': row[8],
-                    'video_url': row[9],
-                    'hourly_likes': row[10],
-                    'account_name': row[11],
-                    'follower_count': row[12]
-                })
-            
-            return results
+                INSERT INTO account_state
+                (account_id, last_aweme_id, last_aweme_time, last_checked_at, last_new_at,
+                 next_poll_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(account_id) DO UPDATE SET
+                    last_aweme_id = excluded.last_aweme_id,
+                    last_aweme_time = excluded.last_aweme_time,
+                    last_checked_at = excluded.last_checked_at,
+                    last_new_at = COALESCE(excluded.last_new_at, account_state.last_new_at),
+                    next_poll_at = excluded.next_poll_at
+            ''', (account_id, last_aweme_id, last_aweme_time, now, now if has_new else None,
+                  next_poll_at))
+        
+        self.write(_write)
+    
+    def get_refresh_targets(self, since: int, account_id: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        获取每个账号在 since（时间戳）之后发布、需要刷新统计数据的视频
+        
+        每个账号的视频按上次刷新时间从早到晚排列，本轮没来得及刷新的视频下一轮优先刷新
+        """
+        if not self.conn:
+            return {}
+        
+        sql = 'SELECT account_id, video_id FROM videos WHERE create_time >= ?'
+        params: List[Any] = [since]
+        if account_id is not None:
+            sql += ' AND account_id = ?'
+            params.append(account_id)
+        sql += ' ORDER BY collected_at, video_id'
+        
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            targets: Dict[str, List[str]] = {}
+            for account_id, video_id in cursor.fetchall():
+                targets.setdefault(account_id, []).append(video_id)
+            return targets
+    
+    def get_account_activity(self, since: int, account_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """获取账号在 since（时间戳）之后的发布次数、首末发布时间和最高小时点赞增量"""
+        if not self.conn:
+            return {}
+        
+        sql = '''
+            SELECT account_id, COUNT(*), MIN(create_time), MAX(create_time), MAX(hourly_likes)
+            FROM videos
+            WHERE create_time >= ?
+        '''
+        params: List[Any] = [since]
+        if account_id is not None:
+            sql += ' AND account_id = ?'
+            params.append(account_id)
+        sql += ' GROUP BY account_id'
+        
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return {
+                row[0]: {
+                    'post_count': row[1],
+                    'first_post_time': row[2],
+                    'last_post_time': row[3],
+                    'max_hourly_likes': row[4]
+                }
+                for row in cursor.fetchall()
+            }
+    
+    def get_monitoring_data(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """获取监控数据"""
+        try:
+            return self.get_leaderboard_page(limit)[0]
         except Exception as e:
             # 表不存在或其他错误，返回空列表
             print(f"获取监控数据失败: {e}")
             return []
     
+    def get_leaderboard_page(self, limit: int = 100,
+                             cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        分页获取监控数据（按小时点赞增量、总点赞数降序）
+        
+        Returns:
+            tuple: (数据, 下一页游标)，游标格式错误时抛出 ValueError
+        """
+        if not self.conn:
+            return [], None
+        
+        # 写连接只在写线程中使用，这里从读连接取 data_version：其他连接（包括本进程的写线程
+        # 和监控工作进程）提交修改后计数变化，此时重建排行榜。计数只在同一连接上可比较，
+        # 连接池换了连接时也重建一次
+        with self.reader() as conn:
+            version = (id(conn), conn.execute('PRAGMA data_version').fetchone()[0])
+            if self.leaderboard.version != version:
+                generation = self.leaderboard.generation
+                items = self._leaderboard_items(conn.cursor())
+                self.leaderboard.rebuild(items, version, generation)
+        return self.leaderboard.page(limit, cursor)
+    
+    def _leaderboard_items(self, cursor: sqlite3.Cursor,
+                           video_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """查询排行榜数据，未指定视频时返回全部"""
+        if video_ids is None:
+            cursor.execute(self.LEADERBOARD_SQL)
+        else:
+            cursor.execute(
+                self.LEADERBOARD_SQL + ' WHERE v.video_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(video_ids),)
+            )
+        
+        return [
+            {
+                'key': row[0],
+                'video_id': row[0],
+                'account_id': row[1],
+                'video_desc': row[2],
+                'create_time': row[3],
+                'total_likes': row[4],
+                'collect_count': row[5],
+                'comment_count': row[6],
+                'share_count': row[7],
+                'cover_url': row[8],
+                'video_url': row[9],
+                'hourly_likes': row[10],
+                'account_name': row[11],
+                'follower_count': row[12]
+            }
+            for row in cursor.fetchall()
+        ]
+    
     def get_following_count(self) -> int:
         """获取关注账号数量"""
         if not self.conn:
             return 0
         
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM following_accounts WHERE is_monitoring = 1')
-        return cursor.fetchone()[0]
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM following_accounts WHERE is_monitoring = 1')
+            return cursor.fetchone()[0]
     
     def get_last_update_time(self) -> str:
         """获取最后更新时间"""
         if not self.conn:
             return datetime.now().isoformat()
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT MAX(collected_at) FROM videos
-        ''')
-        result = cursor.fetchone()[0]
-        return result or datetime.now().isoformat()
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT MAX(collected_at) FROM videos
+            ''')
+            result = cursor.fetchone()[0]
+            return result or datetime.now().isoformat()
     
     def close(self):
-        """关闭数据库连接"""
+        """关闭数据库连接，先等待写线程处理完队列中的任务"""
+        if self._writer:
+            self._writer.stop()
+            self._writer = None
+        if self._readers:
+            self._readers.close()
+            self._readers = None
         if self.conn:
             self.conn.close()
+            self.conn = None
     
     def __del__(self):
         """析构函数，确保连接关闭"""
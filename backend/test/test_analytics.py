@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""作品趋势分析测试"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import UserConfig
+from backend.monitor.analytics import TrendAnalytics
+from backend.storage.user_db import UserDatabase
+
+NOW = datetime(2026, 3, 10, 12, 0)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        UserConfig, "get_user_data_dir", staticmethod(lambda user_id=None: str(tmp_path))
+    )
+    database = UserDatabase("tester")
+    yield database
+    database.close()
+
+
+def _series(db, video_id, account_id, likes_per_hour, start, end, comments_per_hour=0):
+    """每 10 分钟一条匀速增长的采样"""
+    db.conn.execute(
+        "INSERT OR IGNORE INTO videos (video_id, account_id) VALUES (?, ?)",
+        (video_id, account_id),
+    )
+    at = start
+    while at <= end:
+        hours = (at - start).total_seconds() / 3600
+        db.conn.execute(
+            "INSERT INTO like_history "
+            "(video_id, like_count, recorded_at, comment_count, share_count) "
+            "VALUES (?, ?, ?, ?, 0)",
+            (
+                video_id,
+                int(likes_per_hour * hours),
+                at.strftime("%Y-%m-%d %H:%M:%S.%f"),
+                int(comments_per_hour * hours),
+            ),
+        )
+        at += timedelta(minutes=10)
+    db.conn.commit()
+
+
+def test_velocity_acceleration_and_breakout(db):
+    """测试增速、加速度、账号基线与爆款标记"""
+    start = NOW - timedelta(hours=6)
+    for i, rate in enumerate((100, 120, 110, 90)):
+        _series(db, f"n{i}", "acc", rate, start, NOW)
+    _series(db, "hot", "acc", 600, start, NOW, comments_per_hour=60)
+    # 前 5 小时匀速，最后 1 小时加速
+    _series(db, "rise", "other", 60, start, NOW - timedelta(hours=1))
+    db.conn.execute(
+        "INSERT INTO like_history (video_id, like_count, recorded_at) VALUES (?, ?, ?)",
+        ("rise", 300 + 360, NOW.strftime("%Y-%m-%d %H:%M:%S.%f")),
+    )
+    db.conn.commit()
+
+    analytics = TrendAnalytics()
+    assert analytics.refresh(db, NOW) > 0
+
+    hot = analytics.videos["hot"]
+    assert hot["velocity"]["60m"]["likes"] == pytest.approx(600, rel=0.01)
+    assert hot["velocity"]["60m"]["comments"] == pytest.approx(60, rel=0.01)
+    assert hot["velocity"]["360m"]["likes"] == pytest.approx(600, rel=0.01)
+    assert hot["breakout"] and hot["zscore"] > 2.5
+    assert not analytics.videos["n0"]["breakout"]
+
+    rise = analytics.videos["rise"]
+    assert rise["velocity"]["60m"]["likes"] == pytest.approx(360)
+    assert rise["acceleration"]["likes"] == pytest.approx(300, rel=0.05)
+
+    assert analytics.get_videos(1)[0]["video_id"] == "hot"
+    assert [v["video_id"] for v in analytics.get_videos(sort="zscore", breakout_only=True)] == [
+        "hot"
+    ]
+    accounts = {item["account_id"]: item for item in analytics.get_accounts()}
+    assert accounts["acc"]["videos"] == 5 and accounts["acc"]["breakouts"] == 1
+
+
+def test_incremental_refresh(db):
+    """测试增量读取新采样且不重复计入重叠部分"""
+    _series(db, "v", "acc", 60, NOW - timedelta(hours=2), NOW)
+    analytics = TrendAnalytics()
+    analytics.refresh(db, NOW)
+    samples = analytics.videos["v"]["samples"]
+
+    later = NOW + timedelta(minutes=10)
+    db.conn.execute(
+        "INSERT INTO like_history (video_id, like_count, recorded_at) VALUES (?, ?, ?)",
+        ("v", 130, later.strftime("%Y-%m-%d %H:%M:%S.%f")),
+    )
+    db.conn.commit()
+    # 只读取重叠窗口内的少量采样
+    assert analytics.refresh(db, later) < samples
+    assert analytics.videos["v"]["samples"] == samples + 1
+    assert analytics.videos["v"]["likes"] == 130
+
+
+def test_expired_videos_are_forgotten(db):
+    """测试采样全部过期的作品不再占用编号"""
+    for video_id in ["old1", "old2", "old3"]:
+        _series(db, video_id, "acc", 60, NOW - timedelta(hours=2), NOW)
+    analytics = TrendAnalytics()
+    analytics.refresh(db, NOW)
+
+    later = NOW + timedelta(days=2)
+    _series(db, "new", "acc", 60, later - timedelta(hours=1), later)
+    analytics.refresh(db, later)
+
+    assert list(analytics.videos) == ["new"]
+    assert list(analytics._codes) == ["new"]
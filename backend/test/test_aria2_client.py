@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""aria2 JSON-RPC 客户端测试"""
+
+import pytest
+
+from backend.lib.aria2_client import Aria2Client, Aria2Error
+
+
+class _FakeResponse:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class _FakeSession:
+    """模拟 aria2 的 system.multicall 和 aria2.getVersion"""
+
+    def __init__(self):
+        self.payloads = []
+        self.down = False
+
+    def post(self, url, json, timeout):
+        if self.down:
+            raise ConnectionError("refused")
+        self.payloads.append(json)
+        if json["method"] == "aria2.getVersion":
+            return _FakeResponse({"id": json["id"], "result": {"version": "1.37.0"}})
+        results = []
+        for call in json["params"][0]:
+            uri = call["params"][1][0]
+            if uri.startswith("bad"):
+                results.append({"code": 1, "message": "invalid uri"})
+            else:
+                results.append([f"gid-{uri}"])
+        return _FakeResponse({"id": json["id"], "result": results})
+
+
+def _client(**kwargs):
+    client = Aria2Client(secret="s", **kwargs)
+    client.session = _FakeSession()
+    return client
+
+
+def test_multicall_batches_and_errors():
+    """测试按批大小拆分 multicall，并把单个调用的错误放在对应位置"""
+    client = _client(batch_size=2)
+    results = client.add_uris([("u1", {}), ("bad", {}), ("u3", {})])
+
+    assert results[0] == "gid-u1" and results[2] == "gid-u3"
+    assert isinstance(results[1], Aria2Error)
+    payloads = client.session.payloads
+    assert len(payloads) == 2
+    # 密钥只在每个子调用中，system.multicall 的参数只有调用列表
+    assert len(payloads[0]["params"]) == 1
+    assert payloads[0]["params"][0][0]["params"][0] == "token:s"
+
+
+def test_health_is_cached():
+    """测试健康状态在有效期内缓存，max_age=0 时立即检查"""
+    client = _client(health_ttl=60)
+    assert client.is_available()
+    client.session.down = True
+    assert client.is_available()
+    assert not client.is_available(max_age=0)
+    assert not client.is_available()
+
+    with pytest.raises(Aria2Error):
+        client.call("aria2.getVersion")
+
+
+def test_parse_notification():
+    """测试解析下载通知"""
+    client = _client()
+    message = '{"jsonrpc":"2.0","method":"aria2.onDownloadComplete","params":[{"gid":"g1"}]}'
+    assert client._parse_notification(message) == [("g1", "complete")]
+    assert client._parse_notification('{"method":"aria2.onUnknown","params":[]}') == []
+    assert client._parse_notification("not json") == []
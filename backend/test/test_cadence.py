@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""自适应轮询间隔测试"""
+
+from backend.monitor.cadence import CadencePlanner, build_queue
+
+
+def test_poll_queue_order_and_reschedule():
+    """测试按到期时间弹出，重新安排后旧条目失效"""
+    queue = build_queue(["a", "b", "c"], {"a": 300, "b": 100})
+    queue.schedule("b", 1000)
+
+    assert queue.pop_due(now=500) == ["c", "a"]
+    assert queue.next_due_at() == 1000
+    assert "b" in queue and len(queue) == 1
+    assert queue.pop_due(now=2000) == ["b"]
+    assert queue.next_due_at() is None
+
+
+def test_hot_accounts_polled_more_often():
+    """测试点赞增速越快轮询间隔越短，并限制在上下限之间"""
+    planner = CadencePlanner(min_interval=600, max_interval=21600, hot_hourly_likes=1000)
+    now = 1_000_000
+    base = {"post_count": 1, "last_post_time": now - 86400}
+
+    hot = planner.interval({**base, "max_hourly_likes": 5000}, now)
+    warm = planner.interval({**base, "max_hourly_likes": 200}, now)
+    cold = planner.interval({**base, "max_hourly_likes": 0}, now)
+
+    assert hot == 600
+    assert hot < warm < cold <= 21600
+
+
+def test_posting_cadence():
+    """测试经常发布的账号间隔短，长期不发布的账号间隔达到上限"""
+    planner = CadencePlanner(min_interval=600, max_interval=21600)
+    now = 1_000_000
+
+    frequent = planner.interval(
+        {"post_count": 9, "first_post_time": now - 8 * 7200, "last_post_time": now}, now
+    )
+    dormant = planner.interval({"post_count": 1, "last_post_time": now - 30 * 86400}, now)
+
+    assert frequent == 7200 / 4
+    assert dormant == 21600
+    assert planner.interval(None, now) == 21600
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""读连接池与单写线程测试"""
+
+import threading
+
+import pytest
+
+from backend.models import UserConfig
+from backend.storage.connection import ReadPool, WriterThread, connect
+from backend.storage.user_db import UserDatabase
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "test.db")
+    conn = connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value TEXT)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_failed_job_rolls_back_alone(db_path):
+    """测试同一批中失败的任务只回滚自己的修改"""
+    writer = WriterThread(connect(db_path))
+    gate = threading.Event()
+    blocker = writer.submit(lambda cursor: gate.wait(5))
+    ok = writer.submit(lambda cursor: cursor.execute("INSERT INTO t VALUES (1, 'a')"))
+
+    def failing(cursor):
+        cursor.execute("INSERT INTO t VALUES (2, 'b')")
+        raise RuntimeError("boom")
+
+    bad = writer.submit(failing)
+    committed = []
+    last = writer.submit(
+        lambda cursor: cursor.execute("INSERT INTO t VALUES (3, 'c')").rowcount,
+        on_commit=committed.append,
+    )
+    gate.set()
+
+    blocker.result(5)
+    ok.result(5)
+    with pytest.raises(RuntimeError):
+        bad.result(5)
+    assert last.result(5) == 1
+    assert committed == [1]
+    writer.stop()
+
+    pool = ReadPool(db_path)
+    with pool.connection() as conn:
+        assert [row[0] for row in conn.execute("SELECT id FROM t ORDER BY id")] == [1, 3]
+    pool.close()
+
+
+def test_reads_not_blocked_by_open_write(db_path):
+    """测试写事务未提交时读连接可以读取已提交的数据"""
+    writer = WriterThread(connect(db_path))
+    writer.execute(lambda cursor: cursor.execute("INSERT INTO t VALUES (1, 'a')"))
+    inside, release = threading.Event(), threading.Event()
+
+    def long_write(cursor):
+        cursor.execute("INSERT INTO t VALUES (2, 'b')")
+        inside.set()
+        release.wait(5)
+
+    future = writer.submit(long_write)
+    assert inside.wait(5)
+    pool = ReadPool(db_path, size=2)
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+        with pytest.raises(Exception):
+            conn.execute("INSERT INTO t VALUES (9, 'x')")
+    release.set()
+    future.result(5)
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 2
+    pool.close()
+    writer.stop()
+
+
+def test_concurrent_saves(tmp_path, monkeypatch):
+    """测试多个线程同时写入不会出现 database is locked"""
+    monkeypatch.setattr(
+        UserConfig, "get_user_data_dir", staticmethod(lambda user_id=None: str(tmp_path))
+    )
+    db = UserDatabase("tester")
+    errors = []
+
+    def save(n):
+        try:
+            for i in range(20):
+                video = {
+                    "id": f"v{n}-{i}",
+                    "desc": "",
+                    "time": 1700000000,
+                    "digg_count": i,
+                    "collect_count": 0,
+                    "comment_count": 0,
+                    "share_count": 0,
+                    "cover": "",
+                    "download_addr": "",
+                }
+                db.save_video_data(f"acc{n}", [video])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with db.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 160
+    db.close()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""已下载文件索引测试"""
+
+import os
+
+from backend.downloader.dedup import deduplicate, find_duplicates
+from backend.downloader.index import DownloadIndex, ErrorRecord, IndexRecord
+from backend.downloader.items import DownloadEntry
+
+
+def _write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_missing_skips_downloaded_files(tmp_path):
+    """测试跳过索引中的文件，补记已存在的完整文件，保留未完成和缺失的文件"""
+    index = DownloadIndex(str(tmp_path / "index.db"))
+    d = str(tmp_path / "videos")
+    os.makedirs(d)
+    entries = [DownloadEntry(f"https://a.com/{i}", d, f"{i}.mp4", str(i)) for i in range(4)]
+
+    _write(os.path.join(d, "0.mp4"), 10)
+    index.add(os.path.join(d, "0.mp4"), 10, "0")
+    _write(os.path.join(d, "1.mp4"), 20)  # 旧版本下载的完整文件
+    _write(os.path.join(d, "2.mp4"), 5)  # 下载到一半
+    _write(os.path.join(d, "2.mp4.aria2"), 1)
+
+    assert index.missing(entries) == entries[2:]
+    assert index.count() == 2
+
+    # 文件被删除后重新下载，失效的记录被清理
+    os.remove(os.path.join(d, "0.mp4"))
+    assert index.missing(entries) == [entries[0]] + entries[2:]
+    assert index.count() == 1
+    index.close()
+
+
+def test_missing_with_size_mismatch(tmp_path):
+    """测试索引中大小与磁盘不一致时重新下载"""
+    index = DownloadIndex(str(tmp_path / "index.db"))
+    entry = DownloadEntry("https://a.com/v", str(tmp_path), "v.mp4")
+    _write(entry.path, 10)
+    index.add(entry.path, 99)
+
+    assert index.missing([entry]) == [entry]
+    index.close()
+
+
+def test_links_same_media_from_other_target(tmp_path):
+    """测试同一作品的同一变体已下载到其他目录时直接链接，不再下载"""
+    index = DownloadIndex(str(tmp_path / "index.db"))
+    search, music = str(tmp_path / "search"), str(tmp_path / "music")
+    first = DownloadEntry("https://a.com/v", search, "1_desc.mp4", "1", "video")
+    os.makedirs(first.dir)
+    _write(first.path, 10)
+    index.add(first.path, 10, "1", "video")
+
+    second = DownloadEntry("https://b.com/v", music, "1_desc.mp4", "1", "video")
+    image = DownloadEntry("https://b.com/i", music, "1_1.jpeg", "1", "image_1")
+    assert index.missing([second, image]) == [image]
+    assert os.path.samefile(first.path, second.path)
+    assert index.missing([second], link=False) == []
+    index.close()
+
+
+def test_backfills_media_of_files_recorded_without_it(tmp_path):
+    """测试按 aria2 配置记入（没有作品ID）的文件，之后补上作品ID并可链接到其他目录"""
+    index = DownloadIndex(str(tmp_path / "index.db"))
+    search, music = str(tmp_path / "search"), str(tmp_path / "music")
+    first = DownloadEntry("https://a.com/v", search, "1_desc.mp4", "1", "video")
+    os.makedirs(first.dir)
+    _write(first.path, 10)
+    index.add(first.path, 10)
+    assert index.lookup(["1"]) == {}
+
+    # 没有作品ID的记录不覆盖已有的作品ID
+    assert index.missing([first]) == []
+    index.add(first.path, 10)
+    assert index.lookup(["1"])["1"]["files"][0]["variant"] == "video"
+
+    second = DownloadEntry("https://b.com/v", music, "1_desc.mp4", "1", "video")
+    assert index.missing([second]) == []
+    assert os.path.samefile(first.path, second.path)
+    index.close()
+
+
+def test_find_duplicates_and_deduplicate(tmp_path):
+    """测试按内容查找重复文件并替换为硬链接"""
+    files = {
+        "a/1.mp4": b"same" * 1000,
+        "b/1.mp4": b"same" * 1000,
+        "c/2.mp4": b"diff" * 1000,
+        "c/3.mp4": b"same" * 999 + b"diff",
+    }
+    for name, data in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(data)
+
+    groups = find_duplicates([str(tmp_path)])
+    assert [sorted(os.path.relpath(p, tmp_path) for p in group) for group in groups] == [
+        [os.path.join("a", "1.mp4"), os.path.join("b", "1.mp4")]
+    ]
+    assert deduplicate(groups, dry_run=False) == (1, 4000)
+    assert os.path.samefile(tmp_path / "a" / "1.mp4", tmp_path / "b" / "1.mp4")
+    # 已是硬链接的文件不再计入
+    assert find_duplicates([str(tmp_path)]) == []
+
+
+def test_lookup_files_and_errors(tmp_path):
+    """测试按作品ID批量查询下载完成的文件和失败记录"""
+    index = DownloadIndex(str(tmp_path / "index.db"))
+    index.add_errors([ErrorRecord("/d/1.mp4", "HTTP 403", "1", "video", 4)])
+    index.add_errors([ErrorRecord("/d/2.mp4", "timeout", "2", "video", 4)])
+    index.add_many([IndexRecord("/d/1.mp4", 10, "1", "video", 2.5)])
+
+    result = index.lookup(["1", "2", "3"])
+    assert set(result) == {"1", "2"}
+    assert result["1"]["downloaded"] and result["1"]["errors"] == []
+    assert result["1"]["files"][0]["size"] == 10 and result["1"]["files"][0]["duration"] == 2.5
+    assert not result["2"]["downloaded"]
+    assert result["2"]["errors"][0]["error"] == "timeout"
+    index.close()
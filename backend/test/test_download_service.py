@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""后端下载服务测试"""
+
+import asyncio
+
+from backend.downloader.aria2 import TransferState
+from backend.downloader.index import DownloadIndex
+from backend.downloader.items import DownloadEntry, DownloadStatus, build_entries
+from backend.downloader.service import DownloadService
+from backend.settings import settings
+
+
+class _FakeEngine:
+    """记录添加顺序，进度由测试直接设置"""
+
+    name = "fake"
+
+    def __init__(self):
+        self.added = []
+        self.states = {}
+        self.batches = []
+        self.polled = []
+        self.rejected = set()
+        self.notifications_connected = False
+
+    async def add_many(self, items):
+        self.batches.append(len(items))
+        results = []
+        for item in items:
+            if item.out in self.rejected:
+                results.append(ValueError("invalid uri"))
+                continue
+            engine_id = f"gid{len(self.added)}"
+            self.added.append(item.out)
+            self.states[engine_id] = TransferState(DownloadStatus.ACTIVE)
+            results.append(engine_id)
+        return results
+
+    async def poll(self, engine_ids):
+        self.polled.append(sorted(engine_ids))
+        return {engine_id: self.states[engine_id] for engine_id in engine_ids}
+
+    async def cancel(self, engine_id):
+        self.states[engine_id] = TransferState(DownloadStatus.CANCELLED)
+
+
+def _service(monkeypatch, concurrency=2, per_host=1, retries=1, progress_interval=0):
+    values = {
+        "maxConcurrency": concurrency,
+        "downloadPerHostConcurrency": per_host,
+        "maxRetries": retries,
+    }
+    monkeypatch.setattr(settings, "get", lambda key, default=None: values.get(key, default))
+    return DownloadService(engine=_FakeEngine(), progress_interval=progress_interval)
+
+
+def test_build_entries():
+    """测试视频和图文作品的下载项命名"""
+    results = [
+        {"id": "1", "desc": "video", "download_addr": "https://a.com/1.mp4"},
+        {"id": "2", "desc": "", "download_addr": ["https://b.com/1", "https://b.com/2"]},
+    ]
+    assert build_entries(results, "post", "/d") == [
+        DownloadEntry("https://a.com/1.mp4", "/d", "1_video.mp4", "1", "video"),
+        DownloadEntry("https://b.com/1", "/d/2_无标题", "2_1.jpeg", "2", "image_1"),
+        DownloadEntry("https://b.com/2", "/d/2_无标题", "2_2.jpeg", "2", "image_2"),
+    ]
+    assert build_entries(results, "following", "/d") == []
+
+
+def test_priority_and_per_host_limit(monkeypatch):
+    """测试按优先级派发，且同一主机不超过并发上限"""
+    service = _service(monkeypatch)
+    service.enqueue(
+        [DownloadEntry("https://a.com/1", "/d", "a1"), DownloadEntry("https://a.com/2", "/d", "a2")]
+    )
+    service.enqueue([DownloadEntry("https://b.com/1", "/d", "b1")], priority=5)
+
+    asyncio.run(service.tick())
+    assert service.engine.added == ["b1", "a1"]
+
+    # 完成 a1 后同一主机的 a2 才能开始
+    service.engine.states["gid1"] = TransferState(DownloadStatus.COMPLETE, 100, 100)
+    asyncio.run(service.tick())
+    assert service.engine.added == ["b1", "a1", "a2"]
+    assert service.stats()[DownloadStatus.COMPLETE] == 1
+
+
+def test_saturated_host_and_history_limit(monkeypatch):
+    """测试某个主机排满时其他主机照常派发，已结束的下载项每轮按上限清理"""
+    service = _service(monkeypatch, concurrency=3, per_host=1)
+    service.history_limit = 1
+    cdn = service.enqueue(
+        [DownloadEntry(f"https://cdn.com/{i}", "/d", f"c{i}") for i in range(50)], priority=5
+    )
+    service.enqueue([DownloadEntry("https://b.com/1", "/d", "b1")])
+    service.set_priority(cdn[-1].id, 9)
+
+    asyncio.run(service.tick())
+    assert service.engine.added == ["c49", "b1"]
+
+    for engine_id in ("gid0", "gid1"):
+        service.engine.states[engine_id] = TransferState(DownloadStatus.COMPLETE, 1, 1)
+    asyncio.run(service.tick())
+    assert service.engine.added == ["c49", "b1", "c0"]
+    assert service.stats()[DownloadStatus.COMPLETE] == 1
+    assert len(service.items) == 50
+
+
+def test_retry_then_fail_and_eta(monkeypatch):
+    """测试失败重试次数用完后标记失败，并按速度估算剩余时间"""
+    service = _service(monkeypatch, concurrency=1, retries=1)
+    (item,) = service.enqueue([DownloadEntry("https://a.com/1", "/d", "a1")])
+
+    asyncio.run(service.tick())
+    service.engine.states["gid0"] = TransferState(DownloadStatus.ACTIVE, 50, 150, speed=25)
+    asyncio.run(service.tick())
+    stats = service.stats()
+    assert stats["speed"] == 25 and stats["eta"] == 4
+
+    service.engine.states["gid0"] = TransferState(DownloadStatus.ERROR, error="boom")
+    asyncio.run(service.tick())
+    assert item.status == DownloadStatus.ACTIVE and item.attempts == 2
+
+    service.engine.states["gid1"] = TransferState(DownloadStatus.ERROR, error="boom")
+    asyncio.run(service.tick())
+    assert item.status == DownloadStatus.ERROR
+    assert service.engine.added == ["a1", "a1"]
+
+
+def test_batch_dispatch_and_rejected_items(monkeypatch):
+    """测试空闲名额一次批量派发，引擎拒绝的项按失败重试"""
+    service = _service(monkeypatch, concurrency=3, per_host=3, retries=0)
+    service.enqueue([DownloadEntry("https://a.com/%d" % i, "/d", "a%d" % i) for i in range(5)])
+    service.engine.rejected = {"a1"}
+
+    asyncio.run(service.tick())
+    assert service.engine.batches == [3]
+    assert service.engine.added == ["a0", "a2"]
+    assert service.stats()[DownloadStatus.ERROR] == 1
+
+    # 拒绝的项释放了名额，下一轮补上一个
+    asyncio.run(service.tick())
+    assert service.engine.batches == [3, 1]
+    assert service.engine.added == ["a0", "a2", "a3"]
+
+
+def test_notification_polls_only_finished(monkeypatch):
+    """测试已订阅通知时只查询收到通知的下载"""
+    service = _service(monkeypatch, concurrency=2, per_host=2, progress_interval=3600)
+    service.enqueue(
+        [DownloadEntry("https://a.com/1", "/d", "a1"), DownloadEntry("https://a.com/2", "/d", "a2")]
+    )
+    asyncio.run(service.tick())
+    service.engine.notifications_connected = True
+
+    asyncio.run(service.tick())
+    assert service.engine.polled == []
+
+    service.engine.states["gid1"] = TransferState(DownloadStatus.COMPLETE, 10, 10)
+    asyncio.run(service._on_engine_finished("gid1"))
+    asyncio.run(service.tick())
+    assert service.engine.polled == [["gid1"]]
+    assert service.stats()[DownloadStatus.COMPLETE] == 1
+
+
+def test_records_finished_items_in_index(monkeypatch, tmp_path):
+    """测试下载完成和最终失败的下载项记入下载索引"""
+    service = _service(monkeypatch, concurrency=2, per_host=2, retries=0)
+    service.index = DownloadIndex(str(tmp_path / "index.db"))
+    d = str(tmp_path)
+    service.enqueue(
+        [
+            DownloadEntry("https://a.com/1", d, "1.mp4", "1", "video"),
+            DownloadEntry("https://a.com/2", d, "2.mp4", "2", "video"),
+        ]
+    )
+    asyncio.run(service.tick())
+    (tmp_path / "1.mp4").write_bytes(b"x" * 5)
+    service.engine.states["gid0"] = TransferState(DownloadStatus.COMPLETE, 5, 5)
+    service.engine.states["gid1"] = TransferState(DownloadStatus.ERROR, error="HTTP 403")
+    asyncio.run(service.tick())
+
+    result = service.index.lookup(["1", "2"])
+    assert result["1"]["files"][0]["size"] == 5
+    assert result["1"]["files"][0]["duration"] is not None
+    assert result["2"]["errors"][0]["error"] == "HTTP 403"
+    service.index.close()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""监控扇出引擎测试"""
+
+import asyncio
+import threading
+import time
+
+from backend.monitor.fanout import FanoutEngine, FanoutStatus
+
+
+def test_concurrency_limit_and_statuses():
+    """测试并发上限、超时与失败状态"""
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def worker(item):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        try:
+            if item == "slow":
+                time.sleep(0.5)
+            elif item == "bad":
+                raise RuntimeError("boom")
+            else:
+                time.sleep(0.05)
+            return item
+        finally:
+            with lock:
+                running -= 1
+
+    statuses = {}
+    engine = FanoutEngine(concurrency=2, item_timeout=0.2, budget=10)
+    progress = asyncio.run(
+        engine.run(
+            ["a", "b", "c", "slow", "bad"],
+            worker,
+            on_item_done=lambda item, status, _: statuses.__setitem__(item, status),
+        )
+    )
+
+    assert peak <= 2
+    assert progress.done == 5
+    assert statuses["a"] == FanoutStatus.SUCCESS
+    assert statuses["slow"] == FanoutStatus.TIMEOUT
+    assert statuses["bad"] == FanoutStatus.FAILED
+
+
+def test_items_over_budget_are_skipped():
+    """测试超出整轮时间预算的采集项被跳过，并在结束时回报进度"""
+    reports = []
+
+    async def on_progress(progress):
+        reports.append(progress.to_dict())
+
+    engine = FanoutEngine(concurrency=1, item_timeout=1, budget=0.15)
+    progress = asyncio.run(
+        engine.run(range(5), lambda _: time.sleep(0.1), on_progress=on_progress)
+    )
+
+    assert progress.counts[FanoutStatus.SKIPPED] >= 2
+    assert reports[-1]["done"] == 5
+    assert reports[-1]["finished_at"] is not None
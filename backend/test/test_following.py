@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""关注列表快照同步测试"""
+
+import pytest
+
+from backend.monitor.following import FollowingFetcher, diff_snapshot
+
+
+def _user(sec_uid, nickname="n", follower_count=1):
+    """构造关注列表接口返回的原始用户数据"""
+    return {
+        "sec_uid": sec_uid,
+        "nickname": nickname,
+        "signature": "",
+        "avatar_thumb": {"url_list": ["https://example.com/a.jpg"]},
+        "follower_count": follower_count,
+    }
+
+
+class _FakeClient:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = 0
+
+    def fetch_awemes_list(self, type, target_id, max_cursor, logid, filters):
+        page = self.pages[self.calls]
+        self.calls += 1
+        return page, self.calls, logid, self.calls < len(self.pages)
+
+
+def test_diff_snapshot():
+    """测试新增、取消关注与资料变化"""
+    snapshot = {
+        "a": {"nickname": "A", "follower_count": 1},
+        "b": {"nickname": "B", "follower_count": 1},
+    }
+    accounts = [
+        {"sec_uid": "a", "nickname": "A", "follower_count": 1},
+        {"sec_uid": "c", "nickname": "C", "follower_count": 1},
+        {"sec_uid": "a", "nickname": "A", "follower_count": 1},
+    ]
+
+    diff = diff_snapshot(snapshot, accounts)
+    assert [account["sec_uid"] for account in diff.added] == ["c"]
+    assert diff.removed == ["b"]
+    assert diff.changed == []
+
+    accounts[0]["follower_count"] = 2
+    partial = diff_snapshot(snapshot, accounts[:1], complete=False)
+    assert partial.removed == []
+    assert [account["sec_uid"] for account in partial.changed] == ["a"]
+
+
+def test_fetch_head_skips_pinned_known_accounts():
+    """测试检查新关注时，置顶的已知账号之后的新关注也能发现，连续出现已知账号后不再翻页"""
+    pinned = {**_user("pinned"), "is_top": 1}
+    client = _FakeClient(
+        [
+            [pinned, _user("new1")],
+            [_user("new2"), _user("old")],
+            [_user("older")],
+            [_user("oldest")],
+        ]
+    )
+    fetcher = FollowingFetcher()
+    fetcher.client = client
+
+    added = fetcher.fetch_head("me", {"pinned", "old", "older", "oldest"}, max_pages=5, known_run=2)
+
+    assert [account["sec_uid"] for account in added] == ["new1", "new2"]
+    assert client.calls == 3
+
+
+class _FakeRequest:
+    """第一页正常，之后的请求都失败（getJSON 返回 {}）"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def getJSON(self, uri, params, data=None):
+        self.calls += 1
+        if self.calls == 1:
+            return {"followings": [_user("a"), _user("b")], "has_more": 1, "max_time": 100}
+        return {}
+
+
+def test_fetch_all_raises_on_failed_page():
+    """测试翻页中途请求失败时重试后抛出异常，不把不完整的列表当作完整列表"""
+    fetcher = FollowingFetcher(max_retry=2)
+    fetcher.client.request = _FakeRequest()
+
+    with pytest.raises(RuntimeError):
+        fetcher.fetch_all("me")
+    assert fetcher.client.request.calls == 3
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""增量采集测试"""
+
+import time
+
+from backend.monitor.incremental import IncrementalFetcher
+
+
+def _item(aweme_id, create_time, is_top=0):
+    """构造作品列表接口返回的原始作品数据"""
+    return {
+        "aweme_id": aweme_id,
+        "aweme_type": 4,
+        "create_time": create_time,
+        "is_top": is_top,
+        "desc": aweme_id,
+        "statistics": {"digg_count": 1, "collect_count": 0, "comment_count": 0, "share_count": 0},
+        "video": {
+            "play_addr": {"url_list": ["https://example.com/v.mp4"]},
+            "cover": {"url_list": ["https://example.com/c.jpg"]},
+            "duration": 1000,
+        },
+    }
+
+
+class _FakeClient:
+    """按页返回固定作品列表的客户端"""
+
+    def __init__(self, pages, details=None):
+        self.pages = pages
+        self.details = details or {}
+        self.list_calls = 0
+        self.detail_calls = 0
+
+    def fetch_awemes_list(self, type, target_id, max_cursor, logid, filters):
+        page = self.pages[self.list_calls]
+        self.list_calls += 1
+        if page is None:
+            # 请求失败：响应中没有列表和 has_more 字段
+            return [], max_cursor, logid, None
+        return page, self.list_calls, logid, self.list_calls < len(self.pages)
+
+    def fetch_aweme_detail(self, aweme_id):
+        self.detail_calls += 1
+        return self.details[aweme_id]
+
+
+def _fetcher(client):
+    fetcher = IncrementalFetcher(max_pages=5, detail_refresh_max=2)
+    fetcher.client = client
+    return fetcher
+
+
+def test_stops_at_known_items():
+    """测试遇到已知作品即停止翻页，只返回新作品和需要刷新的作品"""
+    now = int(time.time())
+    client = _FakeClient(
+        [
+            [_item("old-top", now - 30 * 86400, is_top=1), _item("new", now - 60), _item("known", now - 3600)],
+            [_item("older", now - 7200)],
+        ]
+    )
+    state = {"last_aweme_id": "known", "last_aweme_time": now - 3600}
+
+    result = _fetcher(client).fetch("sec", state, ["known"])
+
+    assert client.list_calls == 1
+    assert [v["id"] for v in result.new_videos] == ["new"]
+    assert [v["id"] for v in result.refreshed] == ["known"]
+    assert result.last_aweme_id == "new"
+
+
+def test_first_fetch_pages_until_window():
+    """测试首次采集翻页到统计窗口之外为止"""
+    now = int(time.time())
+    client = _FakeClient(
+        [
+            [_item("a", now - 60), _item("b", now - 86400)],
+            [_item("c", now - 2 * 86400), _item("d", now - 10 * 86400)],
+            [_item("e", now - 11 * 86400)],
+        ]
+    )
+
+    result = _fetcher(client).fetch("sec")
+
+    assert client.list_calls == 2
+    assert [v["id"] for v in result.new_videos] == ["a", "b", "c"]
+    assert result.last_aweme_time == now - 60
+
+
+def test_uncovered_targets_use_detail():
+    """测试列表页未覆盖的少量作品通过详情接口刷新"""
+    now = int(time.time())
+    client = _FakeClient(
+        [[_item("known", now - 60)], [_item("x", now - 120)]],
+        details={"hidden": _item("hidden", now - 86400)},
+    )
+    state = {"last_aweme_id": "known", "last_aweme_time": now - 60}
+
+    result = _fetcher(client).fetch("sec", state, ["known", "hidden"])
+
+    assert client.list_calls == 1
+    assert client.detail_calls == 1
+    assert {v["id"] for v in result.refreshed} == {"known", "hidden"}
+
+
+def test_failed_page_keeps_state():
+    """测试到达已知作品之前请求失败时保留增量状态，且不标记为完整覆盖"""
+    now = int(time.time())
+    state = {"last_aweme_id": "known", "last_aweme_time": now - 3600}
+
+    result = _fetcher(_FakeClient([None])).fetch("sec", state)
+    assert result.last_aweme_id == "known"
+    assert result.covered_since is None
+
+    client = _FakeClient([[_item("new", now - 60)], None])
+    result = _fetcher(client).fetch("sec", state)
+    assert client.list_calls == 2
+    assert [v["id"] for v in result.new_videos] == ["new"]
+    assert result.last_aweme_time == now - 3600
+    assert result.covered_since is None
+
+
+def test_detail_refresh_follows_target_order():
+    """测试超出详情刷新上限时按 refresh_targets 顺序刷新，其余留到下一轮"""
+    now = int(time.time())
+    details = {name: _item(name, now - 86400) for name in ["h1", "h2", "h3"]}
+    client = _FakeClient([[_item("known", now - 60)]], details=details)
+    state = {"last_aweme_id": "known", "last_aweme_time": now - 60}
+
+    result = _fetcher(client).fetch("sec", state, ["h3", "known", "h1", "h2"])
+
+    assert client.detail_calls == 2
+    assert [v["id"] for v in result.refreshed] == ["known", "h3", "h1"]
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""监控任务队列测试"""
+
+import time
+
+from backend.storage.job_queue import JobQueue, JobStatus
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    """测试待处理或处理中的账号不会重复加入"""
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    assert queue.enqueue("u", [("a", "A"), ("b", "B")]) == 2
+    assert queue.enqueue("u", [("a", "A")]) == 0
+
+    jobs = queue.claim("w1", 10, lease_seconds=60)
+    assert {job["account_id"] for job in jobs} == {"a", "b"}
+    assert queue.enqueue("u", [("a", "A")]) == 0
+
+    assert queue.complete("w1", jobs[0]["job_id"])
+    assert queue.enqueue("u", [(jobs[0]["account_id"], "")]) == 1
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    """测试进程崩溃（租约过期）后任务被其他进程接管"""
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    queue.enqueue("u", [("a", "A")])
+
+    [job] = queue.claim("w1", 1, lease_seconds=0.05)
+    assert queue.claim("w2", 1, lease_seconds=60) == []
+    time.sleep(0.1)
+
+    [reclaimed] = queue.claim("w2", 1, lease_seconds=60)
+    assert reclaimed["job_id"] == job["job_id"]
+    assert reclaimed["attempts"] == 2
+    # 原进程的租约已失效，无法再提交结果
+    assert not queue.complete("w1", job["job_id"])
+    assert queue.complete("w2", job["job_id"])
+    assert queue.stats()[JobStatus.DONE] == 1
+
+
+def test_failures_retry_then_fail(tmp_path):
+    """测试失败任务延迟重试，超过最大次数后标记失败"""
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=2)
+    queue.enqueue("u", [("a", "A")])
+
+    [job] = queue.claim("w", 1, lease_seconds=60)
+    queue.fail("w", job["job_id"], "boom", job["attempts"], retry_delay=0)
+    [job] = queue.claim("w", 1, lease_seconds=60)
+    queue.fail("w", job["job_id"], "boom", job["attempts"], retry_delay=0)
+
+    assert queue.claim("w", 1, lease_seconds=60) == []
+    assert queue.stats("u")[JobStatus.FAILED] == 1
+
+
+def test_static_shards_partition_jobs(tmp_path):
+    """测试静态分片互不重叠且覆盖全部任务"""
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    queue.enqueue("u", [(f"acc{i}", "") for i in range(20)])
+
+    shard0 = queue.claim("w0", 100, 60, shard=0, shards=2)
+    shard1 = queue.claim("w1", 100, 60, shard=1, shards=2)
+    ids0 = {job["account_id"] for job in shard0}
+    ids1 = {job["account_id"] for job in shard1}
+    assert not ids0 & ids1
+    assert len(ids0 | ids1) == 20
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""监控排行榜测试"""
+
+import sqlite3
+
+import pytest
+
+from backend.models import UserConfig
+from backend.storage.leaderboard import Leaderboard, decode_cursor
+from backend.storage.user_db import UserDatabase
+
+
+def _item(video_id, hourly, likes):
+    return {"video_id": video_id, "hourly_likes": hourly, "total_likes": likes}
+
+
+def test_cursor_pagination_and_upsert():
+    """测试游标分页与增量更新"""
+    board = Leaderboard()
+    board.rebuild(
+        [_item("a", 5, 100), _item("b", 9, 10), _item("c", 5, 200), _item("d", 0, 1)], 1
+    )
+
+    first, cursor = board.page(2)
+    assert [item["video_id"] for item in first] == ["b", "c"]
+    second, end = board.page(2, cursor)
+    assert [item["video_id"] for item in second] == ["a", "d"]
+    assert end is None
+
+    # 翻页期间排名变化：游标按排序键定位，不会重复返回
+    board.upsert([_item("d", 50, 1)])
+    rest, _ = board.page(10, cursor)
+    assert [item["video_id"] for item in rest] == ["a"]
+    assert [item["video_id"] for item in board.page(10)[0]] == ["d", "b", "c", "a"]
+    assert len(board) == 4
+
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        UserConfig, "get_user_data_dir", staticmethod(lambda user_id=None: str(tmp_path))
+    )
+    database = UserDatabase("tester")
+    yield database
+    database.close()
+
+
+def _video(video_id, likes):
+    return {
+        "id": video_id,
+        "desc": "",
+        "time": 0,
+        "digg_count": likes,
+        "collect_count": 0,
+        "comment_count": 0,
+        "share_count": 0,
+        "cover": "",
+    }
+
+
+def test_database_leaderboard(db, tmp_path):
+    """测试写入后增量更新，其他连接修改后重建"""
+    db.save_account("acc", "acc", "账号", 1)
+    db.save_video_data("acc", [_video("v1", 10), _video("v2", 30)])
+    assert [item["video_id"] for item in db.get_monitoring_data()] == ["v2", "v1"]
+
+    db.save_video_data("acc", [_video("v1", 50)])
+    assert db.get_leaderboard_page(1)[0][0]["total_likes"] == 50
+
+    other = sqlite3.connect(str(tmp_path / "monitor_data.db"))
+    other.execute("UPDATE videos SET hourly_likes = 99 WHERE video_id = 'v2'")
+    other.commit()
+    other.close()
+    assert db.get_leaderboard_page(1)[0][0]["video_id"] == "v2"
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""数据库结构迁移测试"""
+
+import sqlite3
+
+import pytest
+
+from backend.storage.migrations import (
+    LATEST_VERSION,
+    MIGRATIONS,
+    Migration,
+    get_version,
+    migrate,
+)
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def test_migrate_legacy_database(tmp_path):
+    """测试旧版本数据库（只有部分表，user_version 为 0）迁移到最新版本"""
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    conn.execute(
+        "CREATE TABLE like_history (video_id TEXT, like_count INTEGER, recorded_at TIMESTAMP, "
+        "PRIMARY KEY (video_id, recorded_at))"
+    )
+    conn.execute("INSERT INTO like_history VALUES ('v1', 10, '2024-01-01 00:00:00')")
+    conn.commit()
+
+    assert migrate(conn) == [m.version for m in MIGRATIONS]
+    assert get_version(conn) == LATEST_VERSION
+    assert {"comment_count", "share_count"} <= _columns(conn, "like_history")
+    assert "next_poll_at" in _columns(conn, "account_state")
+    assert conn.execute("SELECT like_count FROM like_history").fetchone() == (10,)
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert "idx_like_history_video_time" in indexes
+
+    # 再次执行不做任何事
+    assert migrate(conn) == []
+    conn.close()
+
+
+def test_failed_migration_rolls_back(tmp_path):
+    """测试迁移失败时整体回滚，版本号不变"""
+    conn = sqlite3.connect(str(tmp_path / "test.db"))
+
+    def broken(cursor):
+        cursor.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    migrations = MIGRATIONS[:1] + [Migration(2, "broken", broken)]
+    with pytest.raises(RuntimeError):
+        migrate(conn, migrations=migrations)
+    assert get_version(conn) == 1
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert "half_done" not in tables
+    conn.close()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""内置异步下载引擎测试"""
+
+import asyncio
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.downloader.items import (
+    DownloadEntry,
+    DownloadItem,
+    DownloadStatus,
+    read_input_file,
+)
+from backend.downloader.native import HttpDownloader, HttpEngine
+
+DATA = os.urandom(3 * 1024 * 1024 + 123)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """/file 支持 Range，/plain 不支持 Range 且使用分块编码，/redirect 跳转到 /file"""
+
+    protocol_version = "HTTP/1.1"
+    ranges = []
+
+    def do_GET(self):
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/file")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path == "/plain":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(DATA), 100000):
+                chunk = DATA[start : start + 100000]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            header = self.headers.get("Range")
+            _Handler.ranges.append(header)
+            start, _, end = header[len("bytes=") :].partition("-")
+            start, end = int(start), int(end or len(DATA) - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            try:
+                self.wfile.write(DATA[start : end + 1])
+            except ConnectionError:
+                pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.ranges = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _downloader():
+    return HttpDownloader(segments=4, min_segment_size=512 * 1024)
+
+
+def test_segmented_download_with_redirect(server, tmp_path):
+    """测试跟随重定向后按分段并行下载"""
+    path = str(tmp_path / "a" / "video.mp4")
+    asyncio.run(_downloader().fetch(f"{server}/redirect", path))
+
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert len(_Handler.ranges) == 4 and _Handler.ranges[0] == "bytes=0-"
+    assert not os.path.exists(path + ".part.json")
+
+
+def test_resume_from_state(server, tmp_path):
+    """测试从 .part 和进度文件继续下载，只请求缺少的部分"""
+    path = str(tmp_path / "video.mp4")
+    half = len(DATA) // 2
+    with open(path + ".part", "wb") as f:
+        f.write(DATA[:half] + bytes(len(DATA) - half))
+    with open(path + ".part.json", "w") as f:
+        json.dump({"total": len(DATA), "segments": [[0, len(DATA) - 1, half]]}, f)
+
+    asyncio.run(_downloader().fetch(f"{server}/file", path))
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert _Handler.ranges == [f"bytes={half}-{len(DATA) - 1}"]
+
+
+def test_state_without_part_and_local_errors(server, tmp_path):
+    """测试只剩进度文件时从头下载，本地写入失败只算该文件失败"""
+    path = str(tmp_path / "video.mp4")
+    with open(path + ".part.json", "w") as f:
+        json.dump({"total": len(DATA), "segments": [[0, len(DATA) - 1, 100]]}, f)
+
+    blocked = tmp_path / "blocked"
+    blocked.write_text("")  # 目录位置是普通文件，无法创建下载目录
+    entries = [
+        DownloadEntry(f"{server}/file", str(tmp_path), "video.mp4"),
+        DownloadEntry(f"{server}/file", str(blocked), "x.mp4"),
+    ]
+    assert asyncio.run(_downloader().fetch_all(entries, retries=0)) == (1, 1)
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+
+
+def test_server_without_range(server, tmp_path):
+    """测试服务器不支持 Range 时整个文件单连接下载"""
+    path = str(tmp_path / "plain.bin")
+    asyncio.run(_downloader().fetch(f"{server}/plain", path))
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+
+
+def test_engine_reports_completion(server, tmp_path):
+    """测试下载服务引擎在结束时通知并报告完成"""
+
+    async def run():
+        engine = HttpEngine(_downloader())
+        finished = asyncio.Queue()
+
+        async def on_finished(engine_id):
+            await finished.put(engine_id)
+
+        listener = asyncio.create_task(engine.listen(on_finished))
+        await asyncio.sleep(0)
+        item = DownloadItem(f"{server}/file", str(tmp_path), "v.mp4")
+        (engine_id,) = await engine.add_many([item])
+        assert await asyncio.wait_for(finished.get(), 10) == engine_id
+        state = (await engine.poll([engine_id]))[engine_id]
+        listener.cancel()
+        return state
+
+    state = asyncio.run(run())
+    assert state.status == DownloadStatus.COMPLETE
+    assert state.completed_length == state.total_length == len(DATA)
+
+
+def test_read_input_file(tmp_path):
+    """测试读取 aria2 输入文件"""
+    conf = tmp_path / "aria2.txt"
+    conf.write_text(
+        "https://a.com/1.mp4\n dir=/d\n out=1_video.mp4\n"
+        "# 注释\n"
+        "https://a.com/x/2.jpeg\thttps://mirror/2.jpeg\n",
+        encoding="utf-8",
+    )
+    assert read_input_file(str(conf), "/default") == [
+        DownloadEntry("https://a.com/1.mp4", "/d", "1_video.mp4"),
+        DownloadEntry("https://a.com/x/2.jpeg", "/default", "2.jpeg"),
+    ]
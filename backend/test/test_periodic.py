@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""周期监控调度测试"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.monitor import periodic
+from backend.monitor.periodic import CronExpression, MisfirePolicy, PeriodicScheduler, ScheduledJob
+
+
+def test_cron_next_after():
+    """测试 cron 表达式的下次触发时间"""
+    cron = CronExpression("*/15 8-18 * * 1-5")
+    # 2024-01-05 是周五
+    assert cron.next_after(datetime(2024, 1, 5, 9, 7)) == datetime(2024, 1, 5, 9, 15)
+    assert cron.next_after(datetime(2024, 1, 5, 18, 45)) == datetime(2024, 1, 8, 8, 0)
+
+    leap = CronExpression("0 0 29 2 *")
+    assert leap.next_after(datetime(2024, 3, 1)) == datetime(2028, 2, 29)
+
+    with pytest.raises(ValueError):
+        CronExpression("61 * * * *")
+
+
+def test_missed_runs_are_coalesced():
+    """测试错过的多次运行只补跑一次"""
+    now = datetime(2024, 1, 1, 12, 0)
+    job = ScheduledJob(
+        "u",
+        {"interval": 600, "jitter": 0, "last_run_at": (now - timedelta(hours=1)).isoformat()},
+    )
+    job.plan_next(now)
+    assert job.next_run_at == now
+    assert job.missed_runs == 5
+
+    job.plan_next(now)
+    assert job.next_run_at == now + timedelta(seconds=600)
+
+
+def test_missed_runs_skipped():
+    """测试 skip 策略等待下一个计划时间"""
+    now = datetime(2024, 1, 1, 12, 5)
+    job = ScheduledJob(
+        "u",
+        {
+            "cron": "0 * * * *",
+            "jitter": 0,
+            "misfire": MisfirePolicy.SKIP,
+            "last_run_at": datetime(2024, 1, 1, 9, 0).isoformat(),
+        },
+    )
+    job.plan_next(now)
+    assert job.next_run_at == datetime(2024, 1, 1, 13, 0)
+    assert job.missed_runs == 3
+
+
+def test_jitter_bounds():
+    """测试抖动范围"""
+    now = datetime(2024, 1, 1)
+    job = ScheduledJob("u", {"interval": 600, "jitter": 30})
+    job.plan_next(now)
+    assert now <= job.next_run_at <= now + timedelta(seconds=30)
+
+
+class _FakeUser:
+    """不读写磁盘的用户配置"""
+
+    access = True
+    saved = []
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.schedule = {"enabled": True, "interval": 600}
+
+    def has_valid_access(self):
+        return _FakeUser.access
+
+    def save(self):
+        _FakeUser.saved.append(self.schedule)
+
+
+class _FakeManager:
+    def __init__(self):
+        self.started = 0
+        self.is_running = False
+
+    def get_scheduler(self, user_id):
+        return self
+
+    async def start_task(self, user_id, cookie=""):
+        self.started += 1
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def fake_env(monkeypatch):
+    manager = _FakeManager()
+    _FakeUser.access, _FakeUser.saved = True, []
+    monkeypatch.setattr(periodic, "monitoring_manager", manager)
+    monkeypatch.setattr(periodic, "UserConfig", _FakeUser)
+    return manager
+
+
+def test_trigger_without_job_does_not_overlap(fake_env):
+    """测试没有计划的用户连续手动启动时只运行一次"""
+
+    async def run():
+        scheduler = PeriodicScheduler()
+        assert scheduler.trigger("u")
+        assert not scheduler.trigger("u")
+        await asyncio.sleep(0.05)
+        assert scheduler.trigger("u")
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert fake_env.started == 2
+
+
+def test_fire_disables_expired_user(fake_env):
+    """测试授权过期的用户不再定时运行，计划被停用"""
+
+    async def run():
+        scheduler = PeriodicScheduler()
+        job = ScheduledJob("u", {"interval": 600, "jitter": 0})
+        scheduler.jobs["u"] = job
+        _FakeUser.access = False
+        scheduler._fire(job, datetime.now())
+        await asyncio.sleep(0.05)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert fake_env.started == 0
+    assert "u" not in scheduler.jobs
+    assert _FakeUser.saved[-1]["enabled"] is False
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""共享采集线程池测试"""
+
+import threading
+
+from backend.monitor.pool import CrawlWorkerPool
+
+
+def _run_order(weights, submissions):
+    """单线程池中先阻塞住唯一的线程，排好队后放行，返回实际执行顺序"""
+    pool = CrawlWorkerPool(max_workers=1)
+    gate = threading.Event()
+    order = []
+
+    started = threading.Event()
+    pool.submit("blocker", lambda: (started.set(), gate.wait()))
+    assert started.wait(timeout=5)
+    for user_id, weight in weights.items():
+        pool.set_weight(user_id, weight)
+
+    futures = [
+        pool.submit(user_id, order.append, f"{user_id}{i}")
+        for user_id, count in submissions
+        for i in range(count)
+    ]
+    gate.set()
+    for future in futures:
+        future.result(timeout=5)
+    pool.shutdown()
+    return order
+
+
+def test_users_are_interleaved():
+    """测试任务多的用户不会饿死后提交的用户"""
+    order = _run_order({}, [("a", 4), ("b", 2)])
+    assert order == ["a0", "b0", "a1", "b1", "a2", "a3"]
+
+
+def test_weight_controls_share():
+    """测试权重决定每轮可执行的任务数"""
+    order = _run_order({"a": 2}, [("a", 4), ("b", 2)])
+    assert order == ["a0", "a1", "b0", "a2", "a3", "b1"]
+
+
+def test_cancel_user_drops_pending():
+    """测试取消用户时丢弃其排队中的任务"""
+    pool = CrawlWorkerPool(max_workers=1)
+    gate = threading.Event()
+    started = threading.Event()
+    pool.submit("a", lambda: (started.set(), gate.wait()))
+    assert started.wait(timeout=5)
+    pending = [pool.submit("a", lambda: None) for _ in range(3)]
+
+    assert pool.cancel_user("a") == 3
+    assert all(future.cancelled() for future in pending)
+    gate.set()
+    pool.shutdown()
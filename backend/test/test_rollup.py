@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""点赞历史降采样测试"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import UserConfig
+from backend.storage.rollup import HOURLY_WATERMARK_KEY, RollupEngine
+from backend.storage.user_db import UserDatabase
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        UserConfig, "get_user_data_dir", staticmethod(lambda user_id=None: str(tmp_path))
+    )
+    database = UserDatabase("tester")
+    yield database
+    database.close()
+
+
+NOW = datetime(2026, 3, 10, 12, 30)
+
+
+def _record(db, video_id, likes, at):
+    db.conn.execute(
+        "INSERT INTO like_history (video_id, like_count, recorded_at) VALUES (?, ?, ?)",
+        (video_id, likes, at.strftime("%Y-%m-%d %H:%M:%S.%f")),
+    )
+    db.conn.commit()
+
+
+def _count(db, table):
+    return db.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_rollup_and_retention(db):
+    """测试逐级汇总、水位线和保留期清理"""
+    # 三天前到现在每 20 分钟一条记录
+    at = NOW - timedelta(days=3)
+    likes = 0
+    while at <= NOW:
+        likes += 10
+        _record(db, "v", likes, at)
+        at += timedelta(minutes=20)
+    total = _count(db, "like_history")
+
+    engine = RollupEngine(db, raw_retention_hours=24, hourly_retention_days=1, chunk_hours=5)
+    stats = engine.run(NOW)
+
+    assert db.get_meta(HOURLY_WATERMARK_KEY) == "2026-03-10 12:00:00"
+    # 早于保留期且已汇总的原始记录被删除，当前小时的记录保留
+    assert stats["deleted_raw"] == total - _count(db, "like_history")
+    oldest_raw = db.conn.execute("SELECT MIN(recorded_at) FROM like_history").fetchone()[0]
+    assert oldest_raw >= "2026-03-09 12:30:00"
+    # 已结束的日期汇总到每日表，对应的小时汇总超过保留期后删除
+    assert _count(db, "like_history_daily") == 3
+    oldest_hour = db.conn.execute("SELECT MIN(bucket) FROM like_history_hourly").fetchone()[0]
+    assert oldest_hour == "2026-03-09 00:00:00"
+
+    day = db.conn.execute(
+        "SELECT min_likes, max_likes, last_likes, samples FROM like_history_daily "
+        "WHERE bucket = '2026-03-08'"
+    ).fetchone()
+    assert day[3] == 72 and day[2] == day[1] and day[1] - day[0] == 710
+
+    # 再次运行不会重复汇总
+    assert engine.run(NOW)["hourly"] == 0
+    assert _count(db, "like_history_daily") == 3
+
+
+def test_trend_merges_sources(db):
+    """测试趋势查询合并汇总表与未汇总的原始记录"""
+    for minutes, likes in ((0, 10), (20, 20), (40, 30), (60, 40), (80, 50)):
+        _record(db, "v", likes, NOW - timedelta(hours=2) + timedelta(minutes=minutes))
+    RollupEngine(db).run(NOW - timedelta(minutes=40))
+    _record(db, "v", 60, NOW)
+
+    points = RollupEngine(db).trend("v", NOW - timedelta(hours=3), NOW + timedelta(minutes=1))
+    assert [(p["time"], p["likes"], p["samples"]) for p in points] == [
+        ("2026-03-10 10:00:00", 20, 2),
+        ("2026-03-10 11:00:00", 50, 3),
+        ("2026-03-10 12:00:00", 60, 1),
+    ]
+
+    days = RollupEngine(db).trend(
+        "v", NOW - timedelta(days=10), NOW + timedelta(minutes=1), resolution="day"
+    )
+    assert [(p["time"], p["likes"], p["min_likes"], p["samples"]) for p in days] == [
+        ("2026-03-10", 60, 10, 6)
+    ]
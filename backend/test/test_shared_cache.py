@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""跨用户共享作品缓存测试"""
+
+import time
+
+from backend.monitor.incremental import IncrementalFetcher
+from backend.storage.shared_cache import SharedVideoCache
+
+
+def _item(aweme_id, create_time):
+    """构造作品列表接口返回的原始作品数据"""
+    return {
+        "aweme_id": aweme_id,
+        "aweme_type": 4,
+        "create_time": create_time,
+        "is_top": 0,
+        "desc": aweme_id,
+        "statistics": {"digg_count": 1, "collect_count": 0, "comment_count": 0, "share_count": 0},
+        "video": {
+            "play_addr": {"url_list": ["https://example.com/v.mp4"]},
+            "cover": {"url_list": ["https://example.com/c.jpg"]},
+            "duration": 1000,
+        },
+    }
+
+
+class _FakeClient:
+    """每次请求都返回同一页作品"""
+
+    def __init__(self, page):
+        self.page = page
+        self.list_calls = 0
+
+    def fetch_awemes_list(self, type, target_id, max_cursor, logid, filters):
+        self.list_calls += 1
+        return self.page, 0, logid, False
+
+
+def _fetcher(client):
+    fetcher = IncrementalFetcher()
+    fetcher.client = client
+    return fetcher
+
+
+def test_second_user_served_from_cache(tmp_path):
+    """测试第二个用户采集同一账号时命中缓存，并按自己的增量状态划分作品"""
+    now = int(time.time())
+    cache = SharedVideoCache(str(tmp_path / "shared.db"))
+    client = _FakeClient([_item("new", now - 60), _item("known", now - 3600)])
+
+    first = _fetcher(client).fetch_shared("sec", None, [], cache, ttl=300)
+    assert not first.cached
+    assert sorted(v["id"] for v in first.new_videos) == ["known", "new"]
+
+    state = {"last_aweme_id": "known", "last_aweme_time": now - 3600}
+    second = _fetcher(client).fetch_shared("sec", state, ["known"], cache, ttl=300)
+    assert second.cached
+    assert client.list_calls == 1
+    assert [v["id"] for v in second.new_videos] == ["new"]
+    assert [v["id"] for v in second.refreshed] == ["known"]
+    assert second.last_aweme_id == "new"
+    assert cache.stats()["hits"] == 1
+    cache.close()
+
+
+def test_cache_miss_when_stale_or_not_covered(tmp_path):
+    """测试缓存过期、覆盖范围不足或缺少刷新目标时重新采集"""
+    now = time.time()
+    cache = SharedVideoCache(str(tmp_path / "shared.db"))
+    video = {"id": "v1", "time": int(now) - 600}
+    # 只覆盖了最近 1000 秒发布的作品
+    cache.put("sec", [video], covered_since=int(now) - 1000, cutoff=0, now=now)
+
+    assert cache.get("sec", int(now) - 1000, [], ttl=300, now=now) == [video]
+    assert cache.get("sec", int(now) - 5000, [], ttl=300, now=now) is None
+    assert cache.get("sec", int(now) - 1000, ["v0"], ttl=300, now=now) is None
+    assert cache.get("sec", int(now) - 1000, [], ttl=300, now=now + 600) is None
+
+    # 没有完整覆盖的采集只更新作品数据
+    cache.put("other", [video], covered_since=None, cutoff=0, now=now)
+    assert cache.get("other", 0, [], ttl=300, now=now) is None
+    cache.close()
+
+
+def test_crawl_locks_released(tmp_path):
+    """测试采集结束后不再保留账号的采集锁"""
+    cache = SharedVideoCache(str(tmp_path / "shared_cache.db"))
+    with cache.crawl_lock("sec"):
+        assert len(cache._crawl_locks) == 1
+    assert len(cache._crawl_locks) == 0
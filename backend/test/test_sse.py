@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""SSE 事件管理测试"""
+
+import asyncio
+
+from backend.sse import SSEEventType, SSEManager
+
+
+async def _collect(gen, count):
+    """从 SSE 生成器中读取指定数量的消息"""
+    messages = []
+    for _ in range(count):
+        messages.append(await gen.__anext__())
+    await gen.aclose()
+    return messages
+
+
+def test_event_ids_are_monotonic():
+    """测试事件 ID 单调递增"""
+    manager = SSEManager()
+    manager.broadcast_sync(SSEEventType.LOG, {"message": "a"})
+    manager.broadcast_sync(SSEEventType.LOG, {"message": "b"})
+    assert manager.last_event_id == 2
+
+
+def test_replay_after_last_event_id():
+    """测试按 Last-Event-ID 补发断线期间的事件"""
+    manager = SSEManager(batch_window=0)
+    for i in range(5):
+        manager.broadcast_sync(SSEEventType.TASK_RESULT, {"task_id": "t", "n": i})
+
+    messages = asyncio.run(_collect(manager.connect("3"), 3))
+    assert messages[0] == ": ping\n\n"
+    assert messages[1].startswith("id: 4\n")
+    assert messages[2].startswith("id: 5\n")
+
+
+def test_resync_when_buffer_overflowed():
+    """测试重放缓冲区无法覆盖时发送 resync 事件"""
+    manager = SSEManager(buffer_size=2)
+    for i in range(5):
+        manager.broadcast_sync(SSEEventType.LOG, {"n": i})
+
+    messages = asyncio.run(_collect(manager.connect("1"), 2))
+    assert f"event: {SSEEventType.RESYNC}" in messages[1]
+
+
+def test_subscription_routing():
+    """测试按任务 ID 和事件类型路由事件"""
+
+    async def run():
+        manager = SSEManager(batch_window=0)
+        task_gen = manager.connect(task_ids=["t1"])
+        log_gen = manager.connect(event_types=[SSEEventType.LOG])
+        # 读取初始 ping，完成订阅注册
+        await task_gen.__anext__()
+        await log_gen.__anext__()
+
+        manager.broadcast_sync(SSEEventType.TASK_RESULT, {"task_id": "t2"})
+        manager.broadcast_sync(SSEEventType.TASK_RESULT, {"task_id": "t1"})
+        manager.broadcast_sync(SSEEventType.LOG, {"message": "hello"})
+
+        task_messages = [await task_gen.__anext__(), await task_gen.__anext__()]
+        log_message = await log_gen.__anext__()
+        await task_gen.aclose()
+        await log_gen.aclose()
+        return manager, task_messages, log_message
+
+    manager, task_messages, log_message = asyncio.run(run())
+    assert '"task_id": "t1"' in task_messages[0]
+    assert f"event: {SSEEventType.LOG}" in task_messages[1]
+    assert f"event: {SSEEventType.LOG}" in log_message
+    assert manager.client_count == 0
+
+
+def test_task_results_are_coalesced():
+    """测试合并窗口内的采集结果合并为一个事件，且排在任务完成状态之前"""
+    manager = SSEManager(batch_window=60)
+    manager.broadcast_sync(
+        SSEEventType.TASK_RESULT, {"task_id": "t", "data": [1, 2], "total": 2}
+    )
+    manager.broadcast_sync(
+        SSEEventType.TASK_RESULT, {"task_id": "t", "data": [3], "total": 3}
+    )
+    assert manager.last_event_id == 0
+
+    manager.broadcast_sync(SSEEventType.TASK_STATUS, {"task_id": "t", "status": "ok"})
+    messages = asyncio.run(_collect(manager.connect("0"), 3))
+    assert messages[1].startswith("id: 1\nevent: task_result")
+    assert '"data": [1, 2, 3], "total": 3' in messages[1]
+    assert f"event: {SSEEventType.TASK_STATUS}" in messages[2]
+
+
+def test_batch_flushes_at_max_items():
+    """测试累计条数达到上限时立即发送"""
+    manager = SSEManager(batch_window=60, batch_max_items=3)
+    manager.broadcast_sync(SSEEventType.TASK_RESULT, {"task_id": "t", "data": [1, 2]})
+    assert manager.last_event_id == 0
+    manager.broadcast_sync(SSEEventType.TASK_RESULT, {"task_id": "t", "data": [3]})
+    assert manager.last_event_id == 1
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""用户数据库写入测试"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import UserConfig
+from backend.storage.user_db import UserDatabase
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        UserConfig, "get_user_data_dir", staticmethod(lambda user_id=None: str(tmp_path))
+    )
+    database = UserDatabase("tester")
+    yield database
+    database.close()
+
+
+def _video(video_id, likes):
+    return {
+        "id": video_id,
+        "desc": "desc",
+        "time": 1700000000,
+        "digg_count": likes,
+        "collect_count": 1,
+        "comment_count": 2,
+        "share_count": 3,
+        "cover": "https://example.com/c.jpg",
+        "download_addr": "https://example.com/v.mp4",
+    }
+
+
+def _hourly(db, video_id):
+    return db.conn.execute(
+        "SELECT like_count, hourly_likes FROM videos WHERE video_id = ?", (video_id,)
+    ).fetchone()
+
+
+def test_wal_mode(db):
+    """测试数据库以 WAL 模式打开"""
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_save_video_data_upsert(db):
+    """测试批量写入、更新与近一小时点赞增量"""
+    db.save_video_data("acc", [_video("v1", 100), _video("v2", 5)])
+    assert _hourly(db, "v1") == (100, 0)
+
+    # 一小时内的历史记录作为基准，一小时前的记录不参与计算
+    db.conn.execute(
+        "UPDATE like_history SET recorded_at = ? WHERE video_id = 'v1'",
+        (datetime.now() - timedelta(minutes=30),),
+    )
+    db.conn.execute(
+        "UPDATE like_history SET recorded_at = ? WHERE video_id = 'v2'",
+        (datetime.now() - timedelta(hours=2),),
+    )
+    db.conn.commit()
+
+    db.save_video_data("acc", [_video("v1", 160), _video("v2", 50)])
+    assert _hourly(db, "v1") == (160, 60)
+    assert _hourly(db, "v2") == (50, 0)
+    assert db.conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 2
+    assert db.conn.execute("SELECT COUNT(*) FROM like_history").fetchone()[0] == 4
+
+
+def test_hourly_deltas_batch(db):
+    """测试窗口函数批量计算小时增量"""
+    now = datetime.now()
+    db.conn.executemany(
+        "INSERT INTO like_history (video_id, like_count, recorded_at) VALUES (?, ?, ?)",
+        [
+            ("a", 10, now - timedelta(hours=2)),
+            ("a", 40, now - timedelta(minutes=50)),
+            ("a", 90, now - timedelta(minutes=10)),
+            ("a", 100, now),
+            ("b", 7, now),
+        ],
+    )
+    deltas = db.hourly_deltas(db.conn.cursor(), ["a", "b", "c"], now - timedelta(hours=1))
+    assert deltas == {"a": 60, "b": 0}
+
+
+def test_shared_database_uses_rollback_journal(tmp_path, monkeypatch):
+    """测试多台机器共享的数据库不使用 WAL"""
+    monkeypatch.setattr(
+        UserConfig, "get_user_data_dir", staticmethod(lambda user_id=None: str(tmp_path))
+    )
+    database = UserDatabase("tester", shared=True)
+    assert database.conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    database.save_video_data("a1", [_video("v1", 10)])
+    assert _hourly(database, "v1")[0] == 10
+    database.close()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""WebSocket 事件通道测试"""
+
+import msgpack
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from backend.sse import SSEEventType, SSEManager
+from backend.ws import WebSocketChannel
+
+
+def _create_client(manager: SSEManager) -> TestClient:
+    """创建挂载 WebSocket 通道的测试应用"""
+    app = FastAPI()
+    channel = WebSocketChannel(manager)
+
+    @app.websocket("/api/ws")
+    async def endpoint(websocket: WebSocket):
+        await channel.handle(websocket)
+
+    return TestClient(app)
+
+
+def test_msgpack_events_and_subscription():
+    """测试 msgpack 帧、订阅过滤与确认"""
+    manager = SSEManager(batch_window=0)
+    client = _create_client(manager)
+
+    with client.websocket_connect("/api/ws?task_id=t1&window=1") as ws:
+        subscribed = msgpack.unpackb(ws.receive_bytes())
+        assert subscribed["op"] == "subscribed"
+        assert subscribed["task_ids"] == ["t1"]
+
+        manager.broadcast_sync(SSEEventType.TASK_STATUS, {"task_id": "t2"})
+        manager.broadcast_sync(SSEEventType.TASK_STATUS, {"task_id": "t1", "n": 1})
+        manager.broadcast_sync(SSEEventType.TASK_STATUS, {"task_id": "t1", "n": 2})
+
+        first = msgpack.unpackb(ws.receive_bytes())
+        assert first["op"] == "event"
+        assert first["data"] == {"task_id": "t1", "n": 1}
+
+        # 窗口为 1，确认后才会收到下一条
+        ws.send_bytes(msgpack.packb({"op": "ack", "id": first["id"]}))
+        second = msgpack.unpackb(ws.receive_bytes())
+        assert second["data"]["n"] == 2
+
+
+def test_json_codec_and_resubscribe():
+    """测试 JSON 文本帧与修改订阅"""
+    manager = SSEManager(batch_window=0)
+    client = _create_client(manager)
+
+    with client.websocket_connect("/api/ws?codec=json") as ws:
+        assert ws.receive_json()["op"] == "subscribed"
+
+        ws.send_json({"op": "subscribe", "types": [SSEEventType.LOG]})
+        assert ws.receive_json()["types"] == [SSEEventType.LOG]
+
+        manager.broadcast_sync(SSEEventType.TASK_STATUS, {"task_id": "t1"})
+        manager.broadcast_sync(SSEEventType.LOG, {"message": "hello"})
+        event = ws.receive_json()
+        assert event["type"] == SSEEventType.LOG
+        assert event["data"] == {"message": "hello"}
+
+
+def test_invalid_codec_and_subscribe_payload():
+    """测试未知编码退化为 JSON，订阅条件格式错误时回复错误而不断开"""
+    manager = SSEManager(batch_window=0)
+    client = _create_client(manager)
+
+    with client.websocket_connect("/api/ws?codec=xml") as ws:
+        assert ws.receive_json()["op"] == "subscribed"
+
+        ws.send_json({"op": "subscribe", "types": "log"})
+        assert ws.receive_json()["op"] == "error"
+        ws.send_json({"op": "subscribe", "task_ids": [1]})
+        assert ws.receive_json()["op"] == "error"
+
+        ws.send_json({"op": "ping"})
+        assert ws.receive_json()["op"] == "pong"
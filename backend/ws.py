@@ -0,0 +1,301 @@
+"""
+WebSocket 事件通道
+
+与 SSE 推送相同的事件（task_result、task_status、task_error、log 等），
+但使用 msgpack 二进制帧，适合大量采集结果的推送场景：
+- 客户端可以随时修改订阅条件
+- 客户端通过确认（ack）实现流量控制，未确认的事件达到窗口上限时暂停发送
+- 断线重连时可携带 last_event_id 补发错过的事件
+
+未安装 msgpack 时自动退化为 JSON 文本帧。
+
+客户端 -> 服务端消息:
+    {"op": "subscribe", "types": [...], "task_ids": [...], "user_ids": [...]}
+    {"op": "ack", "id": 123}        确认 ID 小于等于 123 的全部事件
+    {"op": "window", "size": 256}   调整流量控制窗口
+    {"op": "ping"}
+
+服务端 -> 客户端消息:
+    {"op": "event", "id": 1, "type": "task_result", "data": {...}}
+    {"op": "subscribed", "types": [...], "task_ids": [...], "user_ids": [...]}
+    {"op": "resync", "last_event_id": "...", "current_event_id": 10}
+    {"op": "pong"} / {"op": "ping"} / {"op": "error", "message": "..."}
+"""
+
+import asyncio
+import json
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+from loguru import logger
+
+from .constants import SSE_DEFAULTS, WS_DEFAULTS
+from .sse import SSEEvent, SSEManager, SSESubscription, sse
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 依赖缺失时退化为 JSON
+    msgpack = None
+
+
+class WSCodec:
+    """WebSocket 帧编码方式"""
+
+    MSGPACK = "msgpack"
+    JSON = "json"
+    ALL = (MSGPACK, JSON)
+
+
+class WebSocketSession:
+    """
+    单个 WebSocket 连接
+
+    发送协程从订阅队列取事件并按流量控制窗口发送，接收协程处理订阅变更与确认。
+    """
+
+    def __init__(
+        self, websocket: WebSocket, manager: SSEManager, codec: str, window: int
+    ) -> None:
+        self.websocket = websocket
+        self.manager = manager
+        self.codec = codec
+        self.window = window
+        self.subscription: Optional[SSESubscription] = None
+
+        # 已发送但未确认的事件 ID
+        self._unacked: Deque[int] = deque()
+        self._window_open = asyncio.Event()
+        self._window_open.set()
+
+    async def run(self, last_event_id: Optional[str], filters: Dict[str, List[str]]):
+        """运行会话直到连接关闭"""
+        self.subscription = SSESubscription(
+            filters.get("types"), filters.get("task_ids"), filters.get("user_ids")
+        )
+        replay, gap = self.manager.subscribe(self.subscription, last_event_id)
+
+        try:
+            if gap:
+                await self._send(
+                    {
+                        "op": "resync",
+                        "last_event_id": last_event_id,
+                        "current_event_id": self.manager.last_event_id,
+                    }
+                )
+            await self._send_subscribed()
+
+            sender = asyncio.create_task(self._send_loop(replay))
+            try:
+                await self._receive_loop()
+            finally:
+                sender.cancel()
+                try:
+                    await sender
+                except (asyncio.CancelledError, WebSocketDisconnect):
+                    pass
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.manager.unsubscribe(self.subscription)
+
+    async def _send_loop(self, replay: List[SSEEvent]) -> None:
+        """按流量控制窗口发送事件"""
+        for event in replay:
+            await self._send_event(event)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    self.subscription.queue.get(),
+                    timeout=SSE_DEFAULTS["HEARTBEAT_INTERVAL"],
+                )
+            except asyncio.TimeoutError:
+                await self._send({"op": "ping"})
+                continue
+            await self._send_event(event)
+
+    async def _send_event(self, event: SSEEvent) -> None:
+        """等待窗口可用后发送事件"""
+        await self._window_open.wait()
+
+        frame = event.encoded(self.codec, self._encode_event)
+        if self.codec == WSCodec.MSGPACK:
+            await self.websocket.send_bytes(frame)
+        else:
+            await self.websocket.send_text(frame)
+
+        self._unacked.append(event.id)
+        self._update_window()
+
+    async def _receive_loop(self) -> None:
+        """处理客户端消息"""
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            try:
+                payload = self._decode(message)
+            except Exception as e:
+                await self._send({"op": "error", "message": f"无法解析消息: {e}"})
+                continue
+
+            if not isinstance(payload, dict):
+                await self._send({"op": "error", "message": "消息必须是对象"})
+                continue
+
+            await self._handle(payload)
+
+    async def _handle(self, payload: Dict[str, Any]) -> None:
+        """处理单条客户端消息"""
+        op = payload.get("op")
+
+        if op == "ack":
+            self._ack(payload.get("id"))
+        elif op == "subscribe":
+            filters = {}
+            for key in ("types", "task_ids", "user_ids"):
+                value = payload.get(key)
+                if value is not None and not (
+                    isinstance(value, list) and all(isinstance(item, str) for item in value)
+                ):
+                    await self._send({"op": "error", "message": f"{key} 必须是字符串列表"})
+                    return
+                filters[key] = value
+            self.manager.update_subscription(
+                self.subscription,
+                event_types=filters["types"],
+                task_ids=filters["task_ids"],
+                user_ids=filters["user_ids"],
+            )
+            await self._send_subscribed()
+        elif op == "window":
+            size = payload.get("size")
+            if isinstance(size, int) and size > 0:
+                self.window = min(size, WS_DEFAULTS["MAX_WINDOW"])
+                self._update_window()
+        elif op == "ping":
+            await self._send({"op": "pong"})
+        elif op == "pong":
+            pass
+        else:
+            await self._send({"op": "error", "message": f"未知操作: {op}"})
+
+    def _ack(self, event_id: Any) -> None:
+        """确认 ID 小于等于 event_id 的全部事件"""
+        if not isinstance(event_id, int):
+            return
+        while self._unacked and self._unacked[0] <= event_id:
+            self._unacked.popleft()
+        self._update_window()
+
+    def _update_window(self) -> None:
+        """根据未确认事件数量开关发送窗口"""
+        if len(self._unacked) < self.window:
+            self._window_open.set()
+        else:
+            self._window_open.clear()
+
+    async def _send_subscribed(self) -> None:
+        """回复当前生效的订阅条件"""
+        await self._send(
+            {
+                "op": "subscribed",
+                "types": sorted(self.subscription.event_types),
+                "task_ids": sorted(self.subscription.task_ids),
+                "user_ids": sorted(self.subscription.user_ids),
+                "window": self.window,
+            }
+        )
+
+    async def _send(self, payload: Dict[str, Any]) -> None:
+        """发送控制消息"""
+        if self.codec == WSCodec.MSGPACK:
+            await self.websocket.send_bytes(msgpack.packb(payload, use_bin_type=True))
+        else:
+            await self.websocket.send_text(json.dumps(payload, ensure_ascii=False))
+
+    def _encode_event(self, event: SSEEvent) -> Any:
+        """编码事件帧，结果缓存在事件上供所有同编码的连接复用"""
+        if self.codec == WSCodec.MSGPACK:
+            return msgpack.packb(
+                {
+                    "op": "event",
+                    "id": event.id,
+                    "type": event.event_type,
+                    "data": event.data,
+                },
+                use_bin_type=True,
+            )
+        # 复用 SSE 已经序列化好的 JSON 数据
+        return (
+            f'{{"op": "event", "id": {event.id}, '
+            f'"type": {json.dumps(event.event_type)}, "data": {event.json_data}}}'
+        )
+
+    def _decode(self, message: Dict[str, Any]) -> Any:
+        """解码客户端消息，二进制帧按 msgpack、文本帧按 JSON 解析"""
+        if message.get("bytes") is not None:
+            if msgpack is None:
+                raise ValueError("服务端未安装 msgpack")
+            return msgpack.unpackb(message["bytes"], raw=False)
+        return json.loads(message.get("text") or "")
+
+
+class WebSocketChannel:
+    """WebSocket 事件通道，复用 SSE 管理器的事件发布、订阅索引与重放缓冲区"""
+
+    def __init__(self, manager: SSEManager) -> None:
+        self.manager = manager
+
+    async def handle(self, websocket: WebSocket) -> None:
+        """
+        处理 WebSocket 连接
+
+        查询参数:
+        - codec: msgpack（默认）或 json
+        - window: 流量控制窗口（未确认事件上限）
+        - last_event_id: 断线补发起点
+        - types / task_id / user_id: 初始订阅条件，逗号分隔
+        """
+        params = websocket.query_params
+        codec = params.get("codec", WSCodec.MSGPACK)
+        if codec not in WSCodec.ALL:
+            logger.warning(f"[WS] 未知编码 {codec}，使用 JSON 文本帧")
+            codec = WSCodec.JSON
+        if codec != WSCodec.JSON and msgpack is None:
+            logger.warning("[WS] 未安装 msgpack，使用 JSON 文本帧")
+            codec = WSCodec.JSON
+
+        try:
+            window = int(params.get("window", WS_DEFAULTS["WINDOW"]))
+        except ValueError:
+            window = WS_DEFAULTS["WINDOW"]
+        window = max(1, min(window, WS_DEFAULTS["MAX_WINDOW"]))
+
+        filters = {
+            "types": self._split(params.get("types")),
+            "task_ids": self._split(params.get("task_id")),
+            "user_ids": self._split(params.get("user_id")),
+        }
+
+        await websocket.accept()
+        logger.info(f"[WS] 新连接，编码: {codec}，窗口: {window}")
+
+        session = WebSocketSession(websocket, self.manager, codec, window)
+        await session.run(params.get("last_event_id"), filters)
+
+        logger.info("[WS] 连接已关闭")
+
+    @staticmethod
+    def _split(value: Optional[str]) -> List[str]:
+        """解析逗号分隔的查询参数"""
+        if not value:
+            return []
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# 全局 WebSocket 通道实例
+ws_channel = WebSocketChannel(sse)
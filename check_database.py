@@ -1,12 +1,26 @@
 # -*- encoding: utf-8 -*-
 """
 检查数据库状态
+
+使用方法:
+    python check_database.py                  # 检查 default 用户的数据库
+    python check_database.py --user alice
+    python check_database.py --path /path/to/monitor_data.db
 """
 
-import sqlite3
+import argparse
 import os
+import sqlite3
+
+from backend.models import UserConfig
+from backend.storage.migrations import LATEST_VERSION, get_version, pending
 
-db_path = "e:\\抖音监控\\监控系统\\douyin-main\\temp_data\\users\\default\\monitor_data.db"
+parser = argparse.ArgumentParser(description="检查监控数据库状态")
+parser.add_argument("--user", default="default", help="用户ID")
+parser.add_argument("--path", help="数据库路径，默认为用户数据目录下的 monitor_data.db")
+args = parser.parse_args()
+
+db_path = args.path or os.path.join(UserConfig.get_user_data_dir(args.user), "monitor_data.db")
 
 print("=" * 80)
 print("检查数据库状态")
@@ -20,15 +34,23 @@ else:
     print(f"\n✗ 数据库文件不存在: {db_path}")
     exit(1)
 
-# 连接数据库
+# 以只读方式连接数据库，检查过程不修改数据库
 try:
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
     cursor = conn.cursor()
     print("✓ 数据库连接成功")
 except Exception as e:
     print(f"✗ 数据库连接失败: {e}")
     exit(1)
 
+# 检查结构版本
+version = get_version(conn)
+print(f"\n结构版本: {version}（最新 {LATEST_VERSION}）")
+for migration in pending(conn):
+    print(f"  - 待执行迁移 {migration.version}: {migration.description}")
+if version < LATEST_VERSION:
+    print("  运行 python fix_database.py 或启动服务即可完成迁移")
+
 # 检查表
 cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
 tables = cursor.fetchall()
@@ -43,6 +65,12 @@ for table in tables:
     for col in columns:
         print(f"  - {col[1]} ({col[2]})")
 
+# 检查索引
+cursor.execute("SELECT name, tbl_name FROM sqlite_master WHERE type='index' AND sql IS NOT NULL")
+print("\n索引:")
+for name, table_name in cursor.fetchall():
+    print(f"  - {name} ({table_name})")
+
 # 检查数据
 print("\n数据统计:")
 for table in tables:
@@ -55,4 +83,4 @@ conn.close()
 
 print("\n" + "=" * 80)
 print("检查完成")
-print("=" * 80)
\ No newline at end of file
+print("=" * 80)
@@ -1,73 +1,69 @@
 # -*- encoding: utf-8 -*-
 """
 修复数据库表结构
+
+执行尚未执行的结构迁移（与服务打开数据库时执行的迁移相同），
+适用于旧版本创建的、缺少表或列的数据库。
+
+使用方法:
+    python fix_database.py                    # 修复 default 用户的数据库
+    python fix_database.py --user alice
+    python fix_database.py --path /path/to/monitor_data.db
 """
 
-import sqlite3
+import argparse
 import os
+import sqlite3
+
+from backend.models import UserConfig
+from backend.storage.migrations import get_version, migrate, pending
+
+parser = argparse.ArgumentParser(description="修复监控数据库表结构")
+parser.add_argument("--user", default="default", help="用户ID")
+parser.add_argument("--path", help="数据库路径，默认为用户数据目录下的 monitor_data.db")
+args = parser.parse_args()
 
-db_path = "e:\\抖音监控\\监控系统\\douyin-main\\temp_data\\users\\default\\monitor_data.db"
+db_path = args.path or os.path.join(UserConfig.get_user_data_dir(args.user), "monitor_data.db")
 
 print("=" * 80)
 print("修复数据库表结构")
 print("=" * 80)
 
+if not os.path.exists(db_path):
+    print(f"\n✗ 数据库文件不存在: {db_path}")
+    exit(1)
+
 # 连接数据库
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+conn = sqlite3.connect(db_path, timeout=30)
 
 # 检查现有表
+cursor = conn.cursor()
 cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
 tables = cursor.fetchall()
 print(f"\n现有表: {[t[0] for t in tables]}")
+print(f"结构版本: {get_version(conn)}")
 
-# 创建videos表
-print("\n创建videos表...")
-try:
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS videos (
-            video_id TEXT PRIMARY KEY,
-            account_id TEXT,
-            description TEXT,
-            create_time INTEGER,
-            like_count INTEGER,
-            collect_count INTEGER,
-            comment_count INTEGER,
-            share_count INTEGER,
-            cover_url TEXT,
-            video_url TEXT,
-            collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            hourly_likes INTEGER DEFAULT 0,
-            FOREIGN KEY (account_id) REFERENCES following_accounts (account_id)
-        )
-    ''')
-    print("✓ videos表创建成功")
-except Exception as e:
-    print(f"✗ 创建videos表失败: {e}")
+# 执行迁移
+migrations = pending(conn)
+if not migrations:
+    print("\n✓ 数据库结构已是最新版本")
+for migration in migrations:
+    print(f"\n执行迁移 {migration.version}: {migration.description}...")
+    try:
+        migrate(conn, target=migration.version)
+        print(f"✓ 迁移 {migration.version} 完成")
+    except Exception as e:
+        print(f"✗ 迁移 {migration.version} 失败: {e}")
+        break
 
-# 创建like_history表
-print("\n创建like_history表...")
-try:
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS like_history (
-            video_id TEXT,
-            like_count INTEGER,
-            recorded_at TIMESTAMP,
-            PRIMARY KEY (video_id, recorded_at)
-        )
-    ''')
-    print("✓ like_history表创建成功")
-except Exception as e:
-    print(f"✗ 创建like_history表失败: {e}")
-
-# 检查创建后的表
+# 检查修复后的表
 cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
 tables = cursor.fetchall()
 print(f"\n更新后的表: {[t[0] for t in tables]}")
+print(f"结构版本: {get_version(conn)}")
 
-conn.commit()
 conn.close()
 
 print("\n" + "=" * 80)
 print("数据库修复完成")
-print("=" * 80)
\ No newline at end of file
+print("=" * 80)
@@ -382,10 +382,29 @@ export const App: React.FC = () => {
         // 清理订阅
         unsubResult();
         unsubStatus();
+        unsubResync();
         unsubError();
       }
     });
 
+    // 断线过久、重放缓冲区无法补齐时，重新拉取该任务的全部结果
+    const unsubResync = sseClient.onResync(() => {
+      if (!taskId) {
+        return;
+      }
+      const resyncTaskId = taskId;
+      logger.warn('实时事件有缺失，重新加载采集结果');
+      bridge.getTaskResults(resyncTaskId)
+        .then(data => {
+          if (taskId === resyncTaskId) {
+            setResults(data || []);
+          }
+        })
+        .catch(() => {
+          // 错误已在 bridge 中记录
+        });
+    });
+
     const unsubError = sseClient.onTaskError((event: TaskErrorEvent) => {
       if (taskId && event.task_id === taskId) {
         // 采集失败
@@ -405,6 +424,7 @@ export const App: React.FC = () => {
         // 清理订阅
         unsubResult();
         unsubStatus();
+        unsubResync();
         unsubError();
       }
     });
@@ -6,6 +6,9 @@
  * - task_status: 任务状态变化
  * - task_error: 任务错误
  * - log: 日志消息
+ * - resync: 断线时间过长，重放缓冲区无法补齐，需要重新拉取全量数据
+ *
+ * 每个事件带有递增的事件 ID，手动重连时通过 last_event_id 参数让后端补发错过的事件。
  */
 
 import { DouyinWork } from '../types';
@@ -15,7 +18,7 @@ import { DouyinWork } from '../types';
 // ============================================================================
 
 /** SSE 事件类型 */
-export type SSEEventType = 'task_result' | 'task_status' | 'task_error' | 'log';
+export type SSEEventType = 'task_result' | 'task_status' | 'task_error' | 'log' | 'resync';
 
 /** 采集结果事件数据 */
 export interface TaskResultEvent {
@@ -49,6 +52,12 @@ export interface LogEvent {
   message: string;
 }
 
+/** 重新同步事件数据 */
+export interface ResyncEvent {
+  last_event_id: string;
+  current_event_id: number;
+}
+
 /** 事件处理器类型 */
 type EventHandler<T> = (data: T) => void;
 
@@ -63,6 +72,7 @@ class SSEClient {
   private reconnectAttempts = 0;
   private maxReconnectAttempts = 5;
   private reconnectDelay = 2000;
+  private lastEventId = '';
   
   // 事件处理器
   private handlers: {
@@ -70,11 +80,13 @@ class SSEClient {
     task_status: Set<EventHandler<TaskStatusEvent>>;
     task_error: Set<EventHandler<TaskErrorEvent>>;
     log: Set<EventHandler<LogEvent>>;
+    resync: Set<EventHandler<ResyncEvent>>;
   } = {
     task_result: new Set(),
     task_status: new Set(),
     task_error: new Set(),
     log: new Set(),
+    resync: new Set(),
   };
   
   /**
@@ -93,7 +105,14 @@ class SSEClient {
     this.url = url;
     console.log('[SSE] 正在连接...', url);
     
-    this.eventSource = new EventSource(url);
+    // 手动重连时新建的 EventSource 不会自动携带 Last-Event-ID，改用查询参数
+    let connectUrl = url;
+    if (this.lastEventId) {
+      const separator = url.includes('?') ? '&' : '?';
+      connectUrl = `${url}${separator}last_event_id=${encodeURIComponent(this.lastEventId)}`;
+    }
+    
+    this.eventSource = new EventSource(connectUrl);
     
     this.eventSource.onopen = () => {
       console.log('[SSE] ✓ 连接成功');
@@ -121,6 +140,10 @@ class SSEClient {
       this.handleEvent('log', event);
     });
     
+    this.eventSource.addEventListener('resync', (event) => {
+      this.handleEvent('resync', event);
+    });
+    
     this.eventSource.onerror = (error) => {
       console.error('[SSE] 连接错误:', error);
       
@@ -138,6 +161,9 @@ class SSEClient {
     eventType: T,
     event: MessageEvent
   ): void {
+    if (event.lastEventId) {
+      this.lastEventId = event.lastEventId;
+    }
     try {
       const data = JSON.parse(event.data);
       const handlers = this.handlers[eventType] as Set<EventHandler<unknown>>;
@@ -188,6 +214,7 @@ class SSEClient {
       this.reconnectTimer = null;
     }
     this.reconnectAttempts = 0;
+    this.lastEventId = '';
   }
   
   /**
@@ -237,6 +264,15 @@ class SSEClient {
     return () => this.handlers.log.delete(handler);
   }
   
+  /**
+   * 订阅重新同步事件（收到后应重新拉取任务结果）
+   * @returns 取消订阅函数
+   */
+  onResync(handler: EventHandler<ResyncEvent>): () => void {
+    this.handlers.resync.add(handler);
+    return () => this.handlers.resync.delete(handler);
+  }
+  
   /**
    * 通用事件订阅
    * @returns 取消订阅函数
@@ -247,6 +283,7 @@ class SSEClient {
       T extends 'task_result' ? TaskResultEvent :
       T extends 'task_status' ? TaskStatusEvent :
       T extends 'task_error' ? TaskErrorEvent :
+      T extends 'resync' ? ResyncEvent :
       LogEvent
     >
   ): () => void {
@@ -263,6 +300,7 @@ class SSEClient {
     this.handlers.task_status.clear();
     this.handlers.task_error.clear();
     this.handlers.log.clear();
+    this.handlers.resync.clear();
   }
 }
 
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+下载引擎基准测试
+
+在本机启动一个支持 Range 的 HTTP 服务器，生成一批测试文件和 aria2 输入文件，
+分别用内置下载器（不同分段数）和 aria2c（如果已安装）下载，打印耗时和吞吐量。
+
+使用方法:
+    python tools/bench_download.py
+    python tools/bench_download.py --files 20 --size 50 --concurrency 5
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.downloader.items import read_input_file  # noqa: E402
+from backend.downloader.native import HttpDownloader  # noqa: E402
+
+
+def make_handler(root):
+    class Handler(BaseHTTPRequestHandler):
+        """从 root 目录读取文件，支持 Range 和 keep-alive"""
+
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            path = os.path.join(root, os.path.basename(self.path))
+            size = os.path.getsize(path)
+            start, end = 0, size - 1
+            header = self.headers.get('Range')
+            if header:
+                first, _, last = header[len('bytes='):].partition('-')
+                start, end = int(first), int(last) if last else size - 1
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+            else:
+                self.send_response(200)
+            self.send_header('Content-Length', str(end - start + 1))
+            self.end_headers()
+            remaining = end - start + 1
+            with open(path, 'rb') as f:
+                f.seek(start)
+                try:
+                    while remaining:
+                        data = f.read(min(remaining, 1024 * 1024))
+                        self.wfile.write(data)
+                        remaining -= len(data)
+                except ConnectionError:
+                    pass
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def run_native(conf, out_dir, segments, concurrency):
+    entries = read_input_file(conf, out_dir)
+    downloader = HttpDownloader(segments=segments, min_segment_size=1024 * 1024)
+    return asyncio.run(downloader.fetch_all(entries, concurrency=concurrency, per_host=concurrency))
+
+
+def run_aria2(aria2c, conf, out_dir, segments, concurrency):
+    subprocess.run(
+        [aria2c, '-i', conf, '-d', out_dir, '-j', str(concurrency), '-x', str(segments),
+         '-s', str(segments), '-k', '1M', '--file-allocation=falloc',
+         '--console-log-level=warn', '--summary-interval=0'],
+        check=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='下载引擎基准测试')
+    parser.add_argument('--files', type=int, default=10, help='文件数')
+    parser.add_argument('--size', type=int, default=32, help='单个文件大小（MB）')
+    parser.add_argument('--concurrency', type=int, default=5, help='同时下载的文件数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, 'www')
+        os.makedirs(root)
+        chunk = os.urandom(1024 * 1024)
+        for i in range(args.files):
+            with open(os.path.join(root, f'{i}.bin'), 'wb') as f:
+                for _ in range(args.size):
+                    f.write(chunk)
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(root))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        conf = os.path.join(tmp, 'aria2.txt')
+        with open(conf, 'w', encoding='utf-8') as f:
+            f.writelines(f'{base}/{i}.bin\n out={i}.bin\n' for i in range(args.files))
+
+        total_mb = args.files * args.size
+        print(f'{args.files} 个文件 × {args.size} MB，同时下载 {args.concurrency} 个\n')
+        print(f'{"引擎":<16}{"耗时(秒)":>10}{"吞吐量(MB/s)":>16}')
+
+        runs = [(f'内置 分段={n}', lambda out, n=n: run_native(conf, out, n, args.concurrency))
+                for n in (1, 4)]
+        aria2c = shutil.which('aria2c')
+        if aria2c:
+            runs += [(f'aria2c 分段={n}',
+                      lambda out, n=n: run_aria2(aria2c, conf, out, n, args.concurrency))
+                     for n in (1, 4)]
+        for name, run in runs:
+            out_dir = os.path.join(tmp, 'out')
+            started = time.perf_counter()
+            run(out_dir)
+            elapsed = time.perf_counter() - started
+            print(f'{name:<16}{elapsed:>10.2f}{total_mb / elapsed:>16.1f}')
+            shutil.rmtree(out_dir)
+        if not aria2c:
+            print('\n未找到 aria2c，跳过对比')
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
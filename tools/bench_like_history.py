@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+点赞历史查询基准测试
+
+生成一个包含大量点赞历史（默认 100 万条）的临时数据库，对比：
+1. 逐个视频查询一小时前的点赞数（旧写法）
+2. 窗口函数一次计算整批视频的小时增量（UserDatabase.hourly_deltas）
+3. 监控列表按小时增量排序
+
+并打印每条查询的 EXPLAIN QUERY PLAN，确认走的是索引而不是全表扫描。
+
+使用方法:
+    python tools/bench_like_history.py
+    python tools/bench_like_history.py --rows 1000000 --videos 20000 --batch 200
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.storage.migrations import migrate  # noqa: E402
+from backend.storage.user_db import UserDatabase  # noqa: E402
+
+PER_VIDEO_SQL = '''
+    SELECT like_count FROM like_history
+    WHERE video_id = ? AND recorded_at >= ?
+    ORDER BY recorded_at ASC LIMIT 1
+'''
+
+RANKING_SQL = '''
+    SELECT v.video_id, v.hourly_likes, v.like_count, a.nickname
+    FROM videos v
+    JOIN following_accounts a ON v.account_id = a.account_id
+    ORDER BY v.hourly_likes DESC, v.like_count DESC
+    LIMIT 100
+'''
+
+
+def populate(conn, rows, videos):
+    """生成视频和点赞历史，记录均匀分布在最近 48 小时内"""
+    now = datetime.now()
+    per_video = max(1, rows // videos)
+    step = timedelta(hours=48) / per_video
+    cursor = conn.cursor()
+    cursor.executemany(
+        'INSERT INTO following_accounts (account_id, sec_uid, nickname) VALUES (?, ?, ?)',
+        [(f'acc{i}', f'acc{i}', f'账号{i}') for i in range(videos // 50 + 1)]
+    )
+    cursor.executemany(
+        'INSERT INTO videos (video_id, account_id, create_time, like_count, hourly_likes) '
+        'VALUES (?, ?, ?, ?, ?)',
+        [(f'v{i}', f'acc{i // 50}', int(now.timestamp()) - i * 60,
+          random.randint(0, 10 ** 6), random.randint(0, 10 ** 4)) for i in range(videos)]
+    )
+    for i in range(videos):
+        start = now - timedelta(hours=48)
+        likes = random.randint(0, 1000)
+        history = []
+        for j in range(per_video):
+            likes += random.randint(0, 50)
+            history.append((f'v{i}', likes, start + step * j))
+        cursor.executemany(
+            'INSERT INTO like_history (video_id, like_count, recorded_at) VALUES (?, ?, ?)',
+            history
+        )
+    conn.commit()
+    return per_video * videos
+
+
+def explain(conn, title, sql, params):
+    print(f'\n{title} 查询计划:')
+    for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params):
+        print(f'  {row[-1]}')
+
+
+def bench(label, fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f'{label}: {elapsed * 1000:.2f} ms')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='点赞历史查询基准测试')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='点赞历史记录数')
+    parser.add_argument('--videos', type=int, default=20_000, help='视频数')
+    parser.add_argument('--batch', type=int, default=200, help='每批计算增量的视频数')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        conn.execute('PRAGMA journal_mode=WAL')
+        migrate(conn)
+
+        print(f'生成 {args.rows} 条点赞历史（{args.videos} 个视频）...')
+        start = time.perf_counter()
+        total = populate(conn, args.rows, args.videos)
+        conn.execute('ANALYZE')
+        print(f'实际生成 {total} 条，用时 {time.perf_counter() - start:.1f} s')
+
+        since = datetime.now() - timedelta(hours=1)
+        batch = [f'v{i}' for i in random.sample(range(args.videos), min(args.batch, args.videos))]
+        cursor = conn.cursor()
+
+        explain(conn, '逐个视频', PER_VIDEO_SQL, (batch[0], since))
+        explain(conn, '窗口函数批量', UserDatabase.HOURLY_DELTA_SQL, ('["v0"]', since))
+        explain(conn, '监控列表排序', RANKING_SQL, ())
+
+        print(f'\n每批 {len(batch)} 个视频:')
+
+        def per_video():
+            for video_id in batch:
+                cursor.execute(PER_VIDEO_SQL, (video_id, since)).fetchone()
+
+        per_video_time = bench('逐个视频查询', per_video, args.repeat)
+        batch_time = bench(
+            '窗口函数批量查询',
+            lambda: UserDatabase.hourly_deltas(cursor, batch, since),
+            args.repeat
+        )
+        bench('监控列表排序', lambda: conn.execute(RANKING_SQL).fetchall(), args.repeat)
+        print(f'批量查询 / 逐个查询: {batch_time / per_video_time:.2f}')
+
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
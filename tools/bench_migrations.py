@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+数据库迁移基准测试
+
+生成一个旧版本结构（user_version 为 0，只有基础表、没有索引）且包含大量点赞历史
+（默认 100 万条）的临时数据库，然后执行全部迁移：
+1. 打印每个迁移的耗时
+2. 迁移期间另一个线程持续读取监控列表，打印读取次数和最长等待时间，
+   确认 WAL 模式下迁移不会阻塞读取
+
+使用方法:
+    python tools/bench_migrations.py
+    python tools/bench_migrations.py --rows 5000000 --videos 50000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.storage.migrations import MIGRATIONS, get_version, migrate  # noqa: E402
+
+READ_SQL = '''
+    SELECT v.video_id, v.like_count FROM videos v
+    WHERE v.account_id = ? ORDER BY v.create_time DESC LIMIT 20
+'''
+
+
+def populate(conn, rows, videos):
+    """按旧版本结构生成视频和点赞历史"""
+    migrate(conn, target=1)
+    conn.execute('PRAGMA user_version = 0')
+    now = datetime.now()
+    per_video = max(1, rows // videos)
+    step = timedelta(hours=48) / per_video
+    cursor = conn.cursor()
+    cursor.executemany(
+        'INSERT INTO videos (video_id, account_id, create_time, like_count) VALUES (?, ?, ?, ?)',
+        [(f'v{i}', f'acc{i // 50}', int(now.timestamp()) - i * 60, random.randint(0, 10 ** 6))
+         for i in range(videos)]
+    )
+    for i in range(videos):
+        start = now - timedelta(hours=48)
+        cursor.executemany(
+            'INSERT INTO like_history (video_id, like_count, recorded_at) VALUES (?, ?, ?)',
+            [(f'v{i}', j, start + step * j) for j in range(per_video)]
+        )
+    conn.commit()
+    return per_video * videos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据库迁移基准测试')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='点赞历史记录数')
+    parser.add_argument('--videos', type=int, default=20_000, help='视频数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+
+        print(f'生成 {args.rows} 条点赞历史（{args.videos} 个视频）...')
+        start = time.perf_counter()
+        total = populate(conn, args.rows, args.videos)
+        print(f'实际生成 {total} 条，用时 {time.perf_counter() - start:.1f} s，'
+              f'文件大小 {os.path.getsize(db_path) / 1024 / 1024:.1f} MB')
+
+        stop = threading.Event()
+        reads = []
+
+        def reader():
+            read_conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True, timeout=30)
+            while not stop.is_set():
+                begin = time.perf_counter()
+                read_conn.execute(READ_SQL, (f'acc{random.randrange(args.videos // 50 + 1)}',)).fetchall()
+                reads.append(time.perf_counter() - begin)
+            read_conn.close()
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+
+        print(f'\n从版本 {get_version(conn)} 迁移到 {MIGRATIONS[-1].version}:')
+        start = time.perf_counter()
+        for migration in MIGRATIONS:
+            begin = time.perf_counter()
+            migrate(conn, target=migration.version)
+            print(f'  {migration.version} {migration.description}: '
+                  f'{(time.perf_counter() - begin) * 1000:.1f} ms')
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        thread.join()
+        conn.close()
+
+        print(f'迁移总耗时: {elapsed:.2f} s')
+        if reads:
+            print(f'迁移期间读取 {len(reads)} 次，平均 {sum(reads) / len(reads) * 1000:.2f} ms，'
+                  f'最长 {max(reads) * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+下载目录去重工具
+
+扫描下载目录，按文件内容（SHA-256）查找重复文件，把重复的文件替换为硬链接，
+同一作品出现在多个采集目标目录时只占用一份磁盘空间。
+默认只统计不修改，确认后加 --apply 执行。
+
+使用方法:
+    python tools/dedup_downloads.py                 # 扫描设置中的下载目录
+    python tools/dedup_downloads.py D:/下载 E:/备份
+    python tools/dedup_downloads.py --apply
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.constants import DOWNLOAD_DIR  # noqa: E402
+from backend.downloader.dedup import deduplicate, find_duplicates  # noqa: E402
+from backend.settings import settings  # noqa: E402
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TB'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='下载目录去重工具')
+    parser.add_argument('roots', nargs='*', help='要扫描的目录，默认使用设置中的下载目录')
+    parser.add_argument('--apply', action='store_true', help='把重复文件替换为硬链接')
+    parser.add_argument('--min-size', type=int, default=1024, help='忽略小于该大小的文件（字节）')
+    parser.add_argument('-v', '--verbose', action='store_true', help='列出每组重复文件')
+    args = parser.parse_args()
+
+    roots = args.roots or [settings.get('downloadPath', DOWNLOAD_DIR)]
+    started = time.perf_counter()
+    groups = find_duplicates(roots, min_size=args.min_size)
+    print(f'扫描完成，用时 {time.perf_counter() - started:.1f} 秒，发现 {len(groups)} 组重复文件')
+
+    if args.verbose:
+        for group in groups:
+            print(f'\n{group[0]}')
+            for path in group[1:]:
+                print(f'  = {path}')
+
+    linked, saved = deduplicate(groups, dry_run=not args.apply)
+    if args.apply:
+        print(f'已替换 {linked} 个文件为硬链接，节省 {format_size(saved)}')
+    else:
+        print(f'可替换 {linked} 个文件，节省 {format_size(saved)}（加 --apply 执行）')
+
+
+if __name__ == '__main__':
+    main()